@@ -1,5 +1,7 @@
 import json
 import os
+import shutil
+import sys
 import threading
 import time
 import argparse
@@ -116,39 +118,131 @@ def stream_audio(audio_path: str, ws) -> None:
     ws.send("")
 
 
-# Convert tokens into a readable transcript.
-def render_tokens(final_tokens: list[dict], non_final_tokens: list[dict]) -> str:
-    text_parts: list[str] = []
-    current_speaker: Optional[str] = None
-    current_language: Optional[str] = None
-
-    # Process all tokens in order.
-    for token in final_tokens + non_final_tokens:
-        text = token["text"]
-        speaker = token.get("speaker")
-        language = token.get("language")
-        is_translation = token.get("translation_status") == "translation"
-
-        # Speaker changed -> add a speaker tag.
-        if speaker is not None and speaker != current_speaker:
-            if current_speaker is not None:
-                text_parts.append("\n\n")
-            current_speaker = speaker
-            current_language = None  # Reset language on speaker changes.
-            text_parts.append(f"Speaker {current_speaker}:")
-
-        # Language changed -> add a language or translation tag.
-        if language is not None and language != current_language:
-            current_language = language
-            prefix = "[Translation] " if is_translation else ""
-            text_parts.append(f"\n{prefix}[{current_language}] ")
-            text = text.lstrip()
-
-        text_parts.append(text)
+# Incrementally convert tokens into a readable transcript.
+# Final tokens are rendered once, when they arrive, and appended to the final
+# prefix together with the speaker/language state they leave behind. Each
+# response then only renders its non-final tail, starting from that state, so
+# the cost per response does not grow with the length of the session.
+class TranscriptRenderer:
+    def __init__(self):
+        self.final_parts: list[str] = []
+        self.speaker: Optional[str] = None
+        self.language: Optional[str] = None
+
+    @staticmethod
+    def _render(tokens: list[dict], speaker: Optional[str], language: Optional[str]):
+        text_parts: list[str] = []
+        for token in tokens:
+            text = token["text"]
+            token_speaker = token.get("speaker")
+            token_language = token.get("language")
+            is_translation = token.get("translation_status") == "translation"
+
+            # Speaker changed -> add a speaker tag.
+            if token_speaker is not None and token_speaker != speaker:
+                if speaker is not None:
+                    text_parts.append("\n\n")
+                speaker = token_speaker
+                language = None  # Reset language on speaker changes.
+                text_parts.append(f"Speaker {speaker}:")
+
+            # Language changed -> add a language or translation tag.
+            if token_language is not None and token_language != language:
+                language = token_language
+                prefix = "[Translation] " if is_translation else ""
+                text_parts.append(f"\n{prefix}[{language}] ")
+                text = text.lstrip()
+
+            text_parts.append(text)
+        return "".join(text_parts), speaker, language
+
+    # Render new final tokens onto the prefix; returns the newly rendered text.
+    def add_final(self, tokens: list[dict]) -> str:
+        text, self.speaker, self.language = self._render(tokens, self.speaker, self.language)
+        if text:
+            self.final_parts.append(text)
+        return text
+
+    # Render the non-final tail from the state left by the final prefix.
+    def render_tail(self, non_final_tokens: list[dict]) -> str:
+        return self._render(non_final_tokens, self.speaker, self.language)[0]
+
+    def final_text(self) -> str:
+        if len(self.final_parts) > 1:
+            self.final_parts[:] = ["".join(self.final_parts)]
+        return self.final_parts[0] if self.final_parts else ""
 
-    text_parts.append("\n===============================")
 
-    return "".join(text_parts)
+# Convert tokens into a readable transcript.
+def render_tokens(final_tokens: list[dict], non_final_tokens: list[dict]) -> str:
+    renderer = TranscriptRenderer()
+    renderer.add_final(final_tokens)
+    return renderer.final_text() + renderer.render_tail(non_final_tokens) + "\n==============================="
+
+
+# Terminal output that never reprints finalized text: new final text is
+# written once, and only the region holding the previous non-final tail is
+# erased (ANSI cursor-up + clear-to-end) and redrawn.
+class TerminalView:
+    def __init__(self, stream=None, width: Optional[int] = None):
+        self.stream = stream or sys.stdout
+        self.width = width or shutil.get_terminal_size().columns
+        # Cursor position at the end of the final text; "pending" is the
+        # terminal's deferred wrap after a character in the last column.
+        self.column = 0
+        self.pending = False
+        self.last_char = ""
+        self.tail_rows = 0  # Rows the tail moved the cursor down.
+        self.tail = ""
+
+    # Follow the cursor through text with the terminal's auto-wrap rules.
+    def _advance(self, text: str, column: int, pending: bool):
+        rows = 0
+        for index, line in enumerate(text.split("\n")):
+            if index:
+                rows += 1
+                column = 0
+                pending = False
+            if line:
+                if pending:
+                    rows += 1
+                    column = 0
+                last = column + len(line) - 1
+                rows += last // self.width
+                column = last % self.width
+                pending = column == self.width - 1
+                if not pending:
+                    column += 1
+        return rows, column, pending
+
+    def update(self, new_final: str, tail: str) -> None:
+        if not new_final and tail == self.tail:
+            return
+        out: list[str] = []
+        if self.tail:
+            # Back to where the final text ends, then clear everything after it.
+            out.append("\r")
+            if self.pending:
+                # The tail starts on the next row; clear from there, then rewrite
+                # the final text's last character to restore the pending wrap.
+                if self.tail_rows > 1:
+                    out.append(f"\x1b[{self.tail_rows - 1}A")
+                out.append(f"\x1b[J\x1b[A\x1b[{self.width - 1}C{self.last_char}")
+            else:
+                if self.tail_rows:
+                    out.append(f"\x1b[{self.tail_rows}A")
+                if self.column:
+                    out.append(f"\x1b[{self.column}C")
+                out.append("\x1b[J")
+        if new_final:
+            out.append(new_final)
+            self.last_char = new_final[-1]
+            _, self.column, self.pending = self._advance(new_final, self.column, self.pending)
+        out.append(tail)
+        self.tail_rows, _, _ = self._advance(tail, self.column, self.pending)
+        self.tail = tail
+        self.stream.write("".join(out))
+        self.stream.flush()
 
 
 def run_session(
@@ -156,6 +250,7 @@ def run_session(
     audio_path: str,
     audio_format: str,
     translation: str,
+    output: str = "full",
 ) -> None:
     config = get_config(api_key, audio_format, translation)
 
@@ -173,7 +268,8 @@ def run_session(
 
         print("Session started.")
 
-        final_tokens: list[dict] = []
+        renderer = TranscriptRenderer()
+        view = TerminalView() if output == "terminal" else None
 
         try:
             while True:
@@ -187,23 +283,28 @@ def run_session(
                     break
 
                 # Parse tokens from current response.
+                new_final_tokens: list[dict] = []
                 non_final_tokens: list[dict] = []
                 for token in res.get("tokens", []):
                     if token.get("text"):
                         if token.get("is_final"):
-                            # Final tokens are returned once and should be appended to final_tokens.
-                            final_tokens.append(token)
+                            # Final tokens are returned once and are rendered onto the final prefix.
+                            new_final_tokens.append(token)
                         else:
                             # Non-final tokens update as more audio arrives; reset them on every response.
                             non_final_tokens.append(token)
 
-                # Render tokens.
-                text = render_tokens(final_tokens, non_final_tokens)
-                print(text)
+                # Render tokens; only the new finals and the non-final tail are processed.
+                new_final = renderer.add_final(new_final_tokens)
+                tail = renderer.render_tail(non_final_tokens)
+                if view is not None:
+                    view.update(new_final, tail)
+                else:
+                    print(renderer.final_text() + tail + "\n===============================")
 
                 # Session finished.
                 if res.get("finished"):
-                    print("Session finished.")
+                    print("\nSession finished." if view is not None else "Session finished.")
 
         except ConnectionClosedOK:
             # Normal, server closed after finished.
@@ -214,18 +315,87 @@ def run_session(
             print(f"Error: {e}")
 
 
+# Synthetic response: new final tokens plus a non-final tail, with speaker and
+# language changes so the tags are exercised.
+def _bench_tokens(start: int, count: int, is_final: bool) -> list[dict]:
+    return [
+        {
+            "text": f" word{start + i}",
+            "speaker": str((start + i) // 40 % 2 + 1),
+            "language": "en" if (start + i) // 15 % 3 else "es",
+            "is_final": is_final,
+        }
+        for i in range(count)
+    ]
+
+
+# Time per response for each way of producing the transcript, after a session
+# that already has `finals` final tokens. "old render" re-renders the whole
+# transcript from all tokens, as every response did before TranscriptRenderer.
+def run_benchmark(sizes: list[int], responses: int) -> None:
+    print(f"Time per response ({responses} responses of 2 new finals + 6 partials)")
+    print(f"{'finals':>9} {'old render':>12} {'incremental':>12} {'full output':>12} {'terminal':>12}")
+    with open(os.devnull, "w") as devnull:
+        for finals in sizes:
+            history = _bench_tokens(0, finals, True)
+            batches = [
+                (_bench_tokens(finals + 2 * i, 2, True), _bench_tokens(finals + 2 * i + 2, 6, False))
+                for i in range(responses)
+            ]
+            timings = []
+
+            # Old: all final tokens so far plus the tail, rendered from scratch.
+            final_tokens = list(history)
+            start = time.perf_counter()
+            for new_final_tokens, non_final_tokens in batches:
+                final_tokens += new_final_tokens
+                render_tokens(final_tokens, non_final_tokens)
+            timings.append(time.perf_counter() - start)
+
+            # Incremental rendering only; then with the full transcript string
+            # built for printing; then through the terminal view.
+            for output in ("incremental", "full", "terminal"):
+                renderer = TranscriptRenderer()
+                renderer.add_final(history)
+                renderer.final_text()
+                view = TerminalView(stream=devnull, width=80) if output == "terminal" else None
+                start = time.perf_counter()
+                for new_final_tokens, non_final_tokens in batches:
+                    new_final = renderer.add_final(new_final_tokens)
+                    tail = renderer.render_tail(non_final_tokens)
+                    if view is not None:
+                        view.update(new_final, tail)
+                    elif output == "full":
+                        devnull.write(renderer.final_text() + tail + "\n===============================")
+                timings.append(time.perf_counter() - start)
+
+            cells = " ".join(f"{t / responses * 1e6:>9.1f} us" for t in timings)
+            print(f"{finals:>9,} {cells}")
+
+
 def main():
     parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", action="store_true",
+                        help="benchmark transcript rendering against session length instead of streaming audio")
+    parser.add_argument("--bench_sizes", default="1000,10000,100000",
+                        help="comma-separated numbers of final tokens already in the session")
+    parser.add_argument("--bench_responses", type=int, default=200)
     parser.add_argument("--audio_path", type=str)
     parser.add_argument("--audio_format", default="auto")
     parser.add_argument("--translation", default="none")
+    parser.add_argument("--output", choices=["full", "terminal"], default="full",
+                        help="full: print the whole transcript per response; terminal: redraw only what changed")
     args = parser.parse_args()
 
+    if args.bench:
+        run_benchmark([int(size) for size in args.bench_sizes.split(",")], args.bench_responses)
+        return
+
     api_key = os.environ.get("SONIOX_API_KEY")
     if api_key is None:
         raise RuntimeError("Missing SONIOX_API_KEY.")
 
-    run_session(api_key, args.audio_path, args.audio_format, args.translation)
+    run_session(api_key, args.audio_path, args.audio_format, args.translation, args.output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,252 @@
+import multiprocessing as mp
+import queue
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from PySide6.QtCore import QObject, QTimer, Signal
+from src.config import EXTRA_INPUT_SOURCES
+
+# Per source: rms_db, peak_db, update counter.
+_LEVEL_FIELDS = 3
+
+
+def level_slots(extra_sources=EXTRA_INPUT_SOURCES) -> dict:
+    """Row of the shared level block for every source label that can be configured."""
+    labels = ["host", "speaker"]
+    for entry in extra_sources:
+        label = entry.get("label") if isinstance(entry, dict) else None
+        if label and label not in labels:
+            labels.append(label)
+    return {label: slot for slot, label in enumerate(labels)}
+
+# Controller methods the GUI may invoke in the engine process.
+ALLOWED_COMMANDS = {
+    "transcription": {"start_session", "start_sources", "stop_session", "cleanup"},
+    "recording": {"start_recording", "start_sources", "stop_recording", "set_base_dir", "set_codec", "cleanup"},
+}
+FORWARDED_SIGNALS = {
+    "transcription": ("status_changed", "error_occurred", "transcription_update", "translation_update",
+                      "utterance_completed", "session_started", "session_stopped"),
+    "recording": ("status_changed", "error_occurred", "recording_saved", "segment_closed",
+                  "recording_started", "recording_stopped"),
+}
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach without registering with the resource tracker; the GUI owns the block."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _engine_main(commands, events, levels_name: str, slots: dict, base_dir: str):
+    """
+    Entry point of the engine process.
+
+    Runs the real TranscriptionController and RecordingController (and so all
+    InputStreams, Soniox sessions and recorders) under a QCoreApplication.
+    Their signals are forwarded to the GUI over ``events``; levels are written
+    to the shared-memory block instead, one row per label in ``slots``, so
+    meters never queue up.
+    """
+    from PySide6.QtCore import QCoreApplication
+    from src.controllers.transcription_controller import TranscriptionController
+    from src.controllers.recording_controller import RecordingController
+    from src.level_meter import connect_level_producers
+    from src.audio_sources import resolve_sources
+    from src.device_registry import DeviceRegistry
+
+    app = QCoreApplication([])
+    shm = _attach_shared_memory(levels_name)
+    levels = np.ndarray((len(slots), _LEVEL_FIELDS), dtype=np.float64, buffer=shm.buf)
+
+    controllers = {
+        "transcription": TranscriptionController(),
+        "recording": RecordingController(base_dir),
+    }
+    # This process has its own PortAudio instance; GUI-side indices are not valid here.
+    devices = DeviceRegistry()
+
+    def forward(channel, name):
+        return lambda *args: events.put((channel, name, args))
+
+    def write_level(input_source, rms_db, peak_db):
+        slot = slots.get(input_source)
+        if slot is not None:
+            row = levels[slot]
+            row[0] = rms_db
+            row[1] = peak_db
+            row[2] += 1
+
+    for channel, controller in controllers.items():
+        for name in FORWARDED_SIGNALS[channel]:
+            getattr(controller, name).connect(forward(channel, name))
+    connect_level_producers(controllers["transcription"], controllers["recording"], write_level)
+
+    parent = mp.parent_process()
+
+    def poll():
+        if parent is not None and not parent.is_alive():
+            app.quit()
+            return
+        while True:
+            try:
+                command = commands.get_nowait()
+            except queue.Empty:
+                return
+            if command is None:
+                for controller in controllers.values():
+                    controller.cleanup()
+                app.quit()
+                return
+            channel, method, args, kwargs = command
+            if method in ALLOWED_COMMANDS.get(channel, ()):
+                try:
+                    if method == "start_sources":
+                        sources, missing = resolve_sources(args[0], devices)
+                        for source in missing:
+                            events.put((channel, "status_changed",
+                                        (f"Input source {source.label} skipped: device {source.device_key!r} not available",)))
+                        args = (sources,) + tuple(args[1:])
+                    getattr(controllers[channel], method)(*args, **kwargs)
+                except Exception as e:
+                    events.put((channel, "error_occurred", (f"Engine command {method} failed: {e}",)))
+
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(10)
+    events.put(("engine", "ready", ()))
+    app.exec()
+    try:
+        shm.close()
+    except BufferError:
+        pass  # write_level still holds a view; the mapping goes away with the process
+
+
+class AudioEngineClient(QObject):
+    """
+    GUI-side handle on the out-of-process audio engine.
+
+    Capture, Soniox streaming and recording run in a separate process (see
+    ``_engine_main``), so GUI stalls cannot starve the audio callbacks and a
+    crash there cannot take the window down. Commands go over a
+    multiprocessing queue, controller signals come back over another and are
+    dispatched to handlers registered per channel. Levels are read from shared
+    memory at ``level_rate_hz``, one row per label in ``slots`` (by default
+    host, speaker and the EXTRA_INPUT_SOURCES labels). If the process dies it is restarted with
+    exponential backoff and ``engine_restarted`` is emitted so controllers can
+    resume what they were doing.
+    """
+
+    level_changed = Signal(str, float, float)
+    engine_restarted = Signal(int)
+    engine_crashed = Signal(str)
+
+    def __init__(self, base_dir: str, level_rate_hz: float = 20.0, slots: dict = None, parent=None):
+        super().__init__(parent)
+        self._base_dir = base_dir
+        self._ctx = mp.get_context("spawn")
+        self._handlers = {}
+        self._process = None
+        self._commands = None
+        self._events = None
+        self._shutting_down = False
+        self.restarts = 0
+        self._restart_pending = False
+
+        self._slots = dict(slots) if slots is not None else level_slots()
+        self._shm = shared_memory.SharedMemory(create=True, size=len(self._slots) * _LEVEL_FIELDS * 8)
+        self._levels = np.ndarray((len(self._slots), _LEVEL_FIELDS), dtype=np.float64, buffer=self._shm.buf)
+        self._levels[:] = 0
+        self._level_seen = [0.0] * len(self._slots)
+
+        self._event_timer = QTimer(self)
+        self._event_timer.timeout.connect(self._poll_events)
+        self._level_timer = QTimer(self)
+        self._level_timer.timeout.connect(self._poll_levels)
+        self._level_interval_ms = int(1000 / level_rate_hz)
+
+    def register(self, channel: str, handler):
+        """Deliver (signal_name, args) events of channel to handler."""
+        self._handlers[channel] = handler
+
+    def start(self):
+        self._shutting_down = False
+        self._commands = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_engine_main,
+            args=(self._commands, self._events, self._shm.name, self._slots, self._base_dir),
+            name="AudioEngine",
+            daemon=True,
+        )
+        self._process.start()
+        self._event_timer.start(10)
+        self._level_timer.start(self._level_interval_ms)
+        print(f"[AudioEngine] Started engine process (pid {self._process.pid})")
+
+    def send(self, channel: str, method: str, *args, **kwargs):
+        """Invoke a controller method in the engine process."""
+        if self._commands is not None:
+            self._commands.put((channel, method, args, kwargs))
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _poll_events(self):
+        for _ in range(200):
+            try:
+                channel, name, args = self._events.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                break
+            handler = self._handlers.get(channel)
+            if handler is not None:
+                handler(name, args)
+
+        if not self._shutting_down and not self._restart_pending and not self.is_alive():
+            self._on_crash()
+
+    def _poll_levels(self):
+        for source, index in self._slots.items():
+            counter = self._levels[index, 2]
+            if counter != self._level_seen[index]:
+                self._level_seen[index] = counter
+                self.level_changed.emit(source, float(self._levels[index, 0]), float(self._levels[index, 1]))
+
+    def _on_crash(self):
+        exitcode = self._process.exitcode if self._process is not None else None
+        self._restart_pending = True
+        delay = min(30.0, 0.5 * 2 ** self.restarts)
+        message = f"Audio engine exited unexpectedly (code {exitcode}); restarting in {delay:.1f}s"
+        print(f"[AudioEngine] {message}")
+        self.engine_crashed.emit(message)
+        QTimer.singleShot(int(delay * 1000), self._restart)
+
+    def _restart(self):
+        self._restart_pending = False
+        if self._shutting_down:
+            return
+        self.restarts += 1
+        self.start()
+        self.engine_restarted.emit(self.restarts)
+
+    def shutdown(self, timeout: float = 3.0):
+        """Stop all capture in the engine and terminate the process."""
+        self._shutting_down = True
+        self._event_timer.stop()
+        self._level_timer.stop()
+        if self._process is not None:
+            try:
+                self._commands.put(None)
+            except Exception:
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        if self._levels is not None:
+            self._levels = None
+            self._shm.close()
+            self._shm.unlink()
@@ -0,0 +1,87 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+@dataclass
+class AudioSource:
+    """
+    One labelled capture input; the label doubles as the ``input_source`` of its signals.
+
+    ``device_key`` is the DeviceRegistry key of the device, when known. PortAudio
+    indices are only meaningful in the process that queried them, so a process
+    with its own PortAudio instance (the audio engine) re-resolves
+    ``device_id`` from the key with :func:`resolve_sources`.
+    """
+    label: str
+    device_id: int
+    mode: str = "transcription"
+    target_lang: Optional[str] = None
+    device_key: Optional[str] = None
+
+
+def resolve_sources(sources: list, registry):
+    """
+    Map sources with a ``device_key`` to their index in registry's PortAudio instance.
+
+    The registry is refreshed first, and rescanned when a key is not in the
+    current snapshot (a device plugged in since PortAudio was initialized).
+
+    Returns:
+        (resolved, missing): sources with current device_ids, and the sources
+        whose device is no longer available
+    """
+    registry.refresh()
+    if any(s.device_key is not None and registry.get(s.device_key) is None for s in sources):
+        registry.refresh(rescan=True)
+    resolved, missing = [], []
+    for source in sources:
+        if source.device_key is None:
+            resolved.append(source)
+            continue
+        index = registry.index_of(source.device_key)
+        if index is None:
+            missing.append(source)
+        else:
+            resolved.append(replace(source, device_id=index))
+    return resolved, missing
+
+
+class SourceRegistry:
+    """Ordered set of AudioSources keyed by label."""
+
+    def __init__(self, sources=()):
+        self._sources = {}
+        for source in sources:
+            self.add(source)
+
+    @classmethod
+    def from_host_speaker(cls, host_device_id: int, speaker_device_id: int = None,
+                          mode: str = "transcription", target_lang: str = None) -> "SourceRegistry":
+        """The classic two-slot setup: "host" plus an optional "speaker"."""
+        registry = cls([AudioSource("host", host_device_id, mode, target_lang)])
+        if speaker_device_id is not None:
+            registry.add(AudioSource("speaker", speaker_device_id, mode, target_lang))
+        return registry
+
+    def add(self, source: AudioSource):
+        if source.label in self._sources:
+            raise ValueError(f"Duplicate input source label: {source.label}")
+        self._sources[source.label] = source
+
+    def remove(self, label: str):
+        self._sources.pop(label, None)
+
+    def get(self, label: str) -> Optional[AudioSource]:
+        return self._sources.get(label)
+
+    def labels(self) -> list:
+        return list(self._sources)
+
+    def device_ids(self) -> list:
+        return [source.device_id for source in self._sources.values()]
+
+    def __iter__(self):
+        return iter(list(self._sources.values()))
+
+    def __len__(self):
+        return len(self._sources)
@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import soundfile as sf
+
+RECORDING_CODECS = {
+    "wav": {"label": "WAV (PCM 16-bit)", "format": "WAV", "subtype": "PCM_16", "extension": "wav"},
+    "flac": {"label": "FLAC (lossless)", "format": "FLAC", "subtype": "PCM_16", "extension": "flac"},
+    "opus": {"label": "Ogg Opus (lossy)", "format": "OGG", "subtype": "OPUS", "extension": "ogg"},
+    "rf64": {"label": "RF64 (PCM 16-bit, no 4 GB limit)", "format": "RF64", "subtype": "PCM_16", "extension": "wav"},
+    "w64": {"label": "Wave64 (PCM 16-bit, no 4 GB limit)", "format": "W64", "subtype": "PCM_16", "extension": "w64"},
+}
+
+# Formats whose header carries the data length and must be rewritten to be readable.
+HEADER_FORMATS = ("WAV", "RF64", "W64")
+# Classic RIFF sizes are 32-bit; rotate plain WAV segments before they reach 4 GB.
+WAV_MAX_BYTES = 4 * 1024 ** 3 - 64 * 1024 ** 2
+SFC_UPDATE_HEADER_NOW = 0x1060
+
+# libopus only runs at these rates; other device rates are recorded at 48 kHz.
+OPUS_SAMPLERATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def codec_is_compressed(codec: str) -> bool:
+    return RECORDING_CODECS[codec]["format"] not in HEADER_FORMATS
+
+
+def codec_extension(codec: str) -> str:
+    return RECORDING_CODECS[codec]["extension"]
+
+
+def codec_samplerate(codec: str, samplerate: int) -> int:
+    """Return the capture rate to use for codec, given the device's preferred rate."""
+    if codec == "opus" and int(samplerate) not in OPUS_SAMPLERATES:
+        return 48000
+    return int(samplerate)
+
+
+def open_audio_file(filepath: str, samplerate: int, channels: int, codec: str = "wav", compression_level: float = None):
+    """
+    Open a soundfile writer for one of RECORDING_CODECS.
+
+    Args:
+        filepath: Output path (the extension should match codec_extension(codec))
+        samplerate: Sample rate in Hz
+        channels: Number of channels
+        codec: Key of RECORDING_CODECS
+        compression_level: 0.0 (fastest/largest) to 1.0 (slowest/smallest) for
+            FLAC; for Opus lower values mean higher bitrate. Ignored for WAV.
+    """
+    if codec not in RECORDING_CODECS:
+        raise ValueError(f"Unknown recording codec: {codec}")
+    spec = RECORDING_CODECS[codec]
+    kwargs = {}
+    if compression_level is not None and spec["subtype"] != "PCM_16":
+        kwargs["compression_level"] = min(max(float(compression_level), 0.0), 1.0)
+    return sf.SoundFile(
+        filepath,
+        mode="w",
+        samplerate=codec_samplerate(codec, samplerate),
+        channels=channels,
+        subtype=spec["subtype"],
+        format=spec["format"],
+        **kwargs,
+    )
+
+
+def update_header(sound_file):
+    """Rewrite the header of an open WAV/RF64/W64 file so the frames written so far are readable."""
+    sound_file.flush()
+    try:
+        from soundfile import _snd, _ffi
+        _snd.sf_command(sound_file._file, SFC_UPDATE_HEADER_NOW, _ffi.NULL, 0)
+    except Exception:
+        pass
+
+
+class SegmentedAudioWriter:
+    """
+    Writes one recording as a series of gapless segments plus a JSON manifest.
+
+    A new segment starts every ``segment_seconds`` of audio or once the
+    current file reaches ``segment_bytes``; blocks are split at the exact
+    frame so segments concatenate without gaps. Plain WAV is always rotated
+    before the 4 GB RIFF limit. Headers are rewritten every
+    ``header_flush_seconds``, so an interrupted recording stays readable up
+    to the last fix-up. Each finished segment is passed to
+    ``on_segment_closed`` and marked ``closed`` in the manifest, which makes it
+    safe for downstream processing while recording continues.
+
+    Without any rotation limit the output is the single file ``filepath``
+    (a plain WAV that hits the 4 GB limit continues in ``*_part002.wav`` and
+    gains a manifest at that point).
+    """
+
+    def __init__(self, filepath: str, samplerate: int, channels: int, codec: str = "wav",
+                 compression_level: float = None, segment_seconds: float = None,
+                 segment_bytes: int = None, header_flush_seconds: float = 5.0, on_segment_closed=None):
+        self._base, _ = os.path.splitext(filepath)
+        self._filepath = filepath
+        self._samplerate = codec_samplerate(codec, samplerate)
+        self._channels = channels
+        self._codec = codec
+        self._compression_level = compression_level
+        self._segment_frames = int(segment_seconds * self._samplerate) if segment_seconds else None
+        self._segment_bytes = segment_bytes or None
+        self._rotating = self._segment_frames is not None or self._segment_bytes is not None
+        self._uncompressed = RECORDING_CODECS[codec]["format"] in HEADER_FORMATS
+        if RECORDING_CODECS[codec]["format"] == "WAV":
+            self._segment_bytes = min(self._segment_bytes or WAV_MAX_BYTES, WAV_MAX_BYTES)
+        self._header_flush_seconds = header_flush_seconds
+        self._on_segment_closed = on_segment_closed
+
+        self._file = None
+        self._segment_frame_count = 0
+        self._last_header_flush = time.monotonic()
+        self.frames_written = 0
+        self.segments = []
+        self.manifest_path = self._base + ".manifest.json" if self._rotating else None
+        self._open_segment()
+
+    @property
+    def output_path(self) -> str:
+        """The manifest when rotating, otherwise the single output file."""
+        return self.manifest_path or self._filepath
+
+    def _segment_path(self) -> str:
+        if not self._rotating and not self.segments:
+            return self._filepath
+        return f"{self._base}_part{len(self.segments) + 1:03d}.{codec_extension(self._codec)}"
+
+    def _open_segment(self):
+        if self.segments and self.manifest_path is None:
+            self.manifest_path = self._base + ".manifest.json"
+        path = self._segment_path()
+        self._file = open_audio_file(path, self._samplerate, self._channels, self._codec, self._compression_level)
+        self._segment_frame_count = 0
+        self.segments.append({
+            "path": os.path.basename(path),
+            "start_frame": self.frames_written,
+            "frames": 0,
+            "started_at": time.time(),
+            "closed": False,
+        })
+        self._write_manifest()
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        segment = self.segments[-1]
+        segment["frames"] = self._segment_frame_count
+        segment["closed"] = True
+        self._write_manifest()
+        if self._on_segment_closed is not None:
+            self._on_segment_closed(os.path.join(os.path.dirname(self._filepath), segment["path"]))
+
+    def _write_manifest(self):
+        if self.manifest_path is None:
+            return
+        manifest = {
+            "samplerate": self._samplerate,
+            "channels": self._channels,
+            "codec": self._codec,
+            "frames": self.frames_written,
+            "segments": self.segments,
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _segment_full(self) -> bool:
+        if self._segment_frames is not None and self._segment_frame_count >= self._segment_frames:
+            return True
+        if self._segment_bytes is not None:
+            if self._uncompressed:
+                return self._segment_frame_count >= self._segment_bytes // (self._channels * 2)
+            return os.path.getsize(os.path.join(os.path.dirname(self._filepath), self.segments[-1]["path"])) >= self._segment_bytes
+        return False
+
+    def _frames_until_rotation(self) -> int:
+        limits = []
+        if self._segment_frames is not None:
+            limits.append(self._segment_frames - self._segment_frame_count)
+        if self._segment_bytes is not None and self._uncompressed:
+            limits.append(self._segment_bytes // (self._channels * 2) - self._segment_frame_count)
+        return min(limits) if limits else None
+
+    def write(self, data):
+        """Append frames, rotating at exact frame boundaries."""
+        offset = 0
+        total = len(data)
+        while offset < total:
+            if self._file is None:
+                self._open_segment()
+            remaining = self._frames_until_rotation()
+            count = total - offset if remaining is None else min(total - offset, max(remaining, 0))
+            if count:
+                self._file.write(data[offset:offset + count])
+                offset += count
+                self._segment_frame_count += count
+                self.frames_written += count
+            if self._segment_full():
+                self._close_segment()
+
+        if time.monotonic() - self._last_header_flush >= self._header_flush_seconds:
+            self.flush_header()
+
+    def flush_header(self):
+        """Make the current segment readable up to the last written frame."""
+        self._last_header_flush = time.monotonic()
+        if self._file is None:
+            return
+        if self._uncompressed:
+            update_header(self._file)
+        else:
+            self._file.flush()
+        self.segments[-1]["frames"] = self._segment_frame_count
+        self._write_manifest()
+
+    def close(self):
+        self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _speech_like(seconds: float, samplerate: int, channels: int, seed: int = 0) -> np.ndarray:
+    """Voiced syllables at ~4 Hz with pauses over a -60 dB noise floor, as int16 frames."""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * samplerate)
+    t = np.arange(frames) / samplerate
+    pitch = 150 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.2 * t) > -0.4)
+    speech = 0.25 * voiced * syllables
+    out = np.empty((frames, channels), dtype=np.int16)
+    for channel in range(channels):
+        # Each channel is its own microphone: a delayed, attenuated copy with its own noise.
+        shifted = np.roll(speech, channel * 40) * (1.0 - 0.3 * channel)
+        out[:, channel] = np.clip((shifted + rng.standard_normal(frames) * 0.001) * 32767, -32768, 32767)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure encoding CPU and disk bytes per hour for each recording codec")
+    parser.add_argument("--bench", action="store_true", help="Encode a synthetic recording with every codec")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the synthetic recording")
+    parser.add_argument("--samplerate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    audio = _speech_like(args.seconds, args.samplerate, args.channels)
+    block = args.samplerate  # the recorder writes 1 s blocks
+    configs = [("wav", None)] + [(codec, level) for codec in ("flac", "opus") for level in (0.0, 0.5, 1.0)]
+    failed = False
+    wav_bytes = None
+    print(f"[AudioWriter] {args.seconds:.0f}s of {args.samplerate} Hz x{args.channels} speech-like audio, 1 s blocks")
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec, level in configs:
+            path = os.path.join(tmp, f"bench_{codec}_{level}.{codec_extension(codec)}")
+            started = time.process_time()
+            with SegmentedAudioWriter(path, args.samplerate, args.channels, codec, compression_level=level) as writer:
+                for offset in range(0, len(audio), block):
+                    writer.write(audio[offset:offset + block])
+            cpu = time.process_time() - started
+            size = os.path.getsize(path)
+            wav_bytes = wav_bytes or size
+            per_hour = size * 3600 / args.seconds
+            decoded, _ = sf.read(path, dtype="int16", always_2d=True)
+            if codec in ("wav", "flac"):
+                intact = np.array_equal(decoded, audio)
+            else:
+                intact = abs(len(decoded) - len(audio)) <= args.samplerate // 10
+            failed |= not intact or size > wav_bytes
+            label = codec if level is None else f"{codec} level {level:.1f}"
+            print(f"[AudioWriter] {label:15s} CPU {cpu / args.seconds * 100:6.2f}% of real time, "
+                  f"{per_hour / 1e6:7.1f} MB/hour ({size / wav_bytes * 100:5.1f}% of WAV), "
+                  f"8 h x 2 tracks = {per_hour * 16 / 1e9:5.2f} GB"
+                  f"{'' if intact else ' -- decoded audio does not match'}")
+    if failed:
+        print("[AudioWriter] FAIL: a codec lost audio or produced a file larger than WAV")
+        sys.exit(1)
+    print("[AudioWriter] OK")
+
+
+if __name__ == "__main__":
+    main()
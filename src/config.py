@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -21,3 +22,96 @@ LANGUAGES = {
 MAX_TRANSCRIPTION_LINES = 500
 MAX_GEMINI_LINES = 300
 CLEANUP_CHECK_INTERVAL = 50
+
+# How often the device watcher rescans PortAudio for hotplugged devices while no stream is open;
+# it also rescans whenever capture stops.
+DEVICE_REFRESH_SECONDS = 30.0
+
+# Run capture, Soniox streaming and recording in a separate process so GUI stalls
+# cannot cause input overflows (see src/audio_engine.py).
+AUDIO_ENGINE_PROCESS = os.environ.get("AUDIO_ENGINE_PROCESS", "0").lower() in ("1", "true", "yes")
+
+# Additional labelled inputs captured alongside host/speaker, as a JSON list, e.g.
+# [{"label": "panel1", "device": "USB Mic 1"}, {"label": "panel2", "device": 4, "mode": "translation", "target_lang": "es"}]
+# "device" is a device name (as listed in the UI) or a PortAudio index; mode and
+# target_lang default to the ones selected in the UI.
+try:
+    EXTRA_INPUT_SOURCES = json.loads(os.environ.get("EXTRA_INPUT_SOURCES") or "[]")
+except json.JSONDecodeError as e:
+    print(f"[Config] Ignoring invalid EXTRA_INPUT_SOURCES: {e}")
+    EXTRA_INPUT_SOURCES = []
+
+# Skip streaming silence to Soniox (energy/zero-crossing VAD with hangover and pre-roll).
+VAD_ENABLED = os.environ.get("VAD_ENABLED", "1").lower() in ("1", "true", "yes")
+VAD_HANGOVER_MS = 1000
+VAD_PREROLL_MS = 300
+# Send a keepalive message this often while audio is gated so the session stays open.
+SONIOX_KEEPALIVE_SECONDS = 5.0
+
+# Per-token speaker labels and language tags from Soniox, so one shared-room mic
+# can stand in for a device per person. Hints are a comma-separated list, e.g. "en,es".
+SONIOX_SPEAKER_DIARIZATION = os.environ.get("SONIOX_SPEAKER_DIARIZATION", "0").lower() in ("1", "true", "yes")
+SONIOX_LANGUAGE_IDENTIFICATION = os.environ.get("SONIOX_LANGUAGE_IDENTIFICATION", "0").lower() in ("1", "true", "yes")
+SONIOX_LANGUAGE_HINTS = [h.strip() for h in os.environ.get("SONIOX_LANGUAGE_HINTS", "").split(",") if h.strip()]
+
+# When set, every Soniox session is captured (audio sent + responses) into this directory
+# for replay with `python -m src.session_replay`.
+SESSION_CAPTURE_DIR = os.environ.get("SESSION_CAPTURE_DIR")
+
+# Trace allocations with tracemalloc and report growth per subsystem plus live
+# worker counts every N seconds (see src/memory_profiler.py). Samples are analysed
+# on a background thread, but tracing still costs CPU and memory; off by default.
+MEMORY_PROFILE = os.environ.get("MEMORY_PROFILE", "0").lower() in ("1", "true", "yes")
+MEMORY_PROFILE_INTERVAL_SECONDS = float(os.environ.get("MEMORY_PROFILE_INTERVAL_SECONDS", "30"))
+MEMORY_PROFILE_TOP_N = 15
+# Optional file that receives the top allocation diffs of every sample.
+MEMORY_PROFILE_PATH = os.environ.get("MEMORY_PROFILE_PATH")
+
+RELAY_URL = os.environ.get("RELAY_URL", "ws://localhost:8765")
+# Optional JSON-lines file that keeps undelivered relay finals across restarts.
+RELAY_REPLAY_PATH = os.environ.get("RELAY_REPLAY_PATH")
+# Send partials as (prefix, suffix) deltas with periodic keyframes instead of full text.
+RELAY_DELTA_PARTIALS = os.environ.get("RELAY_DELTA_PARTIALS", "").lower() in ("1", "true", "yes")
+
+# Extra transcription sinks, each enabled by setting its variable.
+SINK_NDJSON_PATH = os.environ.get("SINK_NDJSON_PATH")
+# "host:port" for JSON datagrams, e.g. "127.0.0.1:9999".
+SINK_UDP_ADDRESS = os.environ.get("SINK_UDP_ADDRESS")
+SINK_UNIX_SOCKET_PATH = os.environ.get("SINK_UNIX_SOCKET_PATH")
+
+GEMINI_MODEL = "gemini-2.5-flash"
+TRANSLATION_PROMPT_VERSION = 1
+AUTO_REPLY_PROMPT_VERSION = 1
+BATCH_TRANSLATION_PROMPT_VERSION = 1
+BATCH_TRANSLATION_WINDOW_SECONDS = 0.05
+BATCH_TRANSLATION_MAX_TOKENS = 2000
+BATCH_TRANSLATION_MAX_ITEMS = 50
+# How many of the latest finals "Translate recent finals" sends through the batcher.
+BATCH_TRANSLATION_RECENT_FINALS = 50
+
+GEMINI_RATE_LIMITS = {
+    GEMINI_MODEL: {"requests_per_minute": 60, "burst": 5},
+}
+GEMINI_MAX_CONCURRENCY = 2
+GEMINI_MAX_RETRIES = 4
+GEMINI_BACKOFF_BASE_SECONDS = 1.0
+GEMINI_BACKOFF_MAX_SECONDS = 30.0
+AUTO_REPLY_FALLBACK_DELAY_MS = 2000
+
+TRANSLATION_CACHE_PATH = os.environ.get(
+    "TRANSLATION_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".soniox", "translation_cache.sqlite3")
+)
+TRANSLATION_CACHE_MEMORY_ENTRIES = 512
+TRANSLATION_CACHE_DISK_ENTRIES = 10000
+TRANSLATION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# One of src.audio_writer.RECORDING_CODECS: "wav", "flac" or "opus".
+RECORDING_CODEC = os.environ.get("RECORDING_CODEC", "wav")
+RECORDING_COMPRESSION_LEVEL = 0.5
+# Start a new file every N seconds of audio (0 = single file; plain WAV still rotates before 4 GB).
+RECORDING_SEGMENT_SECONDS = float(os.environ.get("RECORDING_SEGMENT_SECONDS", "900"))
+RECORDING_SEGMENT_BYTES = int(os.environ.get("RECORDING_SEGMENT_BYTES", "0"))
+RECORDING_HEADER_FLUSH_SECONDS = 5.0
+# Record host and speaker into one time-aligned multichannel file (host channels first).
+RECORDING_SYNCHRONIZED = os.environ.get("RECORDING_SYNCHRONIZED", "1").lower() in ("1", "true", "yes")
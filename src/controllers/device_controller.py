@@ -1,50 +1,102 @@
-import sounddevice as sd
+import threading
 from PySide6.QtCore import QObject, Signal
+from src.config import DEVICE_REFRESH_SECONDS
+from src.device_registry import DeviceRegistry, open_stream_count
 
 
 class DeviceController(QObject):
-    """Handles audio device management and selection."""
+    """
+    Handles audio device management and selection.
+    
+    A background watcher rescans PortAudio for hotplugged devices every
+    ``refresh_interval`` seconds and whenever :meth:`request_rescan` is called,
+    but only while no input stream is open.
+    """
     
     device_error = Signal(str)
     devices_populated = Signal(list, list)
+    devices_added = Signal(list)
+    devices_removed = Signal(list)
     
-    def __init__(self):
+    def __init__(self, registry: DeviceRegistry = None, refresh_interval: float = DEVICE_REFRESH_SECONDS):
         super().__init__()
-        self._device_ids = []
+        self._registry = registry or DeviceRegistry()
+        self._refresh_interval = refresh_interval
+        self._stop_event = threading.Event()
+        self._rescan_requested = threading.Event()
+        self._watcher = None
+    
+    def request_rescan(self):
+        """Rescan as soon as no stream is open, e.g. right after capture stops."""
+        self._rescan_requested.set()
     
     def populate_devices(self):
-        """Query and populate available audio input devices."""
+        """Start the background watcher; devices_populated is emitted after the first scan."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="DeviceWatcher", daemon=True)
+        self._watcher.start()
+    
+    def _watch(self):
+        self._refresh(rescan=False, initial=True)
+        while not self._stop_event.is_set():
+            requested = self._rescan_requested.wait(self._refresh_interval)
+            if self._stop_event.is_set():
+                break
+            if open_stream_count():
+                # Streams are still closing (or capture is running); retry a requested rescan shortly.
+                if requested:
+                    self._stop_event.wait(0.5)
+                continue
+            self._rescan_requested.clear()
+            # The registry re-checks the stream count under PORTAUDIO_LOCK before re-initializing.
+            self._refresh(rescan=True)
+    
+    def _refresh(self, rescan: bool, initial: bool = False):
         try:
-            devs = sd.query_devices()
-            device_list = []
-            device_ids = []
-            
-            for idx, d in enumerate(devs):
-                if d.get('max_input_channels', 0) > 0:
-                    name = d.get('name', f'Device {idx}')
-                    sr = d.get('default_samplerate') or 44100
-                    label = f"[{idx}] {name} — {int(sr)} Hz"
-                    device_list.append(label)
-                    device_ids.append(idx)
-            
-            self._device_ids = device_ids
-            self.devices_populated.emit(device_list, device_ids)
-            
+            added, removed = self._registry.refresh(rescan=rescan)
         except Exception as e:
             self.device_error.emit(f"Failed to query audio devices: {e}")
+            return
+        
+        if not initial:
+            if added:
+                self.devices_added.emit(added)
+            if removed:
+                self.devices_removed.emit(removed)
+        if initial or added or removed:
+            device_list = []
+            device_keys = []
+            for d in self._registry.devices():
+                sr = d.get('default_samplerate') or 44100
+                device_list.append(f"{d['key']} — {int(sr)} Hz")
+                device_keys.append(d['key'])
+            self.devices_populated.emit(device_list, device_keys)
     
-    def get_device_info(self, device_id: int):
-        """Get device information for a specific device ID."""
-        try:
-            return sd.query_devices(device_id)
-        except Exception as e:
-            self.device_error.emit(f"Failed to get device info: {e}")
-            return None
+    def get_device_info(self, device_key: str):
+        """Get cached device information for a device key."""
+        info = self._registry.get(device_key)
+        if info is None:
+            self.device_error.emit(f"Audio device is no longer available: {device_key}")
+        return info
     
-    def get_device_ids(self):
-        """Return list of available device IDs."""
-        return self._device_ids
+    def get_device_id(self, device_key: str):
+        """Resolve a device key to its current PortAudio index (None if unplugged)."""
+        return self._registry.index_of(device_key)
+    
+    def get_device_keys(self):
+        """Return the keys of the available input devices."""
+        return [d['key'] for d in self._registry.devices()]
     
     def has_devices(self):
         """Check if any input devices are available."""
-        return len(self._device_ids) > 0
+        return len(self._registry.devices()) > 0
+    
+    def cleanup(self):
+        """Stop the background watcher."""
+        self._stop_event.set()
+        self._rescan_requested.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2)
+            self._watcher = None
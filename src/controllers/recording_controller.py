@@ -2,6 +2,17 @@ import os
 from datetime import datetime
 from PySide6.QtCore import QObject, Signal
 from src.workers import RecorderWorker
+from src.synchronized_recorder import SynchronizedRecorderWorker
+from src.audio_sources import SourceRegistry
+from src.audio_writer import RECORDING_CODECS, codec_extension
+from src.config import (
+    RECORDING_CODEC,
+    RECORDING_COMPRESSION_LEVEL,
+    RECORDING_SYNCHRONIZED,
+    RECORDING_SEGMENT_SECONDS,
+    RECORDING_SEGMENT_BYTES,
+    RECORDING_HEADER_FLUSH_SECONDS,
+)
 
 
 class RecordingController(QObject):
@@ -10,65 +21,117 @@ class RecordingController(QObject):
     status_changed = Signal(str)
     error_occurred = Signal(str)
     recording_saved = Signal(str)
+    segment_closed = Signal(str)
+    level_changed = Signal(str, float, float)
     recording_started = Signal()
     recording_stopped = Signal()
     
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, engine=None):
         super().__init__()
         self._base_dir = base_dir
-        self._host_recorder = None
-        self._speaker_recorder = None
+        self._recorders = {}
         self._recording = False
+        self._codec = RECORDING_CODEC if RECORDING_CODEC in RECORDING_CODECS else "wav"
+        self._compression_level = RECORDING_COMPRESSION_LEVEL
+        self._engine = engine
+        self._engine_recording = None
         
         os.makedirs(self._base_dir, exist_ok=True)
+        
+        if engine is not None:
+            engine.register("recording", self._on_engine_event)
+            engine.engine_restarted.connect(self._on_engine_restarted)
     
     def set_base_dir(self, base_dir: str):
         """Update the base directory for recordings."""
         self._base_dir = base_dir
         os.makedirs(self._base_dir, exist_ok=True)
+        if self._engine is not None:
+            self._engine.send("recording", "set_base_dir", base_dir)
     
     def get_base_dir(self):
         """Get the current base directory."""
         return self._base_dir
     
+    def set_codec(self, codec: str, compression_level: float = None):
+        """Select the output codec (see RECORDING_CODECS) for the next recording."""
+        if codec not in RECORDING_CODECS:
+            self.error_occurred.emit(f"Unknown recording codec: {codec}")
+            return
+        self._codec = codec
+        if compression_level is not None:
+            self._compression_level = compression_level
+        if self._engine is not None:
+            self._engine.send("recording", "set_codec", codec, self._compression_level)
+    
+    def get_codec(self):
+        """Get the current codec and compression level."""
+        return self._codec, self._compression_level
+    
+    def _segment_options(self) -> dict:
+        return {
+            "segment_seconds": RECORDING_SEGMENT_SECONDS or None,
+            "segment_bytes": RECORDING_SEGMENT_BYTES or None,
+            "header_flush_seconds": RECORDING_HEADER_FLUSH_SECONDS,
+        }
+    
     def is_recording(self):
         """Check if currently recording."""
         return self._recording
     
     def start_recording(self, host_device_id: int, samplerate: float, channels: int, speaker_device_id: int = None):
         """Start recording audio to file(s)."""
+        registry = SourceRegistry.from_host_speaker(host_device_id, speaker_device_id)
+        return self.start_sources(list(registry), samplerate, channels)
+    
+    def start_sources(self, sources: list, samplerate: float, channels: int):
+        """
+        Record any number of labelled inputs.
+        
+        With RECORDING_SYNCHRONIZED and more than one source, all of them go
+        into one multichannel file; otherwise each source gets its own file.
+        """
         if self._recording:
             self.error_occurred.emit("Already recording")
             return False
+        if not sources:
+            self.error_occurred.emit("No input sources selected")
+            return False
+        
+        if self._engine is not None:
+            self._engine_recording = (list(sources), samplerate, channels)
+            self._engine.send("recording", "start_sources", *self._engine_recording)
+            return True
         
         try:
             os.makedirs(self._base_dir, exist_ok=True)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            extension = codec_extension(self._codec)
+            self._recorders = {}
             
-            # Create host recorder
-            host_filename = f"recording_host_{timestamp}.wav"
-            host_filepath = os.path.join(self._base_dir, host_filename)
-            
-            self._host_recorder = RecorderWorker(host_device_id, samplerate, channels, host_filepath)
-            self._host_recorder.status.connect(lambda msg: self.status_changed.emit(f"[HOST] {msg}"))
-            self._host_recorder.error.connect(lambda msg: self._on_error(msg, "host"))
-            self._host_recorder.saved.connect(lambda path: self._on_saved(path, "host"))
-            self._host_recorder.finished.connect(lambda: self._on_worker_finished("host"))
-            
-            self._host_recorder.start()
-            
-            # Create speaker recorder if device is provided
-            if speaker_device_id is not None:
-                speaker_filename = f"recording_speaker_{timestamp}.wav"
-                speaker_filepath = os.path.join(self._base_dir, speaker_filename)
-                
-                self._speaker_recorder = RecorderWorker(speaker_device_id, samplerate, channels, speaker_filepath)
-                self._speaker_recorder.status.connect(lambda msg: self.status_changed.emit(f"[SPEAKER] {msg}"))
-                self._speaker_recorder.error.connect(lambda msg: self._on_error(msg, "speaker"))
-                self._speaker_recorder.saved.connect(lambda path: self._on_saved(path, "speaker"))
-                self._speaker_recorder.finished.connect(lambda: self._on_worker_finished("speaker"))
-                
-                self._speaker_recorder.start()
+            if len(sources) > 1 and RECORDING_SYNCHRONIZED:
+                # One worker records every device into one file.
+                labels = [source.label for source in sources]
+                label = "+".join(labels)
+                filepath = os.path.join(self._base_dir, f"recording_{timestamp}.{extension}")
+                recorder = SynchronizedRecorderWorker(
+                    [source.device_id for source in sources], samplerate, channels, filepath,
+                    codec=self._codec, compression_level=self._compression_level, **self._segment_options()
+                )
+                recorder.level.connect(
+                    lambda index, rms, peak: self.level_changed.emit(labels[index], rms, peak)
+                )
+                self._start_recorder(label, recorder)
+            else:
+                for source in sources:
+                    filepath = os.path.join(self._base_dir, f"recording_{source.label}_{timestamp}.{extension}")
+                    recorder = RecorderWorker(source.device_id, samplerate, channels, filepath,
+                                              codec=self._codec, compression_level=self._compression_level,
+                                              **self._segment_options())
+                    recorder.level.connect(
+                        lambda rms, peak, label=source.label: self.level_changed.emit(label, rms, peak)
+                    )
+                    self._start_recorder(source.label, recorder)
             
             self._recording = True
             self.recording_started.emit()
@@ -77,33 +140,61 @@ class RecordingController(QObject):
             
         except Exception as e:
             self.error_occurred.emit(f"Failed to start recording: {e}")
-            self._host_recorder = None
-            self._speaker_recorder = None
+            for recorder in self._recorders.values():
+                recorder.stop()
+            self._recorders = {}
             return False
     
+    def _start_recorder(self, label: str, recorder):
+        recorder.segment_closed.connect(self.segment_closed)
+        recorder.status.connect(lambda msg: self.status_changed.emit(f"[{label.upper()}] {msg}"))
+        recorder.error.connect(lambda msg: self._on_error(msg, label))
+        recorder.saved.connect(lambda path: self._on_saved(path, label))
+        recorder.finished.connect(lambda: self._on_worker_finished(label))
+        self._recorders[label] = recorder
+        recorder.start()
+    
     def stop_recording(self):
         """Stop the current recording."""
-        if self._host_recorder is not None:
-            self._host_recorder.stop()
+        if self._engine is not None:
+            self._engine_recording = None
+            self._engine.send("recording", "stop_recording")
+            return
         
-        if self._speaker_recorder is not None:
-            self._speaker_recorder.stop()
+        for recorder in self._recorders.values():
+            recorder.stop()
         
         self.status_changed.emit("Stopping...")
     
+    def _on_engine_event(self, name: str, args: tuple):
+        """Re-emit a signal forwarded from the audio engine process."""
+        if name == "recording_started":
+            self._recording = True
+        elif name == "recording_stopped":
+            self._recording = False
+            self._engine_recording = None
+        getattr(self, name).emit(*args)
+    
+    def _on_engine_restarted(self, restarts: int):
+        """Restore settings in a freshly restarted engine and resume recording (devices resolved anew by key) into a new file."""
+        self._recording = False
+        self._engine.send("recording", "set_base_dir", self._base_dir)
+        self._engine.send("recording", "set_codec", self._codec, self._compression_level)
+        if self._engine_recording is not None:
+            self.status_changed.emit("Audio engine restarted, resuming recording in a new file...")
+            self._engine.send("recording", "start_sources", *self._engine_recording)
+        else:
+            self.recording_stopped.emit()
+    
     def _on_error(self, msg: str, input_source: str):
         """Handle errors from worker."""
         self.error_occurred.emit(f"[{input_source.upper()}] {msg}")
         
-        # Stop both recorders on error
-        if self._host_recorder:
-            self._host_recorder.stop()
-        if self._speaker_recorder:
-            self._speaker_recorder.stop()
+        # Stop every recorder on error; they are released once finished.
+        for recorder in self._recorders.values():
+            recorder.stop()
         
         self._recording = False
-        self._host_recorder = None
-        self._speaker_recorder = None
         self.recording_stopped.emit()
     
     def _on_saved(self, path: str, input_source: str):
@@ -111,31 +202,24 @@ class RecordingController(QObject):
         self.recording_saved.emit(path)
         self.status_changed.emit(f"[{input_source.upper()}] Saved to: {path}")
         
-        # Check if both recorders are done
-        host_done = self._host_recorder is None or not self._host_recorder.isRunning()
-        speaker_done = self._speaker_recorder is None or not self._speaker_recorder.isRunning()
-        
-        if host_done and speaker_done:
+        # Check if all recorders are done
+        if self._recording and all(not recorder.isRunning() for recorder in self._recorders.values()):
             self._recording = False
             self.recording_stopped.emit()
     
     def _on_worker_finished(self, input_source: str):
         """Handle worker thread finished."""
-        if input_source == "host" and self._host_recorder is not None:
-            self._host_recorder.deleteLater()
-            self._host_recorder = None
-        elif input_source == "speaker" and self._speaker_recorder is not None:
-            self._speaker_recorder.deleteLater()
-            self._speaker_recorder = None
+        recorder = self._recorders.pop(input_source, None)
+        if recorder is not None:
+            recorder.deleteLater()
+        if self._recording and not self._recorders:
+            self._recording = False
+            self.recording_stopped.emit()
     
     def cleanup(self):
         """Clean up resources."""
-        if self._host_recorder is not None and self._host_recorder.isRunning():
-            self._host_recorder.stop()
-            self._host_recorder.wait(3000)
-            self._host_recorder = None
-        
-        if self._speaker_recorder is not None and self._speaker_recorder.isRunning():
-            self._speaker_recorder.stop()
-            self._speaker_recorder.wait(3000)
-            self._speaker_recorder = None
+        for recorder in list(self._recorders.values()):
+            if recorder.isRunning():
+                recorder.stop()
+                recorder.wait(3000)
+        self._recorders = {}
@@ -1,5 +1,7 @@
 from PySide6.QtCore import QObject, Signal
-from src.workers import SonioxWorker
+from src.workers import SonioxWorker, SonioxSessionPool
+from src.audio_sources import SourceRegistry
+from src.text_formatter import source_label
 
 
 class TranscriptionController(QObject):
@@ -7,18 +9,33 @@ class TranscriptionController(QObject):
     
     status_changed = Signal(str)
     error_occurred = Signal(str)
-    transcription_update = Signal(str, bool, str)
-    translation_update = Signal(str, bool, str)
+    # text, is_final, input_source, meta ({"speaker", "language"} when known)
+    transcription_update = Signal(str, bool, str, object)
+    translation_update = Signal(str, bool, str, object)
+    utterance_completed = Signal(object)
+    level_changed = Signal(str, float, float)
     session_started = Signal()
     session_stopped = Signal()
     
-    def __init__(self):
+    def __init__(self, engine=None):
         super().__init__()
-        self._host_worker = None
-        self._speaker_worker = None
+        self._workers = {}
+        self._pool = None
         self._transcribing = False
         self._current_mode = "transcription"
         self._target_lang = None
+        self._sink_pipeline = None
+        self._engine = engine
+        self._engine_session = None
+        
+        if engine is not None:
+            engine.register("transcription", self._on_engine_event)
+            engine.level_changed.connect(self.level_changed)
+            engine.engine_restarted.connect(self._on_engine_restarted)
+    
+    def set_sink_pipeline(self, pipeline):
+        """Publish every transcription/translation update to pipeline (a SinkPipeline)."""
+        self._sink_pipeline = pipeline
     
     def is_transcribing(self):
         """Check if currently transcribing."""
@@ -28,6 +45,19 @@ class TranscriptionController(QObject):
         """Get the current mode (transcription or translation)."""
         return self._current_mode
     
+    def connect_worker(self, worker):
+        """Route a SonioxWorker's signals through this controller (also used by session replay)."""
+        worker.transcription_update.connect(self._on_transcription_update)
+        worker.translation_update.connect(self._on_translation_update)
+        worker.utterance_completed.connect(self.utterance_completed)
+        worker.level.connect(self._on_level)
+        worker.status.connect(self._on_status_update)
+        worker.error.connect(self._on_error)
+    
+    def get_sources(self):
+        """Labels of the sources in the current session."""
+        return list(self._workers)
+    
     def start_session(self, host_device_id: int, speaker_device_id: int = None, mode: str = "transcription", target_lang: str = None):
         """
         Start a transcription or translation session with dual audio inputs.
@@ -38,72 +68,118 @@ class TranscriptionController(QObject):
             mode: Either "transcription" or "translation"
             target_lang: Target language code for translation mode
         """
+        registry = SourceRegistry.from_host_speaker(host_device_id, speaker_device_id, mode, target_lang)
+        return self.start_sources(list(registry))
+    
+    def start_sources(self, sources: list):
+        """
+        Start a session over any number of labelled inputs.
+        
+        Args:
+            sources: AudioSource list; each has its own mode and target language,
+                and its label is used as the input_source of every update
+        """
         if self._transcribing:
             self.error_occurred.emit("Already transcribing")
             return False
+        if not sources:
+            self.error_occurred.emit("No input sources selected")
+            return False
+        
+        modes = {source.mode for source in sources}
+        self._current_mode = "translation" if "translation" in modes else "transcription"
+        self._target_lang = sources[0].target_lang
+        
+        if self._engine is not None:
+            self._engine_session = list(sources)
+            self._engine.send("transcription", "start_sources", self._engine_session)
+            return True
         
         try:
-            self._current_mode = mode
-            self._target_lang = target_lang
-            
-            # Create host worker
-            self._host_worker = SonioxWorker(host_device_id, mode=mode, target_lang=target_lang, input_source="host")
-            self._host_worker.transcription_update.connect(self._on_transcription_update)
-            self._host_worker.translation_update.connect(self._on_translation_update)
-            self._host_worker.status.connect(self._on_status_update)
-            self._host_worker.error.connect(self._on_error)
-            self._host_worker.finished.connect(lambda: self._on_worker_finished("host"))
-            
-            self._host_worker.start()
+            self._workers = {}
+            for source in sources:
+                worker = SonioxWorker(source.device_id, mode=source.mode, target_lang=source.target_lang,
+                                      input_source=source.label)
+                self.connect_worker(worker)
+                self._workers[source.label] = worker
             
-            # Create speaker worker if device is provided
-            if speaker_device_id is not None:
-                self._speaker_worker = SonioxWorker(speaker_device_id, mode=mode, target_lang=target_lang, input_source="speaker")
-                self._speaker_worker.transcription_update.connect(self._on_transcription_update)
-                self._speaker_worker.translation_update.connect(self._on_translation_update)
-                self._speaker_worker.status.connect(self._on_status_update)
-                self._speaker_worker.error.connect(self._on_error)
-                self._speaker_worker.finished.connect(lambda: self._on_worker_finished("speaker"))
-                
-                self._speaker_worker.start()
+            # All sessions share one thread and event loop.
+            self._pool = SonioxSessionPool(list(self._workers.values()))
+            self._pool.finished.connect(self._on_pool_finished)
+            self._pool.start()
             
             self._transcribing = True
             self.session_started.emit()
             
-            status_text = "Translating..." if mode == "translation" else "Transcribing..."
+            status_text = "Translating..." if self._current_mode == "translation" else "Transcribing..."
+            if len(sources) > 2:
+                status_text = f"{status_text} ({len(sources)} sources)"
             self.status_changed.emit(status_text)
             return True
             
         except Exception as e:
             self.error_occurred.emit(f"Failed to start session: {e}")
-            self._host_worker = None
-            self._speaker_worker = None
+            self._workers = {}
+            self._pool = None
             return False
     
     def stop_session(self):
         """Stop the current transcription/translation session."""
-        if self._host_worker:
-            self._host_worker.stop()
+        if self._engine is not None:
+            self._engine_session = None
+            self._engine.send("transcription", "stop_session")
+            return
         
-        if self._speaker_worker:
-            self._speaker_worker.stop()
+        if self._pool is not None:
+            self._pool.stop()
         
         self._transcribing = False
         self.session_stopped.emit()
         self.status_changed.emit("Stopped")
     
-    def _on_transcription_update(self, text: str, is_final: bool, input_source: str):
+    def _on_engine_event(self, name: str, args: tuple):
+        """Re-emit a signal forwarded from the audio engine process."""
+        if name in ("transcription_update", "translation_update"):
+            # Sinks live in the GUI process; status text already came from the engine.
+            if self._sink_pipeline is not None:
+                text, is_final, input_source, meta = args
+                self._sink_pipeline.publish(name.split("_")[0], text, is_final, input_source, **meta)
+        elif name == "session_started":
+            self._transcribing = True
+        elif name == "session_stopped":
+            self._transcribing = False
+            self._engine_session = None
+        getattr(self, name).emit(*args)
+    
+    def _on_engine_restarted(self, restarts: int):
+        """Resume the running session in a freshly restarted engine, which resolves the device keys anew."""
+        self._transcribing = False
+        if self._engine_session is not None:
+            self.status_changed.emit("Audio engine restarted, resuming session...")
+            self._engine.send("transcription", "start_sources", self._engine_session)
+        else:
+            self.session_stopped.emit()
+    
+    def _on_transcription_update(self, text: str, is_final: bool, input_source: str, meta: dict):
         """Handle transcription updates from worker."""
-        self.transcription_update.emit(text, is_final, input_source)
+        if self._sink_pipeline is not None:
+            self._sink_pipeline.publish("transcription", text, is_final, input_source, **meta)
+        self.transcription_update.emit(text, is_final, input_source, meta)
         
         if not is_final and text.strip():
-            self.status_changed.emit(f"Live [{input_source}]: {text}")
+            self.status_changed.emit(f"Live [{source_label(input_source, meta)}]: {text}")
         elif not is_final:
             self.status_changed.emit("Listening...")
     
-    def _on_translation_update(self, text: str, is_final: bool, input_source: str):
+    def _on_translation_update(self, text: str, is_final: bool, input_source: str, meta: dict):
         """Handle translation updates from worker."""
-        self.translation_update.emit(text, is_final, input_source)
+        if self._sink_pipeline is not None:
+            self._sink_pipeline.publish("translation", text, is_final, input_source, **meta)
+        self.translation_update.emit(text, is_final, input_source, meta)
+    
+    def _on_level(self, rms_db: float, peak_db: float, input_source: str):
+        """Forward throttled capture levels from workers."""
+        self.level_changed.emit(input_source, rms_db, peak_db)
     
     def _on_status_update(self, status: str, input_source: str):
         """Handle status updates from workers."""
@@ -113,34 +189,29 @@ class TranscriptionController(QObject):
         """Handle errors from worker."""
         self.error_occurred.emit(f"[{input_source}] {msg}")
         
-        # Stop both workers on error
-        if self._host_worker:
-            self._host_worker.stop()
-        if self._speaker_worker:
-            self._speaker_worker.stop()
+        # Stop every source on error
+        if self._pool is not None:
+            self._pool.stop()
         
-        self._transcribing = False
-        self._host_worker = None
-        self._speaker_worker = None
-        self.session_stopped.emit()
+        if self._transcribing:
+            self._transcribing = False
+            self.session_stopped.emit()
     
-    def _on_worker_finished(self, input_source: str):
-        """Handle worker thread finished."""
-        if input_source == "host" and self._host_worker is not None:
-            self._host_worker.deleteLater()
-            self._host_worker = None
-        elif input_source == "speaker" and self._speaker_worker is not None:
-            self._speaker_worker.deleteLater()
-            self._speaker_worker = None
+    def _on_pool_finished(self):
+        """Handle the session thread finishing."""
+        pool = self.sender()
+        if pool is None:
+            return
+        for worker in pool.workers:
+            worker.deleteLater()
+        if pool is self._pool:
+            self._workers = {}
+            self._pool = None
+        pool.deleteLater()
     
     def cleanup(self):
         """Clean up resources."""
-        if self._host_worker is not None and self._host_worker.isRunning():
-            self._host_worker.stop()
-            self._host_worker.wait(3000)
-            self._host_worker = None
-        
-        if self._speaker_worker is not None and self._speaker_worker.isRunning():
-            self._speaker_worker.stop()
-            self._speaker_worker.wait(3000)
-            self._speaker_worker = None
+        if self._pool is not None and self._pool.isRunning():
+            self._pool.stop()
+            self._pool.wait(3000)
+            self._pool = None
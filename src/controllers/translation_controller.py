@@ -1,5 +1,22 @@
 from PySide6.QtCore import QObject, Signal, Qt, QTimer
+from src.config import (
+    AUTO_REPLY_FALLBACK_DELAY_MS,
+    GEMINI_MODEL,
+    TRANSLATION_PROMPT_VERSION,
+    AUTO_REPLY_PROMPT_VERSION,
+    BATCH_TRANSLATION_PROMPT_VERSION,
+    BATCH_TRANSLATION_WINDOW_SECONDS,
+    BATCH_TRANSLATION_MAX_TOKENS,
+    BATCH_TRANSLATION_MAX_ITEMS,
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_MEMORY_ENTRIES,
+    TRANSLATION_CACHE_DISK_ENTRIES,
+    TRANSLATION_CACHE_TTL_SECONDS,
+)
+from src.gemini_scheduler import get_scheduler
 from src.gemini_worker import GeminiWorker, GeminiAutoReplyWorker
+from src.translation_batcher import TranslationBatcher
+from src.translation_cache import TranslationCache
 
 
 class TranslationController(QObject):
@@ -8,6 +25,8 @@ class TranslationController(QObject):
     status_changed = Signal(str)
     error_occurred = Signal(str)
     translation_result = Signal(str)
+    translation_chunk = Signal(str)
+    batch_translation_result = Signal(list)
     translation_started = Signal()
     translation_completed = Signal()
     auto_reply_result = Signal(str)
@@ -23,6 +42,33 @@ class TranslationController(QObject):
         self._pending_transcription = ""
         self._pending_context = ""
         self._auto_reply_target_language = "English"
+        self._cache = TranslationCache(
+            TRANSLATION_CACHE_PATH,
+            max_memory_entries=TRANSLATION_CACHE_MEMORY_ENTRIES,
+            max_disk_entries=TRANSLATION_CACHE_DISK_ENTRIES,
+            ttl_seconds=TRANSLATION_CACHE_TTL_SECONDS,
+        )
+        self._translation_cache_key = None
+        self._auto_reply_cache_keys = {}
+        self._auto_reply_generation = 0
+        self._auto_reply_stats = {
+            "requested": 0,
+            "delivered": 0,
+            "cached": 0,
+            "superseded": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+        self._translation_timing = None
+        self._batcher = None
+    
+    def get_cache_stats(self):
+        """Return hit/miss counters of the Gemini response cache."""
+        return self._cache.stats()
+    
+    def get_scheduler_stats(self):
+        """Return queue depth, wait-time and retry metrics of the shared Gemini scheduler."""
+        return get_scheduler().stats()
     
     def is_translating(self):
         """Check if currently translating."""
@@ -44,10 +90,24 @@ class TranslationController(QObject):
             self.error_occurred.emit("Translation already in progress")
             return False
         
+        cache_key = TranslationCache.make_key(text, target_language, GEMINI_MODEL, TRANSLATION_PROMPT_VERSION)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self.translation_started.emit()
+            self.translation_result.emit(cached)
+            self.translation_completed.emit()
+            self.status_changed.emit("Translation complete (cached).")
+            return True
+        
         try:
+            self._translation_cache_key = cache_key
+            self._translation_timing = None
             self._gemini_worker = GeminiWorker(text, target_language)
+            self._gemini_worker.chunk.connect(self.translation_chunk, Qt.ConnectionType.QueuedConnection)
+            self._gemini_worker.timing.connect(self._on_timing, Qt.ConnectionType.QueuedConnection)
             self._gemini_worker.result.connect(self._on_result, Qt.ConnectionType.QueuedConnection)
             self._gemini_worker.error.connect(self._on_error, Qt.ConnectionType.QueuedConnection)
+            self._gemini_worker.finished.connect(self._cleanup_old_workers, Qt.ConnectionType.QueuedConnection)
             
             self.translation_started.emit()
             self.status_changed.emit(f"Translating to {target_language}...")
@@ -59,22 +119,97 @@ class TranslationController(QObject):
             self._gemini_worker = None
             return False
     
+    def translate_batch(self, texts: list, target_language: str):
+        """
+        Translate many texts with as few Gemini calls as possible.
+        
+        Cached texts are answered directly; the rest are coalesced by the
+        batcher into structured requests. ``batch_translation_result`` is
+        emitted once with one entry per input text (None on failure).
+        
+        Args:
+            texts: Texts to translate, e.g. the last N finals
+            target_language: Target language name (e.g., "English", "Arabic")
+        """
+        if not texts:
+            self.batch_translation_result.emit([])
+            return
+        
+        if self._batcher is None:
+            self._batcher = TranslationBatcher(
+                window_seconds=BATCH_TRANSLATION_WINDOW_SECONDS,
+                max_batch_tokens=BATCH_TRANSLATION_MAX_TOKENS,
+                max_batch_items=BATCH_TRANSLATION_MAX_ITEMS,
+            )
+        
+        results = [None] * len(texts)
+        prompt_version = f"batch-{BATCH_TRANSLATION_PROMPT_VERSION}"
+        keys = [TranslationCache.make_key(text, target_language, GEMINI_MODEL, prompt_version) for text in texts]
+        missing = []
+        for index, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                missing.append(index)
+            else:
+                results[index] = cached
+        
+        if not missing:
+            self.batch_translation_result.emit(results)
+            return
+        
+        self.status_changed.emit(f"Translating {len(missing)} segments to {target_language}...")
+        remaining = [len(missing)]
+        
+        def make_callback(index):
+            def callback(translation, error):
+                # Runs on the batcher thread; the signal is delivered queued to the GUI.
+                if translation is not None:
+                    results[index] = translation
+                    self._cache.put(keys[index], translation)
+                elif error:
+                    print(f"[DEBUG TranslationController] Batch item {index} failed: {error}")
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    self.batch_translation_result.emit(results)
+            return callback
+        
+        for index in missing:
+            self._batcher.submit(texts[index], target_language, make_callback(index))
+    
+    def _on_timing(self, first_chunk_seconds: float, total_seconds: float):
+        """Remember stream timing so it can be shown with the result."""
+        self._translation_timing = (first_chunk_seconds, total_seconds)
+        print(f"[DEBUG TranslationController] First chunk after {first_chunk_seconds:.2f}s, total {total_seconds:.2f}s")
+    
     def _on_result(self, result: str):
         """Handle translation result from worker."""
         if self._gemini_worker is not None:
             self._gemini_worker.wait(1000)
-            self._cleanup_old_workers()
+            self._old_workers.append(self._gemini_worker)
             self._gemini_worker = None
+            self._cleanup_old_workers()
+        if self._translation_cache_key is not None:
+            self._cache.put(self._translation_cache_key, result)
+            self._translation_cache_key = None
         self.translation_result.emit(result)
         self.translation_completed.emit()
-        self.status_changed.emit("Translation complete.")
+        if self._translation_timing is not None:
+            first_chunk_seconds, total_seconds = self._translation_timing
+            self._translation_timing = None
+            self.status_changed.emit(
+                f"Translation complete (first chunk {first_chunk_seconds:.2f}s, total {total_seconds:.2f}s)."
+            )
+        else:
+            self.status_changed.emit("Translation complete.")
     
     def _on_error(self, msg: str):
         """Handle errors from worker."""
         if self._gemini_worker is not None:
             self._gemini_worker.wait(1000)
-            self._cleanup_old_workers()
+            self._old_workers.append(self._gemini_worker)
             self._gemini_worker = None
+            self._cleanup_old_workers()
+        self._translation_cache_key = None
         self.error_occurred.emit(msg)
         self.translation_completed.emit()
         self.status_changed.emit("Translation error.")
@@ -87,6 +222,9 @@ class TranslationController(QObject):
         """
         Schedule an auto-reply after 2 seconds of no new transcription.
         
+        This is the fallback path for finals that never get an endpoint;
+        closed utterances go through :meth:`reply_to_utterance` instead.
+        
         Args:
             transcription_text: The transcribed text to respond to
             additional_context: Optional additional context (e.g., from translation input field)
@@ -97,8 +235,24 @@ class TranslationController(QObject):
         self._pending_transcription = transcription_text
         self._pending_context = additional_context
         self._auto_reply_timer.stop()
-        self._auto_reply_timer.start(2000)
-        print(f"[DEBUG TranslationController] Timer started for 2000ms")
+        self._auto_reply_timer.start(AUTO_REPLY_FALLBACK_DELAY_MS)
+        print(f"[DEBUG TranslationController] Timer started for {AUTO_REPLY_FALLBACK_DELAY_MS}ms")
+    
+    def reply_to_utterance(self, utterance, additional_context: str = ""):
+        """
+        Trigger an auto-reply immediately for an utterance closed by an endpoint.
+        
+        Args:
+            utterance: Utterance produced by the endpoint segmenter
+            additional_context: Optional additional context (e.g., from translation input field)
+        """
+        print(f"[DEBUG TranslationController] reply_to_utterance [{utterance.input_source}]: '{utterance.text}'")
+        self._auto_reply_timer.stop()
+        self._pending_transcription = utterance.text
+        self._pending_context = additional_context
+        self._trigger_auto_reply()
+        self._pending_transcription = ""
+        self._pending_context = ""
     
     def cancel_auto_reply(self):
         """Cancel any pending auto-reply."""
@@ -108,26 +262,62 @@ class TranslationController(QObject):
         self._pending_context = ""
     
     def _trigger_auto_reply(self):
-        """Trigger the auto-reply after debounce period."""
+        """
+        Trigger the auto-reply after debounce period.
+        
+        Every trigger starts a new generation. A worker from an older
+        generation is stopped: a request still queued in the Gemini scheduler
+        is dropped there, one already sent finishes but its answer is discarded.
+        """
         print(f"[DEBUG TranslationController] _trigger_auto_reply called! Pending text: '{self._pending_transcription}'")
         
         if not self._pending_transcription.strip():
             print(f"[DEBUG TranslationController] No pending transcription, aborting")
             return
         
-        if self._auto_reply_worker is not None and self._auto_reply_worker.isRunning():
-            print(f"[DEBUG TranslationController] Auto-reply worker already running, aborting")
+        self._auto_reply_generation += 1
+        generation = self._auto_reply_generation
+        self._auto_reply_stats["requested"] += 1
+        
+        if self._auto_reply_worker is not None:
+            print(f"[DEBUG TranslationController] Superseding in-flight auto-reply (generation {self._auto_reply_worker.generation})")
+            self._auto_reply_stats["superseded"] += 1
+            self._auto_reply_cache_keys.pop(self._auto_reply_worker.generation, None)
+            self._auto_reply_worker.stop()
+            self._old_workers.append(self._auto_reply_worker)
+            self._auto_reply_worker = None
+            self._cleanup_old_workers()
+        
+        cache_key = TranslationCache.make_key(
+            self._pending_transcription,
+            self._auto_reply_target_language,
+            GEMINI_MODEL,
+            AUTO_REPLY_PROMPT_VERSION,
+            context=self._pending_context
+        )
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            print("[DEBUG TranslationController] Auto-reply served from cache")
+            self._auto_reply_stats["cached"] += 1
+            self._auto_reply_stats["delivered"] += 1
+            self.auto_reply_result.emit(cached)
+            self.status_changed.emit("Auto-reply complete (cached).")
             return
         
         try:
-            print(f"[DEBUG TranslationController] Creating GeminiAutoReplyWorker with language: {self._auto_reply_target_language}")
+            self._auto_reply_cache_keys[generation] = cache_key
+            print(f"[DEBUG TranslationController] Creating GeminiAutoReplyWorker (generation {generation}) with language: {self._auto_reply_target_language}")
             self._auto_reply_worker = GeminiAutoReplyWorker(
                 self._pending_transcription, 
                 self._auto_reply_target_language,
-                self._pending_context
+                self._pending_context,
+                generation=generation
             )
             self._auto_reply_worker.result.connect(self._on_auto_reply_result, Qt.ConnectionType.QueuedConnection)
             self._auto_reply_worker.error.connect(self._on_auto_reply_error, Qt.ConnectionType.QueuedConnection)
+            # Result/error slots run while the worker thread is still unwinding, so the
+            # old worker is still isRunning() there; sweep again once it has really finished.
+            self._auto_reply_worker.finished.connect(self._cleanup_old_workers, Qt.ConnectionType.QueuedConnection)
             
             self.status_changed.emit(f"Auto-replying to: {self._pending_transcription[:50]}...")
             self._auto_reply_worker.start()
@@ -135,31 +325,68 @@ class TranslationController(QObject):
             
         except Exception as e:
             print(f"[DEBUG TranslationController] Exception in _trigger_auto_reply: {e}")
+            self._auto_reply_cache_keys.pop(generation, None)
             self.error_occurred.emit(f"Failed to start auto-reply: {e}")
             self._auto_reply_worker = None
     
-    def _on_auto_reply_result(self, result: str):
-        """Handle auto-reply result from worker."""
-        print(f"[DEBUG TranslationController] Auto-reply result received: '{result[:100]}...'")
-        if self._auto_reply_worker is not None:
+    def _release_auto_reply_worker(self, generation: int):
+        """Move the finished worker of the current generation to the cleanup list."""
+        if self._auto_reply_worker is not None and self._auto_reply_worker.generation == generation:
             self._old_workers.append(self._auto_reply_worker)
             self._auto_reply_worker = None
+        self._cleanup_old_workers()
+    
+    def _on_auto_reply_result(self, result: str, generation: int):
+        """Handle auto-reply result from worker, dropping results of superseded generations."""
+        print(f"[DEBUG TranslationController] Auto-reply result received (generation {generation}): '{result[:100]}...'")
+        cache_key = self._auto_reply_cache_keys.pop(generation, None)
+        if cache_key is not None:
+            self._cache.put(cache_key, result)
+        
+        if generation != self._auto_reply_generation:
+            print(f"[DEBUG TranslationController] Dropping stale auto-reply (latest generation is {self._auto_reply_generation})")
+            self._auto_reply_stats["dropped"] += 1
             self._cleanup_old_workers()
+            return
+        
+        self._release_auto_reply_worker(generation)
+        self._auto_reply_stats["delivered"] += 1
         self.auto_reply_result.emit(result)
         self.status_changed.emit("Auto-reply complete.")
     
-    def _on_auto_reply_error(self, msg: str):
+    def _on_auto_reply_error(self, msg: str, generation: int):
         """Handle errors from auto-reply worker."""
-        print(f"[DEBUG TranslationController] Auto-reply error: {msg}")
-        if self._auto_reply_worker is not None:
-            self._old_workers.append(self._auto_reply_worker)
-            self._auto_reply_worker = None
+        print(f"[DEBUG TranslationController] Auto-reply error (generation {generation}): {msg}")
+        self._auto_reply_cache_keys.pop(generation, None)
+        self._auto_reply_stats["errors"] += 1
+        
+        if generation != self._auto_reply_generation:
             self._cleanup_old_workers()
+            return
+        
+        self._release_auto_reply_worker(generation)
         self.error_occurred.emit(msg)
         self.status_changed.emit("Auto-reply error.")
     
+    def get_auto_reply_stats(self):
+        """
+        Return auto-reply delivery metrics.
+        
+        ``wasted`` counts requests whose answer was never shown because a newer
+        utterance superseded them while they were in flight.
+        """
+        stats = dict(self._auto_reply_stats)
+        stats["wasted"] = stats["superseded"]
+        stats["generation"] = self._auto_reply_generation
+        return stats
+    
     def _cleanup_old_workers(self):
-        """Clean up finished workers to prevent memory buildup."""
+        """
+        Delete finished workers to prevent memory buildup.
+        
+        Workers still running are kept until their ``finished`` signal sweeps
+        again; deleting a running QThread aborts the process.
+        """
         workers_to_keep = []
         for worker in self._old_workers:
             if worker.isRunning():
@@ -167,14 +394,6 @@ class TranslationController(QObject):
             else:
                 worker.deleteLater()
         self._old_workers = workers_to_keep
-        
-        if len(self._old_workers) > 10:
-            for worker in self._old_workers[:5]:
-                if worker.isRunning():
-                    worker.stop()
-                    worker.wait(500)
-                worker.deleteLater()
-            self._old_workers = self._old_workers[5:]
     
     def cleanup(self):
         """Clean up resources."""
@@ -198,5 +417,13 @@ class TranslationController(QObject):
             if worker.isRunning():
                 worker.stop()
                 worker.wait(1000)
+                if worker.isRunning():
+                    worker.terminate()
+                    worker.wait()
             worker.deleteLater()
         self._old_workers.clear()
+        
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+        self._cache.close()
@@ -0,0 +1,110 @@
+import threading
+import sounddevice as sd
+
+# PortAudio must not be re-initialized while a stream is being opened or is open.
+PORTAUDIO_LOCK = threading.RLock()
+_open_streams = 0
+
+
+def open_input_stream(**kwargs) -> sd.InputStream:
+    """Open an sd.InputStream that counts as open until close_input_stream()."""
+    global _open_streams
+    with PORTAUDIO_LOCK:
+        stream = sd.InputStream(**kwargs)
+        _open_streams += 1
+    return stream
+
+
+def close_input_stream(stream):
+    """Stop and close a stream from open_input_stream; rescans are allowed again once none are open."""
+    global _open_streams
+    try:
+        stream.stop()
+        stream.close()
+    finally:
+        with PORTAUDIO_LOCK:
+            _open_streams -= 1
+
+
+def open_stream_count() -> int:
+    with PORTAUDIO_LOCK:
+        return _open_streams
+
+
+def _rescan_portaudio():
+    """Re-initialize PortAudio so devices plugged in since start-up become visible."""
+    sd._terminate()
+    sd._initialize()
+
+
+class DeviceRegistry:
+    """
+    Cached snapshot of the audio input devices, keyed by a stable name.
+
+    PortAudio indices change when devices come and go, so every input device
+    gets a key made of its name and host API (with ``#2``, ``#3`` for
+    duplicates). :meth:`refresh` re-queries PortAudio and returns the keys
+    added and removed since the previous snapshot; lookups between refreshes
+    never touch PortAudio.
+    """
+
+    def __init__(self, query=None, query_hostapis=None, rescan=_rescan_portaudio):
+        self._query = query or sd.query_devices
+        self._query_hostapis = query_hostapis or sd.query_hostapis
+        self._rescan = rescan
+        self._lock = threading.Lock()
+        self._devices = {}
+
+    def refresh(self, rescan: bool = False):
+        """
+        Re-query the device list.
+
+        Args:
+            rescan: Re-initialize PortAudio first to pick up hotplugged devices;
+                skipped while any stream from open_input_stream() is open
+
+        Returns:
+            (added, removed) lists of device keys
+        """
+        with PORTAUDIO_LOCK:
+            if rescan and _open_streams == 0:
+                self._rescan()
+            devices = self._query()
+            hostapis = self._query_hostapis()
+
+        snapshot = {}
+        seen = {}
+        for index, device in enumerate(devices):
+            if device.get("max_input_channels", 0) <= 0:
+                continue
+            name = device.get("name", f"Device {index}")
+            hostapi = device.get("hostapi")
+            if len(hostapis) > 1 and hostapi is not None and hostapi < len(hostapis):
+                name = f"{name} ({hostapis[hostapi]['name']})"
+            seen[name] = seen.get(name, 0) + 1
+            key = name if seen[name] == 1 else f"{name} #{seen[name]}"
+            info = dict(device)
+            info["index"] = index
+            info["key"] = key
+            snapshot[key] = info
+
+        with self._lock:
+            previous = self._devices
+            self._devices = snapshot
+        added = [key for key in snapshot if key not in previous]
+        removed = [key for key in previous if key not in snapshot]
+        return added, removed
+
+    def devices(self) -> list:
+        """Cached input devices in PortAudio order."""
+        with self._lock:
+            return list(self._devices.values())
+
+    def get(self, key: str):
+        with self._lock:
+            return self._devices.get(key)
+
+    def index_of(self, key: str):
+        """Current PortAudio index for key, or None if the device is gone."""
+        info = self.get(key)
+        return info["index"] if info else None
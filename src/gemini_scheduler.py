@@ -0,0 +1,354 @@
+import argparse
+import heapq
+import itertools
+import random
+import sys
+import threading
+import time
+from typing import Callable, Optional
+from src.config import (
+    GEMINI_MODEL,
+    GEMINI_RATE_LIMITS,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MAX_RETRIES,
+    GEMINI_BACKOFF_BASE_SECONDS,
+    GEMINI_BACKOFF_MAX_SECONDS,
+)
+
+PRIORITY_MANUAL = 0
+PRIORITY_AUTO_REPLY = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_MANUAL: "manual",
+    PRIORITY_AUTO_REPLY: "auto_reply",
+    PRIORITY_BACKGROUND: "background",
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_STATUS_NAMES = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED")
+
+
+class SchedulerCancelled(Exception):
+    """Raised when a queued request is abandoned by its caller."""
+
+
+class NonRetryableError(Exception):
+    """Wraps a failure that must not be retried (e.g. a stream that already produced output)."""
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Return True for quota (429) and server-side (5xx) errors."""
+    if isinstance(exc, (NonRetryableError, SchedulerCancelled)):
+        return False
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    message = str(exc)
+    return any(str(c) in message for c in RETRYABLE_STATUS_CODES) or any(n in message for n in RETRYABLE_STATUS_NAMES)
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable = time.monotonic):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def take(self) -> float:
+        """Take one token; return 0 on success or the seconds until one is available."""
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+
+class GeminiScheduler:
+    """
+    Central admission control for Gemini requests.
+
+    Callers wrap the actual API call in :meth:`run`. Requests are admitted in
+    priority order (manual > auto-reply > background, FIFO within a class),
+    subject to a per-model token bucket and a global concurrency cap. Quota and
+    5xx errors are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, rate_limits: Optional[dict] = None, max_concurrency: int = 2, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 clock: Callable = time.monotonic, sleep: Callable = time.sleep):
+        self._rate_limits = rate_limits or {}
+        self._max_concurrency = max_concurrency
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._buckets = {}
+        self._waiting = []
+        self._seq = itertools.count()
+        self._running = 0
+
+        self._queued = {p: 0 for p in PRIORITY_NAMES}
+        self._admitted = {p: 0 for p in PRIORITY_NAMES}
+        self._wait_total = {p: 0.0 for p in PRIORITY_NAMES}
+        self._wait_max = {p: 0.0 for p in PRIORITY_NAMES}
+        self._retries = 0
+        self._failures = 0
+
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        if model not in self._buckets:
+            limit = self._rate_limits.get(model)
+            if limit is None:
+                self._buckets[model] = None
+            else:
+                rate = limit["requests_per_minute"] / 60.0
+                self._buckets[model] = TokenBucket(rate, limit.get("burst", 1), self._clock)
+        return self._buckets[model]
+
+    def run(self, fn: Callable, priority: int = PRIORITY_BACKGROUND, model: str = GEMINI_MODEL,
+            should_continue: Optional[Callable] = None):
+        """
+        Run fn() once admitted, retrying retryable failures.
+
+        Args:
+            fn: Zero-argument callable performing the API request
+            priority: One of PRIORITY_MANUAL, PRIORITY_AUTO_REPLY, PRIORITY_BACKGROUND
+            model: Model name used to pick the rate limit
+            should_continue: Optional callable; when it returns False the request
+                is abandoned with SchedulerCancelled while queued or backing off
+        """
+        attempt = 0
+        while True:
+            self._acquire(priority, model, should_continue)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self._max_retries:
+                    with self._cond:
+                        self._failures += 1
+                    raise
+                attempt += 1
+                with self._cond:
+                    self._retries += 1
+                delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** (attempt - 1)))
+                print(f"[GeminiScheduler] {PRIORITY_NAMES.get(priority, priority)} request failed ({e}); retry {attempt} in {delay:.1f}s")
+            finally:
+                self._release()
+            self._backoff(delay, should_continue)
+
+    def _backoff(self, delay: float, should_continue: Optional[Callable]):
+        deadline = self._clock() + delay
+        while True:
+            if should_continue is not None and not should_continue():
+                raise SchedulerCancelled()
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                return
+            self._sleep(min(remaining, 0.1))
+
+    def _acquire(self, priority: int, model: str, should_continue: Optional[Callable]):
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            self._queued[priority] = self._queued.get(priority, 0) + 1
+            enqueued_at = self._clock()
+            try:
+                while True:
+                    if should_continue is not None and not should_continue():
+                        raise SchedulerCancelled()
+                    timeout = 0.1 if should_continue is not None else None
+                    if self._waiting[0] == entry and self._running < self._max_concurrency:
+                        bucket = self._bucket(model)
+                        delay = bucket.take() if bucket is not None else 0.0
+                        if delay <= 0:
+                            heapq.heappop(self._waiting)
+                            self._running += 1
+                            waited = self._clock() - enqueued_at
+                            self._admitted[priority] = self._admitted.get(priority, 0) + 1
+                            self._wait_total[priority] = self._wait_total.get(priority, 0.0) + waited
+                            self._wait_max[priority] = max(self._wait_max.get(priority, 0.0), waited)
+                            self._cond.notify_all()
+                            return
+                        timeout = delay if timeout is None else min(delay, timeout)
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            finally:
+                self._queued[priority] -= 1
+
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Return queue depth, running count, wait times and retry counters."""
+        with self._cond:
+            per_priority = {}
+            for priority, name in PRIORITY_NAMES.items():
+                admitted = self._admitted.get(priority, 0)
+                per_priority[name] = {
+                    "queued": self._queued.get(priority, 0),
+                    "admitted": admitted,
+                    "avg_wait": self._wait_total.get(priority, 0.0) / admitted if admitted else 0.0,
+                    "max_wait": self._wait_max.get(priority, 0.0),
+                }
+            return {
+                "queue_depth": len(self._waiting),
+                "running": self._running,
+                "retries": self._retries,
+                "failures": self._failures,
+                "priorities": per_priority,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> GeminiScheduler:
+    """Return the process-wide scheduler shared by all Gemini callers."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeminiScheduler(
+                rate_limits=GEMINI_RATE_LIMITS,
+                max_concurrency=GEMINI_MAX_CONCURRENCY,
+                max_retries=GEMINI_MAX_RETRIES,
+                backoff_base=GEMINI_BACKOFF_BASE_SECONDS,
+                backoff_max=GEMINI_BACKOFF_MAX_SECONDS,
+            )
+        return _scheduler
+
+
+class _FakeBackendError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"{code} fake backend error")
+        self.code = code
+
+
+class _FakeBackend:
+    """Fake Gemini endpoint: records call times and concurrency, fails with scripted status codes."""
+
+    def __init__(self, duration: float = 0.0, failures=()):
+        self._duration = duration
+        self._failures = list(failures)
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+        self.calls = []
+
+    def __call__(self, name=None):
+        with self._lock:
+            self.calls.append((time.monotonic(), name))
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+            code = self._failures.pop(0) if self._failures else None
+        try:
+            time.sleep(self._duration)
+            if code is not None:
+                raise _FakeBackendError(code)
+            return name
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def _run_threads(targets: list):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)  # fixes the enqueue order
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check GeminiScheduler against a local fake backend")
+    parser.add_argument("--selftest", action="store_true", help="Run the priority, rate-limit, concurrency and retry checks")
+    args = parser.parse_args()
+    if not args.selftest:
+        parser.print_help()
+        return
+
+    failures = []
+
+    def check(name: str, ok: bool, detail: str):
+        print(f"[GeminiScheduler] {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    # 1. Priority: with the only slot busy, queued requests are admitted manual > auto-reply > background.
+    scheduler = GeminiScheduler(max_concurrency=1)
+    backend = _FakeBackend(duration=0.05)
+    order = [("blocker", PRIORITY_BACKGROUND), ("background", PRIORITY_BACKGROUND),
+             ("auto_reply", PRIORITY_AUTO_REPLY), ("manual", PRIORITY_MANUAL)]
+    _run_threads([lambda n=n, p=p: scheduler.run(lambda: backend(n), p) for n, p in order])
+    served = [name for _, name in backend.calls]
+    check("priority", served == ["blocker", "manual", "auto_reply", "background"], f"served {served}")
+    waits = {name: round(s["max_wait"], 2) for name, s in scheduler.stats()["priorities"].items()}
+    print(f"[GeminiScheduler] max wait per class: {waits}")
+
+    # 2. Token bucket: 120 requests/minute with a burst of 2 admits 2 at once, then one every 0.5 s.
+    scheduler = GeminiScheduler(rate_limits={"fake": {"requests_per_minute": 120, "burst": 2}}, max_concurrency=8)
+    backend = _FakeBackend()
+    _run_threads([lambda: scheduler.run(backend, model="fake")] * 6)
+    times = [t - backend.calls[0][0] for t, _ in backend.calls]
+    gaps = [b - a for a, b in zip(times[1:], times[2:])]
+    check("rate limit", times[1] < 0.1 and all(gap > 0.4 for gap in gaps),
+          "admitted at " + ", ".join(f"{t:.2f}s" for t in times))
+
+    # 3. Concurrency cap.
+    scheduler = GeminiScheduler(max_concurrency=3)
+    backend = _FakeBackend(duration=0.1)
+    _run_threads([lambda: scheduler.run(backend)] * 9)
+    check("concurrency", backend.max_active == 3, f"at most {backend.max_active} requests in flight (cap 3)")
+
+    # 4. 429/5xx are retried with backoff; 4xx are not.
+    scheduler = GeminiScheduler(max_retries=4, backoff_base=0.05, backoff_max=0.2)
+    backend = _FakeBackend(failures=[429, 503])
+    result = scheduler.run(lambda: backend("ok"))
+    check("retry", result == "ok" and len(backend.calls) == 3 and scheduler.stats()["retries"] == 2,
+          f"429 then 503 then success: {len(backend.calls)} calls, {scheduler.stats()['retries']} retries")
+    backend = _FakeBackend(failures=[400])
+    try:
+        scheduler.run(backend)
+        raised = False
+    except _FakeBackendError:
+        raised = True
+    check("no retry", raised and len(backend.calls) == 1, f"400: {len(backend.calls)} call, raised {raised}")
+
+    # 5. A caller that gives up while queued is removed from the queue.
+    scheduler = GeminiScheduler(max_concurrency=1)
+    backend = _FakeBackend(duration=0.3)
+    cancelled = []
+
+    def abandoned():
+        deadline = time.monotonic() + 0.1
+        try:
+            scheduler.run(lambda: backend("abandoned"), should_continue=lambda: time.monotonic() < deadline)
+        except SchedulerCancelled:
+            cancelled.append(True)
+
+    _run_threads([lambda: scheduler.run(lambda: backend("blocker")), abandoned])
+    check("cancel", cancelled == [True] and scheduler.stats()["queue_depth"] == 0
+          and [name for _, name in backend.calls] == ["blocker"], f"cancelled {bool(cancelled)}, calls {len(backend.calls)}")
+
+    if failures:
+        print(f"[GeminiScheduler] FAIL: {', '.join(failures)}")
+        sys.exit(1)
+    print("[GeminiScheduler] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,52 @@
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
 from google import genai
 from PySide6.QtCore import QThread, Signal
-from src.config import GEMINI_API_KEY
+from src.config import GEMINI_API_KEY, GEMINI_MODEL
+from src.gemini_scheduler import (
+    get_scheduler,
+    NonRetryableError,
+    PRIORITY_MANUAL,
+    PRIORITY_AUTO_REPLY,
+)
 
 
 class GeminiWorker(QThread):
+    """
+    Streams a Gemini translation.
+
+    ``chunk`` fires for every piece of text as it arrives, ``timing`` carries
+    (time to first chunk, total time) in seconds and ``result`` carries the
+    full text once the stream ends. ``client`` may be any object exposing
+    ``models.generate_content_stream``, which lets a local stub stand in for
+    the real SDK client.
+    """
     error = Signal(str)
+    chunk = Signal(str)
+    timing = Signal(float, float)
     result = Signal(str)
     
-    def __init__(self, text: str, target_language: str, parent=None):
+    def __init__(self, text: str, target_language: str, client=None, parent=None):
         super().__init__(parent)
         self._text = text
         self._target_language = target_language
+        self._client = client
         self._is_running = True
     
     def run(self):
         try:
             if not self._is_running:
                 return
-                
-            if not GEMINI_API_KEY:
-                self.error.emit("GEMINI_API_KEY not found in .env file")
-                return
             
-            client = genai.Client(api_key=GEMINI_API_KEY)
+            client = self._client
+            if client is None:
+                if not GEMINI_API_KEY:
+                    self.error.emit("GEMINI_API_KEY not found in .env file")
+                    return
+                client = genai.Client(api_key=GEMINI_API_KEY)
             
             prompt = f"""Translate the following text to {self._target_language}. Provide the response in this exact format:
 
@@ -35,13 +59,46 @@ Text to translate: {self._text}"""
             if not self._is_running:
                 return
             
-            response = client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
+            started = time.perf_counter()
+            first_chunk_at = None
+            parts = []
+            
+            def stream():
+                nonlocal first_chunk_at
+                try:
+                    for response in client.models.generate_content_stream(
+                        model=GEMINI_MODEL,
+                        contents=prompt
+                    ):
+                        if not self._is_running:
+                            return
+                        text = response.text
+                        if not text:
+                            continue
+                        if first_chunk_at is None:
+                            first_chunk_at = time.perf_counter() - started
+                        parts.append(text)
+                        self.chunk.emit(text)
+                except Exception as e:
+                    # Chunks already reached the panel, so a retry would duplicate them.
+                    if parts:
+                        raise NonRetryableError(str(e)) from e
+                    raise
+            
+            get_scheduler().run(
+                stream,
+                PRIORITY_MANUAL,
+                model=GEMINI_MODEL,
+                should_continue=lambda: self._is_running
             )
+            if not self._is_running:
+                return
+            total = time.perf_counter() - started
             
-            if self._is_running and response.text:
-                self.result.emit(response.text)
+            full_text = "".join(parts)
+            if self._is_running and full_text:
+                self.timing.emit(first_chunk_at, total)
+                self.result.emit(full_text)
             elif self._is_running:
                 self.error.emit("Empty response received from Gemini")
         except Exception as e:
@@ -54,11 +111,18 @@ Text to translate: {self._text}"""
 
 
 class GeminiAutoReplyWorker(QThread):
-    error = Signal(str)
-    result = Signal(str)
+    """
+    Generates an auto-reply for a transcribed utterance.
+
+    Both signals carry the ``generation`` the worker was created for so the
+    controller can drop answers to utterances that have since been superseded.
+    """
+    error = Signal(str, int)
+    result = Signal(str, int)
     
-    def __init__(self, transcription_text: str, target_language: str, additional_context: str = "", parent=None):
+    def __init__(self, transcription_text: str, target_language: str, additional_context: str = "", generation: int = 0, parent=None):
         super().__init__(parent)
+        self.generation = generation
         self._transcription_text = transcription_text
         self._target_language = target_language
         self._additional_context = additional_context
@@ -71,7 +135,7 @@ class GeminiAutoReplyWorker(QThread):
                 return
                 
             if not GEMINI_API_KEY:
-                self.error.emit("GEMINI_API_KEY not found in .env file")
+                self.error.emit("GEMINI_API_KEY not found in .env file", self.generation)
                 return
             
             client = genai.Client(api_key=GEMINI_API_KEY)
@@ -92,19 +156,122 @@ Transcribed speech: {self._transcription_text}{context_section}"""
             if not self._is_running:
                 return
             
-            response = client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
+            response = get_scheduler().run(
+                lambda: client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt
+                ),
+                PRIORITY_AUTO_REPLY,
+                model=GEMINI_MODEL,
+                should_continue=lambda: self._is_running
             )
             
             if self._is_running and response.text:
-                self.result.emit(response.text)
+                self.result.emit(response.text, self.generation)
             elif self._is_running:
-                self.error.emit("Empty response received from Gemini")
+                self.error.emit("Empty response received from Gemini", self.generation)
         except Exception as e:
             if self._is_running:
-                self.error.emit(f"Gemini auto-reply error: {str(e)}")
+                self.error.emit(f"Gemini auto-reply error: {str(e)}", self.generation)
     
     def stop(self):
         """Stop the worker gracefully."""
         self._is_running = False
+
+
+class _StubStreamingModels:
+    """Stands in for ``client.models``: streams ``chunks`` after the given delays, then optionally fails."""
+
+    def __init__(self, chunks: list, delays: list, fail_after: int = None):
+        self._chunks = chunks
+        self._delays = delays
+        self._fail_after = fail_after
+        self.calls = 0
+
+    def generate_content_stream(self, model: str, contents: str):
+        self.calls += 1
+        for index, (text, delay) in enumerate(zip(self._chunks, self._delays)):
+            if index == self._fail_after:
+                raise RuntimeError("503 UNAVAILABLE: stub stream dropped")
+            time.sleep(delay)
+            yield SimpleNamespace(text=text)
+
+
+def _run_worker(models: _StubStreamingModels) -> dict:
+    """Run a GeminiWorker against a stub client; record chunk arrival times on the receiving thread."""
+    from PySide6.QtCore import QCoreApplication
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    worker = GeminiWorker("hello", "Japanese", client=SimpleNamespace(models=models))
+    outcome = {"chunks": [], "chunk_at": [], "result": None, "timing": None, "error": None}
+    started = time.perf_counter()
+
+    def on_chunk(text):
+        outcome["chunks"].append(text)
+        outcome["chunk_at"].append(time.perf_counter() - started)
+
+    worker.chunk.connect(on_chunk)
+    worker.result.connect(lambda text: outcome.__setitem__("result", text))
+    worker.timing.connect(lambda first, total: outcome.__setitem__("timing", (first, total)))
+    worker.error.connect(lambda message: outcome.__setitem__("error", message))
+    worker.finished.connect(app.quit)
+    worker.start()
+    app.exec()
+    worker.wait()
+    app.processEvents()
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive GeminiWorker streaming against a local stub client")
+    parser.add_argument("--stub", action="store_true", help="Stream from a stub with controlled chunk delays")
+    parser.add_argument("--first-delay", type=float, default=0.3, help="Seconds before the first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.1, help="Seconds between later chunks")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed timing error in seconds")
+    args = parser.parse_args()
+    if not args.stub:
+        parser.print_help()
+        return
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    chunks = [f"part{i} " for i in range(args.chunks)]
+    delays = [args.first_delay] + [args.chunk_delay] * (args.chunks - 1)
+    expected_first = args.first_delay
+    expected_total = sum(delays)
+    failures = []
+
+    # 1. A full stream: chunks in order as they arrive, result carries the whole text.
+    outcome = _run_worker(_StubStreamingModels(chunks, delays))
+    if outcome["chunks"] != chunks or outcome["result"] != "".join(chunks) or outcome["error"]:
+        failures.append(f"stream content: chunks {outcome['chunks']}, result {outcome['result']!r}, error {outcome['error']}")
+    if outcome["timing"] is None:
+        failures.append("no timing signal")
+    else:
+        first, total = outcome["timing"]
+        print(f"[GeminiWorker] time to first chunk {first * 1000:.0f} ms (stub {expected_first * 1000:.0f} ms), "
+              f"total {total * 1000:.0f} ms (stub {expected_total * 1000:.0f} ms), "
+              f"first chunk reached the receiver after {outcome['chunk_at'][0] * 1000:.0f} ms")
+        if abs(first - expected_first) > args.tolerance or abs(total - expected_total) > args.tolerance:
+            failures.append(f"timing off: first {first:.3f}s, total {total:.3f}s")
+        # Incremental delivery: the first chunk must arrive long before the stream ends.
+        if outcome["chunk_at"][0] > expected_first + args.tolerance:
+            failures.append(f"first chunk delivered late ({outcome['chunk_at'][0]:.3f}s)")
+
+    # 2. A stream that fails after output reached the panel is reported, not retried.
+    models = _StubStreamingModels(chunks, delays, fail_after=2)
+    outcome = _run_worker(models)
+    print(f"[GeminiWorker] mid-stream failure: {len(outcome['chunks'])} chunks, {models.calls} call(s), "
+          f"error {outcome['error']!r}")
+    if models.calls != 1 or outcome["error"] is None or outcome["result"] is not None:
+        failures.append("mid-stream failure was retried or not reported")
+
+    for failure in failures:
+        print(f"[GeminiWorker] FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("[GeminiWorker] OK")
+
+
+if __name__ == "__main__":
+    main()
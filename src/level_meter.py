@@ -0,0 +1,142 @@
+import argparse
+import math
+import sys
+import time
+import numpy as np
+
+SILENCE_DB = -100.0
+
+
+def _to_db(value: float) -> float:
+    return 20.0 * math.log10(value) if value > 1e-5 else SILENCE_DB
+
+
+class LevelMeter:
+    """
+    RMS/peak meter for the audio callback, throttled to ``rate_hz`` updates.
+
+    :meth:`update` is called with every captured block. It accumulates the
+    sum of squares (one BLAS dot product) and the absolute peak and returns
+    ``(rms_db, peak_db)`` in dBFS once per publish interval, otherwise None.
+    Both int16 and float32 blocks are accepted; int16 blocks are converted in
+    a reused float32 buffer, so the callback does not allocate.
+    """
+
+    def __init__(self, rate_hz: float = 20.0, clock=time.monotonic):
+        self._interval = 1.0 / rate_hz
+        self._clock = clock
+        self._last_publish = clock()
+        self._sum_squares = 0.0
+        self._samples = 0
+        self._peak = 0.0
+        self._buffer = np.empty(0, dtype=np.float32)
+
+    def update(self, block: np.ndarray):
+        flat = block.reshape(-1)
+        if block.dtype == np.int16:
+            scale = 1.0 / 32768.0
+            peak = max(int(block.max()), -int(block.min())) * scale
+            if self._buffer.size < flat.size:
+                self._buffer = np.empty(flat.size, dtype=np.float32)
+            # np.copyto casts in place; astype or a mixed-type ufunc would allocate per block.
+            samples = self._buffer[:flat.size]
+            np.copyto(samples, flat)
+            sum_squares = float(np.dot(samples, samples)) * scale * scale
+        else:
+            peak = float(max(block.max(), -block.min()))
+            sum_squares = float(np.dot(flat, flat))
+        self._sum_squares += sum_squares
+        self._samples += block.size
+        if peak > self._peak:
+            self._peak = peak
+
+        now = self._clock()
+        if now - self._last_publish < self._interval:
+            return None
+        rms = math.sqrt(self._sum_squares / self._samples) if self._samples else 0.0
+        levels = (_to_db(rms), _to_db(self._peak))
+        self._last_publish = now
+        self._sum_squares = 0.0
+        self._samples = 0
+        self._peak = 0.0
+        return levels
+
+
+def connect_level_producers(transcription, recording, slot):
+    """
+    Route the level_changed signals of both controllers to slot, one producer per label.
+
+    A source that is transcribed and recorded at the same time is metered by
+    two captures (16 kHz mono and the device's native format); fed to one
+    meter they interleave and it flickers. While a transcription session
+    includes the label, its capture is the producer and recorder levels for
+    that label are dropped.
+    """
+    transcription.level_changed.connect(slot)
+
+    def from_recording(input_source, rms_db, peak_db):
+        if input_source not in transcription.get_sources():
+            slot(input_source, rms_db, peak_db)
+
+    recording.level_changed.connect(from_recording)
+
+
+def _time_callbacks(blocks: list, meter) -> np.ndarray:
+    """Per-call time in microseconds of a ring-buffer write, with or without the meter."""
+    from src.audio_ring_buffer import AudioRingBuffer
+
+    first = blocks[0]
+    ring = AudioRingBuffer(len(first) * 8, first.shape[1], dtype=first.dtype)
+    staging = np.empty_like(first)
+    timings = np.empty(len(blocks))
+    for i, block in enumerate(blocks):
+        started = time.perf_counter_ns()
+        ring.write(block)
+        if meter is not None:
+            meter.update(block)
+        timings[i] = (time.perf_counter_ns() - started) / 1000.0
+        ring.read(staging)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the per-block cost LevelMeter adds to an audio callback")
+    parser.add_argument("--bench", action="store_true", help="Time callbacks with and without the meter")
+    parser.add_argument("--blocks", type=int, default=20000, help="Callbacks timed per configuration")
+    parser.add_argument("--max-overhead-pct", type=float, default=1.0,
+                        help="Fail if the meter's mean cost exceeds this share of the block period")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    rng = np.random.default_rng(0)
+    configs = (
+        # (name, samplerate, frames, channels, dtype): the recorder and the Soniox capture blocks.
+        ("recorder int16 480x2 @ 48 kHz", 48000, 480, 2, np.int16),
+        ("soniox float32 1024x1 @ 16 kHz", 16000, 1024, 1, np.float32),
+    )
+    failed = False
+    for name, samplerate, frames, channels, dtype in configs:
+        noise = rng.standard_normal((args.blocks, frames, channels)) * 0.1
+        if dtype == np.int16:
+            noise = noise * 32767
+        blocks = list(noise.astype(dtype))
+        _time_callbacks(blocks[:1000], LevelMeter())  # warm up allocator and caches
+        base = _time_callbacks(blocks, None)
+        metered = _time_callbacks(blocks, LevelMeter())
+        overhead = float(np.mean(metered) - np.mean(base))
+        period_us = frames / samplerate * 1e6
+        share = overhead / period_us * 100
+        failed |= share > args.max_overhead_pct
+        print(f"[LevelMeter] {name}: callback p50 {np.percentile(base, 50):.1f} -> {np.percentile(metered, 50):.1f} us, "
+              f"p99 {np.percentile(base, 99):.1f} -> {np.percentile(metered, 99):.1f} us; "
+              f"meter adds {overhead:.1f} us = {share:.3f}% of the {period_us / 1000:.0f} ms block")
+    if failed:
+        print(f"[LevelMeter] FAIL: meter overhead above {args.max_overhead_pct}% of a block period")
+        sys.exit(1)
+    print("[LevelMeter] OK")
+
+
+if __name__ == "__main__":
+    main()
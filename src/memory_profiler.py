@@ -0,0 +1,284 @@
+import argparse
+import gc
+import heapq
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from PySide6.QtCore import QThread, Signal
+
+# Allocation attribution: the innermost frame of a traceback that lies in one
+# of these files decides the subsystem. Library allocations (json, websockets,
+# numpy, genai) are therefore charged to the src/ code that called into them.
+SUBSYSTEM_FILES = (
+    ("capture", ("src/audio_ring_buffer.py", "src/level_meter.py", "src/voice_activity.py",
+                 "src/audio_writer.py", "src/synchronized_recorder.py", "src/session_capture.py",
+                 "src/audio_engine.py", "src/controllers/recording_controller.py")),
+    ("transcript", ("src/utterance_segmenter.py", "src/text_formatter.py", "src/ui.py",
+                    "src/session_replay.py", "src/controllers/transcription_controller.py")),
+    ("gemini", ("src/gemini_worker.py", "src/gemini_scheduler.py", "src/translation_batcher.py",
+                "src/translation_cache.py", "src/controllers/translation_controller.py")),
+    ("relay", ("src/websocket_client.py", "src/replay_log.py", "src/relay_codec.py", "src/relay_hub.py",
+               "src/sinks/")),
+)
+# src/workers.py holds both sides of a Soniox session; split it by function.
+CAPTURE_FUNCTIONS = ("SonioxWorker._stream_audio.<locals>.sender", "RecorderWorker")
+SUBSYSTEMS = ("capture", "receiver", "transcript", "gemini", "relay", "other")
+
+
+@lru_cache(maxsize=None)
+def _function_table(filename: str) -> dict:
+    """Map line numbers of a source file to the qualified name of the innermost function."""
+    table = {}
+    try:
+        with open(filename, "r", encoding="utf-8") as fh:
+            code = compile(fh.read(), filename, "exec")
+    except (OSError, SyntaxError, ValueError):
+        return table
+
+    def walk(code_obj):
+        name = getattr(code_obj, "co_qualname", code_obj.co_name)
+        for _, _, line in code_obj.co_lines():
+            if line is not None:
+                table[line] = name
+        for const in code_obj.co_consts:
+            if hasattr(const, "co_lines"):
+                walk(const)
+
+    walk(code)
+    return table
+
+
+@lru_cache(maxsize=4096)
+def _subsystem_of_file(filename: str):
+    path = filename.replace(os.sep, "/")
+    if path.endswith("src/workers.py"):
+        return "workers"
+    for subsystem, patterns in SUBSYSTEM_FILES:
+        if any(pattern in path for pattern in patterns):
+            return subsystem
+    return None
+
+
+def _subsystem_of_frame(filename: str, lineno: int):
+    subsystem = _subsystem_of_file(filename)
+    if subsystem == "workers":
+        function = _function_table(filename).get(lineno, "")
+        return "capture" if function.startswith(CAPTURE_FUNCTIONS) else "receiver"
+    return subsystem
+
+
+def live_worker_counts() -> dict:
+    """Count live QThread objects by class, plus running Python threads."""
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, QThread))
+    counts["python_threads"] = threading.active_count()
+    return dict(counts)
+
+
+class MemoryProfiler:
+    """
+    Opt-in tracemalloc profiler for long sessions.
+
+    :meth:`start` begins tracing and takes a baseline. Every :meth:`sample`
+    takes a snapshot, charges each traced block to a subsystem (capture,
+    receiver, transcript, gemini, relay or other, see SUBSYSTEM_FILES),
+    counts live worker threads by type and appends a report with the
+    ``top_n`` biggest line-level changes since the previous sample to
+    ``dump_path``. Only allocations made after :meth:`start` are traced, so
+    start it once imports are done. Tracing costs CPU and memory, so it stays
+    off unless MEMORY_PROFILE is set.
+
+    A sample groups every traced block and, for the worker counts, walks
+    every object gc tracks; with a few hundred thousand blocks that takes
+    seconds. In the app it therefore runs on a :class:`MemorySampler`
+    thread, never on the GUI thread. Only ``take_snapshot()`` itself still
+    holds the GIL throughout (about 0.2 s per 350k traced blocks).
+    """
+
+    def __init__(self, dump_path: str = None, top_n: int = 15, nframes: int = 10):
+        self.dump_path = dump_path
+        self.top_n = top_n
+        self.nframes = nframes
+        # Allocations whose innermost frame is in one of these files are the
+        # profiler's own or import machinery. They are dropped from the grouped
+        # statistics: Snapshot.filter_traces() matches every trace in Python
+        # and took most of a sample's time.
+        self._excluded_files = frozenset((
+            tracemalloc.__file__,
+            __file__,
+            "<frozen importlib._bootstrap>",
+            "<frozen importlib._bootstrap_external>",
+            "<unknown>",
+        ))
+        self._attribution = {}
+        self._baseline = None
+        self._previous = None
+        self.samples = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+        self._baseline, self._previous = self._analyse(tracemalloc.take_snapshot())
+        print(f"[MemoryProfiler] Tracing allocations ({self.nframes} frames)"
+              + (f", reports go to {self.dump_path}" if self.dump_path else ""))
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._previous = None
+        self._attribution.clear()
+
+    def _subsystem_of(self, traceback) -> str:
+        subsystem = self._attribution.get(traceback)
+        if subsystem is None:
+            subsystem = "other"
+            for frame in reversed(traceback):  # innermost frame last
+                found = _subsystem_of_frame(frame.filename, frame.lineno)
+                if found is not None:
+                    subsystem = found
+                    break
+            if len(self._attribution) > 100000:
+                self._attribution.clear()
+            self._attribution[traceback] = subsystem
+        return subsystem
+
+    def _analyse(self, snapshot):
+        """
+        Group a snapshot once into bytes per subsystem and (bytes, blocks) per source line.
+
+        Only the per-line totals are kept for the next sample's diff; holding
+        the previous snapshot and calling compare_to() would group its traces
+        all over again.
+        """
+        totals = dict.fromkeys(SUBSYSTEMS, 0)
+        lines = {}
+        for stat in snapshot.statistics("traceback"):
+            frame = stat.traceback[-1]
+            if frame.filename in self._excluded_files:
+                continue
+            totals[self._subsystem_of(stat.traceback)] += stat.size
+            size, count = lines.get(frame, (0, 0))
+            lines[frame] = (size + stat.size, count + stat.count)
+        return totals, lines
+
+    def _top_changes(self, lines: dict) -> list:
+        changes = []
+        for frame in lines.keys() | self._previous.keys():
+            size, count = lines.get(frame, (0, 0))
+            previous_size, previous_count = self._previous.get(frame, (0, 0))
+            if size != previous_size or count != previous_count:
+                changes.append((str(frame), size - previous_size, count - previous_count))
+        return heapq.nlargest(self.top_n, changes, key=lambda change: abs(change[1]))
+
+    def sample(self) -> dict:
+        """Take a snapshot and return (and optionally dump) the growth report."""
+        current, lines = self._analyse(tracemalloc.take_snapshot())
+        traced, peak = tracemalloc.get_traced_memory()
+        report = {
+            "traced_bytes": traced,
+            "peak_bytes": peak,
+            "subsystems": current,
+            "growth": {name: current[name] - self._baseline[name] for name in SUBSYSTEMS},
+            "workers": live_worker_counts(),
+            "top": self._top_changes(lines),
+        }
+        self._previous = lines
+        self.samples += 1
+        if self.dump_path:
+            self._dump(report)
+        return report
+
+    def summary(self, report: dict) -> str:
+        growth = ", ".join(f"{name} {size / 1024:+.0f}k" for name, size in report["growth"].items() if size)
+        workers = ", ".join(f"{name} {count}" for name, count in sorted(report["workers"].items()))
+        return f"traced {report['traced_bytes'] / 1024 / 1024:.1f} MB | growth: {growth or 'none'} | {workers}"
+
+    def _dump(self, report: dict):
+        lines = [
+            f"=== {datetime.now().isoformat(timespec='seconds')} sample {self.samples} ===",
+            f"traced {report['traced_bytes'] / 1024 / 1024:.2f} MB, peak {report['peak_bytes'] / 1024 / 1024:.2f} MB",
+        ]
+        for name in SUBSYSTEMS:
+            lines.append(f"  {name:<10} {report['subsystems'][name] / 1024:10.1f} KiB  "
+                         f"({report['growth'][name] / 1024:+.1f} KiB since start)")
+        lines.append("  workers: " + ", ".join(f"{k}={v}" for k, v in sorted(report["workers"].items())))
+        lines.append(f"  top {self.top_n} changes since previous sample:")
+        for where, size_diff, count_diff in report["top"]:
+            lines.append(f"    {size_diff / 1024:+9.1f} KiB {count_diff:+7d} blocks  {where}")
+        try:
+            with open(self.dump_path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"[MemoryProfiler] Cannot write {self.dump_path}: {e}")
+
+
+class MemorySampler(QThread):
+    """Runs MemoryProfiler.sample() off the GUI thread and emits the report."""
+
+    sampled = Signal(object)
+
+    def __init__(self, profiler: MemoryProfiler, parent=None):
+        super().__init__(parent)
+        self._profiler = profiler
+        self.skipped = 0
+
+    def request_sample(self):
+        """Start a sample unless the previous one is still being analysed."""
+        if self.isRunning():
+            self.skipped += 1
+            return
+        self.start(QThread.Priority.LowPriority)
+
+    def run(self):
+        self.sampled.emit(self._profiler.sample())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Soak test: replay a captured session repeatedly and check that memory stays bounded"
+    )
+    parser.add_argument("capture", help="Capture file from SESSION_CAPTURE_DIR")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2, help="Untraced rounds replayed before the baseline is taken")
+    parser.add_argument("--max-growth-kb", type=float, default=512.0,
+                        help="Fail if traced memory grows more than this after warm-up")
+    parser.add_argument("--dump", default=None, help="Append per-round reports to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QCoreApplication, QEvent
+    from src.session_replay import SessionReplayer
+
+    def replay_round():
+        SessionReplayer(args.capture, speed=0).run()
+        # Let deleteLater() run, as the GUI event loop would between sessions.
+        QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+        gc.collect()
+
+    # Warm up untraced: imports and one-time caches are not what a soak is looking for.
+    for _ in range(args.warmup):
+        replay_round()
+    profiler = MemoryProfiler(args.dump)
+    profiler.start()
+    started = time.perf_counter()
+    for round_index in range(args.rounds):
+        replay_round()
+        report = profiler.sample()
+        print(f"[Soak] round {round_index + 1}/{args.rounds}: {profiler.summary(report)}")
+
+    growth = sum(report["growth"].values())
+    workers = {name: count for name, count in report["workers"].items() if name != "python_threads"}
+    print(f"[Soak] {args.rounds} rounds in {time.perf_counter() - started:.1f}s, "
+          f"traced growth {growth / 1024:+.1f} KiB, live workers {workers or 'none'}")
+    if growth > args.max_growth_kb * 1024:
+        print(f"[Soak] FAIL: growth exceeds {args.max_growth_kb:.0f} KiB")
+        sys.exit(1)
+    print("[Soak] OK: memory bounded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_AVAILABLE = msgpack is not None
+
+# Fixed schema for binary relay frames. Keys are small integers instead of
+# field names; fields outside the schema travel in EXTRA_KEY as a plain map.
+# Keep in sync with RELAY_FIELDS in websocket-server/server.js.
+FIELD_KEYS = {
+    "type": 0,
+    "text": 1,
+    "is_final": 2,
+    "input_source": 3,
+    "timestamp": 4,
+    "seq": 5,
+    "session": 6,
+    "pseq": 7,
+    "keyframe": 8,
+    "prefix": 9,
+    "suffix": 10,
+    "messages": 11,
+    "speaker": 12,
+    "language": 13,
+}
+EXTRA_KEY = 15
+FIELD_NAMES = {key: name for name, key in FIELD_KEYS.items()}
+
+TYPE_CODES = {
+    "transcription": 0,
+    "translation": 1,
+    "batch": 2,
+}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+
+def _pack_fields(message: dict) -> dict:
+    packed = {}
+    extra = {}
+    for name, value in message.items():
+        if value is None and name == "timestamp":
+            continue
+        key = FIELD_KEYS.get(name)
+        if key is None:
+            extra[name] = value
+        elif name == "type":
+            packed[key] = TYPE_CODES.get(value, value)
+        elif name == "messages":
+            packed[key] = [_pack_fields(inner) for inner in value]
+        else:
+            packed[key] = value
+    if extra:
+        packed[EXTRA_KEY] = extra
+    return packed
+
+
+def _unpack_fields(packed: dict) -> dict:
+    message = {}
+    for key, value in packed.items():
+        if key == EXTRA_KEY:
+            message.update(value)
+            continue
+        name = FIELD_NAMES.get(key, str(key))
+        if name == "type":
+            message[name] = TYPE_NAMES.get(value, value)
+        elif name == "messages":
+            message[name] = [_unpack_fields(inner) for inner in value]
+        else:
+            message[name] = value
+    message.setdefault("timestamp", None)
+    return message
+
+
+def encode_msgpack(message: dict) -> bytes:
+    """Encode a relay message (or batch frame) with the fixed binary schema."""
+    return msgpack.packb(_pack_fields(message), use_bin_type=True)
+
+
+def decode_msgpack(payload: bytes) -> dict:
+    """Decode a binary relay frame back into the JSON message shape."""
+    return _unpack_fields(msgpack.unpackb(payload, raw=False, strict_map_key=False))
+
+
+def encode_json(message: dict) -> str:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode(message: dict, encoding: str):
+    """Encode message for the negotiated encoding ("msgpack" or "json")."""
+    if encoding == "msgpack":
+        return encode_msgpack(message)
+    return encode_json(message)
+
+
+def decode(payload) -> dict:
+    """Decode a frame; bytes are treated as msgpack, str as JSON."""
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return decode_msgpack(bytes(payload))
+    return json.loads(payload)
+
+
+def supported_encodings() -> list:
+    """Encodings this process can speak, in order of preference."""
+    return ["msgpack", "json"] if MSGPACK_AVAILABLE else ["json"]
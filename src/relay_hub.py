@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+import numpy as np
+import websockets
+from websockets.exceptions import ConnectionClosed
+from src import relay_codec
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class _Viewer:
+    """One connected client with its own bounded send queue."""
+
+    def __init__(self, ws, max_queue: int):
+        self.ws = ws
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.evicted = False
+        self.dropped_partials = 0
+
+    def offer(self, payload: str, droppable: bool) -> bool:
+        """
+        Queue a frame; return False if the viewer must be evicted.
+
+        When the queue is full the oldest partial-only frame is dropped first.
+        A queue full of finals means the viewer is not keeping up at all.
+        """
+        if len(self.queue) >= self.max_queue:
+            for index, (_, queued_droppable) in enumerate(self.queue):
+                if queued_droppable:
+                    del self.queue[index]
+                    self.dropped_partials += 1
+                    break
+            else:
+                if droppable:
+                    self.dropped_partials += 1
+                    return True
+                return False
+        self.queue.append((payload, droppable))
+        self.wakeup.set()
+        return True
+
+
+class RelayHub:
+    """
+    Asyncio broadcast hub, a drop-in replacement for websocket-server/server.js.
+
+    Every incoming transcription frame is stamped and serialized to JSON once,
+    then handed to each other client's bounded queue. A writer task per client
+    drains its queue, so a slow browser tab only delays itself: partial frames
+    are dropped first, and a client whose queue fills with finals or whose send
+    stalls for ``send_timeout`` seconds is disconnected. Late joiners receive
+    the most recent finals as one snapshot frame.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 8765, max_queue: int = 256,
+                 history_size: int = 200, send_timeout: float = 5.0, log_connections: bool = True):
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.log_connections = log_connections
+        self._viewers = {}
+        self._history = deque(maxlen=history_size)
+        self.stats = {
+            "frames_in": 0,
+            "messages_in": 0,
+            "frames_out": 0,
+            "partials_dropped": 0,
+            "evictions": 0,
+        }
+
+    async def serve_forever(self):
+        async with websockets.serve(self._handle_client, self.host, self.port, max_queue=64):
+            print(f"[RelayHub] Listening on ws://{self.host}:{self.port}")
+            await self._report_stats()
+
+    async def _report_stats(self, interval: float = 10.0):
+        last = dict(self.stats)
+        last_cpu = time.process_time()
+        while True:
+            await asyncio.sleep(interval)
+            cpu = time.process_time()
+            if self.stats["frames_in"] != last["frames_in"]:
+                print(
+                    f"[RelayHub] {len(self._viewers)} clients, "
+                    f"{(self.stats['messages_in'] - last['messages_in']) / interval:.1f} msg/s in, "
+                    f"{(self.stats['frames_out'] - last['frames_out']) / interval:.1f} frames/s out, "
+                    f"{self.stats['partials_dropped']} partials dropped, {self.stats['evictions']} evicted, "
+                    f"CPU {(cpu - last_cpu) / interval * 100:.1f}%"
+                )
+            last = dict(self.stats)
+            last_cpu = cpu
+
+    async def _handle_client(self, ws):
+        viewer = _Viewer(ws, self.max_queue)
+        self._viewers[ws] = viewer
+        if self.log_connections:
+            print(f"[RelayHub] New connection. Total clients: {len(self._viewers)}")
+        writer = asyncio.create_task(self._writer(viewer))
+        try:
+            viewer.offer(json.dumps({
+                "type": "connection",
+                "message": "Connected to transcription server",
+                "timestamp": _now_iso()
+            }), False)
+            if self._history:
+                viewer.offer(json.dumps({"type": "batch", "messages": list(self._history)}), False)
+
+            async for raw in ws:
+                await self._handle_frame(ws, raw)
+        except ConnectionClosed:
+            pass
+        finally:
+            writer.cancel()
+            self._viewers.pop(ws, None)
+            if self.log_connections:
+                print(f"[RelayHub] Client disconnected. Total clients: {len(self._viewers)}")
+
+    async def _handle_frame(self, sender, raw):
+        try:
+            message = relay_codec.decode(raw)
+        except Exception as e:
+            print(f"[RelayHub] Error decoding frame: {e}")
+            return
+
+        if message.get("type") == "hello":
+            encodings = message.get("encodings") or []
+            encoding = "msgpack" if relay_codec.MSGPACK_AVAILABLE and "msgpack" in encodings else "json"
+            await sender.send(json.dumps({"type": "hello_ack", "encoding": encoding}))
+            return
+
+        if message.get("type") == "correction_request":
+            # Grammar correction lives in the Node server (gemini-correction.js).
+            await sender.send(json.dumps({
+                "type": "correction_response",
+                "sentenceId": message.get("sentenceId"),
+                "status": "error",
+                "original": message.get("sentence"),
+                "corrected": None,
+                "timestamp": _now_iso()
+            }))
+            return
+
+        timestamp = _now_iso()
+        inner = message["messages"] if message.get("type") == "batch" else [message]
+        for item in inner:
+            item["timestamp"] = timestamp
+            if item.get("is_final"):
+                self._history.append(item)
+
+        self.stats["frames_in"] += 1
+        self.stats["messages_in"] += len(inner)
+        self.broadcast(message, sender)
+
+    def broadcast(self, message: dict, sender=None):
+        """Serialize message once and queue it for every client except sender."""
+        payload = json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+        inner = message["messages"] if message.get("type") == "batch" else [message]
+        droppable = not any(item.get("is_final") for item in inner)
+
+        for ws, viewer in list(self._viewers.items()):
+            if ws is sender or viewer.evicted:
+                continue
+            before = viewer.dropped_partials
+            if not viewer.offer(payload, droppable):
+                self._evict(viewer, "send queue full")
+            self.stats["partials_dropped"] += viewer.dropped_partials - before
+
+    def _evict(self, viewer: _Viewer, reason: str):
+        viewer.evicted = True
+        viewer.queue.clear()
+        viewer.wakeup.set()
+        self.stats["evictions"] += 1
+        print(f"[RelayHub] Evicting slow client: {reason}")
+        asyncio.ensure_future(viewer.ws.close(code=1013, reason="slow consumer"))
+
+    async def _writer(self, viewer: _Viewer):
+        while not viewer.evicted:
+            if not viewer.queue:
+                viewer.wakeup.clear()
+                await viewer.wakeup.wait()
+                continue
+            payload, _ = viewer.queue.popleft()
+            try:
+                await asyncio.wait_for(viewer.ws.send(payload), self.send_timeout)
+                self.stats["frames_out"] += 1
+            except asyncio.TimeoutError:
+                self._evict(viewer, f"send stalled for {self.send_timeout}s")
+            except ConnectionClosed:
+                return
+
+
+async def _load_viewer(uri: str, slow: bool, result: dict, done: asyncio.Event):
+    """A simulated browser tab. Slow viewers never read, so the hub has to drop or evict them."""
+    sock = None
+    if slow:
+        # A fixed tiny receive window (no autotuning), as on a congested link, so the backlog lands in the hub.
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        host, port = uri.rsplit("/", 1)[-1].rsplit(":", 1)
+        await asyncio.get_running_loop().sock_connect(sock, (host, int(port)))
+    # Stalled viewers skip permessage-deflate so the flood below is not compressed away.
+    async with websockets.connect(uri, sock=sock, max_queue=1 if slow else 64, max_size=None,
+                                  compression=None if slow else "deflate", open_timeout=60, close_timeout=1) as ws:
+        result["connected"] = True
+        if slow:
+            await done.wait()
+            return
+        reader = asyncio.ensure_future(ws.recv())
+        waiter = asyncio.ensure_future(done.wait())
+        while True:
+            finished, _ = await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if reader not in finished:
+                reader.cancel()
+                return
+            try:
+                message = json.loads(reader.result())
+            except ConnectionClosed:
+                return
+            now = time.time()
+            for item in message.get("messages", [message]):
+                if "sent_at" in item:
+                    result["latencies"].append(now - item["sent_at"])
+                    result["finals" if item.get("is_final") else "partials"] += 1
+            reader = asyncio.ensure_future(ws.recv())
+
+
+async def _load_test(args, uri: str, evictions) -> dict:
+    done, release = asyncio.Event(), asyncio.Event()
+    results = [{"connected": False, "latencies": [], "finals": 0, "partials": 0}
+               for _ in range(args.viewers + args.slow)]
+    viewers = []
+    for index, result in enumerate(results):
+        slow = index >= args.viewers
+        viewers.append(asyncio.ensure_future(_load_viewer(uri, slow, result, release if slow else done)))
+        if index % 50 == 49:
+            await asyncio.sleep(0.05)
+    while sum(result["connected"] for result in results) < len(results):
+        await asyncio.sleep(0.1)
+    print(f"[RelayHub] {args.viewers} viewers and {args.slow} stalled viewers connected")
+
+    # Random words: a repeated character would shrink to nothing under permessage-deflate.
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz     "
+    text = "".join(rng.choice(letters) for _ in range(args.text_bytes))
+    frames = int(args.rate * args.duration)
+    finals_sent = 0
+    started = time.perf_counter()
+    async with websockets.connect(uri) as publisher:
+        for index in range(frames):
+            is_final = index % 5 == 4
+            finals_sent += is_final
+            await publisher.send(json.dumps({
+                "type": "transcription", "text": text, "is_final": is_final,
+                "input_source": "host", "sent_at": time.time(),
+            }))
+            await asyncio.sleep(max(0.0, started + (index + 1) / args.rate - time.perf_counter()))
+        await asyncio.sleep(2.0)  # let the queues drain
+        done.set()
+        await asyncio.wait(viewers[:args.viewers], timeout=10)
+
+        # Only the stalled viewers are left. Flood them past what the kernel socket buffers
+        # absorb (a few MB) so the hub's own queue and send timeout have to deal with them.
+        flood = "".join(rng.choice(letters) for _ in range(32 * 1024))
+        flood_started = time.perf_counter()
+        for _ in range(args.flood_mb * 32):
+            await publisher.send(json.dumps({"type": "transcription", "text": flood, "is_final": False,
+                                             "input_source": "host"}))
+        deadline = time.perf_counter() + args.send_timeout + 5
+        while evictions() < args.slow and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        evicted_after = time.perf_counter() - flood_started
+    release.set()
+    await asyncio.wait(viewers, timeout=5)
+
+    async with websockets.connect(uri, max_size=None) as late:
+        await late.recv()  # connection greeting
+        snapshot = json.loads(await asyncio.wait_for(late.recv(), 5))
+
+    normal = results[:args.viewers]
+    return {
+        "frames": frames,
+        "finals": finals_sent,
+        "complete": sum(result["finals"] == finals_sent for result in normal),
+        "partials": float(np.mean([result["partials"] for result in normal])),
+        "latencies_ms": np.array([latency for result in normal for latency in result["latencies"]]) * 1000,
+        "snapshot": len(snapshot.get("messages", [])) if snapshot.get("type") == "batch" else 0,
+        "evicted_after": evicted_after,
+    }
+
+
+def run_load_test(args) -> bool:
+    """Hub on its own event-loop thread, viewers and publisher on another; True when the checks pass."""
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    hub = RelayHub("localhost", port, args.max_queue, args.history, args.send_timeout, log_connections=False)
+    hub_loop = asyncio.new_event_loop()
+    threading.Thread(target=hub_loop.run_until_complete, args=(hub.serve_forever(),), daemon=True).start()
+    time.sleep(0.5)
+
+    async def thread_cpu():
+        return time.thread_time()
+
+    cpu_before = asyncio.run_coroutine_threadsafe(thread_cpu(), hub_loop).result()
+    started = time.perf_counter()
+    report = asyncio.run(_load_test(args, f"ws://localhost:{port}", lambda: hub.stats["evictions"]))
+    elapsed = time.perf_counter() - started
+    cpu = asyncio.run_coroutine_threadsafe(thread_cpu(), hub_loop).result() - cpu_before
+
+    latencies = report["latencies_ms"]
+    print(f"[RelayHub] sent {report['frames']} frames ({report['finals']} finals) of {args.text_bytes} B "
+          f"at {args.rate:.0f}/s; hub wrote {hub.stats['frames_out']} frames")
+    print(f"[RelayHub] viewers with every final: {report['complete']}/{args.viewers}; "
+          f"partials per viewer {report['partials']:.1f} of {report['frames'] - report['finals']}")
+    print(f"[RelayHub] delivery latency p50 {np.percentile(latencies, 50):.1f} ms, "
+          f"p99 {np.percentile(latencies, 99):.1f} ms, max {latencies.max():.1f} ms")
+    print(f"[RelayHub] stalled viewers after a {args.flood_mb} MB flood: {hub.stats['partials_dropped']} partials dropped, "
+          f"{hub.stats['evictions']}/{args.slow} evicted within {report['evicted_after']:.1f}s; "
+          f"late joiner snapshot: {report['snapshot']} finals")
+    print(f"[RelayHub] hub thread CPU {cpu:.1f}s over {elapsed:.1f}s ({cpu / elapsed * 100:.0f}% of one core)")
+    return report["complete"] == args.viewers and hub.stats["evictions"] == args.slow and report["snapshot"] > 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python relay hub for transcription broadcasts")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-queue", type=int, default=256, help="Frames buffered per client before dropping")
+    parser.add_argument("--history", type=int, default=200, help="Finals replayed to late joiners")
+    parser.add_argument("--send-timeout", type=float, default=5.0, help="Seconds before a stalled client is evicted")
+    parser.add_argument("--load-test", action="store_true",
+                        help="Start a hub on a free port and drive it with simulated viewers instead of serving")
+    parser.add_argument("--viewers", type=int, default=500, help="Load test: viewers that keep up")
+    parser.add_argument("--slow", type=int, default=5, help="Load test: viewers that never read")
+    parser.add_argument("--rate", type=float, default=20.0, help="Load test: frames per second from the publisher")
+    parser.add_argument("--duration", type=float, default=10.0, help="Load test: seconds of publishing")
+    parser.add_argument("--text-bytes", type=int, default=300, help="Load test: text size per frame")
+    parser.add_argument("--flood-mb", type=int, default=10, help="Load test: data pushed at the stalled viewers at the end")
+    args = parser.parse_args()
+
+    if args.load_test:
+        if not run_load_test(args):
+            print("[RelayHub] FAIL: a viewer missed finals, a stalled viewer was not evicted or no snapshot was sent")
+            sys.exit(1)
+        print("[RelayHub] OK")
+        return
+
+    hub = RelayHub(args.host, args.port, args.max_queue, args.history, args.send_timeout)
+    try:
+        asyncio.run(hub.serve_forever())
+    except KeyboardInterrupt:
+        print("\n[RelayHub] Shutting down")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from collections import deque
+from typing import Optional
+
+
+class ReplayLog:
+    """
+    Bounded log of final relay messages with sequence numbers.
+
+    Every appended message gets the next ``seq``. Entries stay in the log
+    until :meth:`ack` confirms they were written to the relay, so anything
+    produced while offline can be replayed after reconnecting. With ``path``
+    the log is mirrored to an append-only JSON-lines file and reloaded on
+    start, so unsent finals also survive an application restart.
+    """
+
+    def __init__(self, max_entries: int = 1000, path: Optional[str] = None):
+        self._max_entries = max_entries
+        self._path = path
+        self._entries = deque()
+        self._lock = threading.Lock()
+        self._file = None
+        self._lines_written = 0
+
+        self.session_id = uuid.uuid4().hex[:12]
+        self.last_seq = 0
+        self.acked_seq = 0
+        self.dropped = 0
+
+        if path:
+            self._load(path)
+
+    def _load(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as fh:
+                    for line in fh:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if "session" in record:
+                            self.session_id = record["session"]
+                            self.last_seq = max(self.last_seq, record.get("last_seq", 0))
+                        elif "ack" in record:
+                            self.acked_seq = max(self.acked_seq, record["ack"])
+                        elif "seq" in record:
+                            self._entries.append((record["seq"], record["message"]))
+                            self.last_seq = max(self.last_seq, record["seq"])
+                # Acked entries are compacted away; never hand out their numbers again.
+                self.last_seq = max(self.last_seq, self.acked_seq)
+                self._trim_acked()
+                while len(self._entries) > self._max_entries:
+                    self._entries.popleft()
+                    self.dropped += 1
+            self._rewrite()
+        except OSError as e:
+            print(f"[ReplayLog] Disk log unavailable, keeping finals in memory only: {e}")
+            self._file = None
+
+    def _rewrite(self):
+        """Compact the file down to the session header (with last_seq), ack mark and live entries."""
+        if self._file is not None:
+            self._file.close()
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps({"session": self.session_id, "last_seq": self.last_seq}) + "\n")
+            fh.write(json.dumps({"ack": self.acked_seq}) + "\n")
+            for seq, message in self._entries:
+                fh.write(json.dumps({"seq": seq, "message": message}) + "\n")
+        os.replace(tmp_path, self._path)
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._lines_written = len(self._entries) + 2
+
+    def _write(self, record: dict):
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._lines_written += 1
+            if self._lines_written > 4 * self._max_entries:
+                self._rewrite()
+        except OSError as e:
+            print(f"[ReplayLog] Disk write failed: {e}")
+
+    def _trim_acked(self):
+        while self._entries and self._entries[0][0] <= self.acked_seq:
+            self._entries.popleft()
+
+    def append(self, message: dict) -> int:
+        """Assign the next sequence number to message (in place) and log it."""
+        with self._lock:
+            self.last_seq += 1
+            message["seq"] = self.last_seq
+            message["session"] = self.session_id
+            if len(self._entries) >= self._max_entries:
+                self._entries.popleft()
+                self.dropped += 1
+            self._entries.append((self.last_seq, message))
+            self._write({"seq": self.last_seq, "message": message})
+            return self.last_seq
+
+    def entries_after(self, seq: int) -> list:
+        """Return logged messages with a sequence number greater than seq."""
+        with self._lock:
+            return [message for entry_seq, message in self._entries if entry_seq > seq]
+
+    def ack(self, seq: int):
+        """Mark everything up to seq as delivered and drop it from the log."""
+        with self._lock:
+            if seq <= self.acked_seq:
+                return
+            self.acked_seq = seq
+            self._trim_acked()
+            self._write({"ack": seq})
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a disk-backed ReplayLog survives repeated restarts")
+    parser.add_argument("--selftest", action="store_true", help="Run the restart checks in a temporary directory")
+    parser.add_argument("--restarts", type=int, default=6)
+    args = parser.parse_args()
+    if not args.selftest:
+        parser.print_help()
+        return
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replay.jsonl")
+        session = None
+        last_acked = 0
+        for run in range(args.restarts):
+            log = ReplayLog(max_entries=10, path=path)
+            session = session or log.session_id
+            # Runs cycle through: three finals all delivered; no finals at all, so this
+            # run's load compacts away every seq record; three finals with the last
+            # one left unsent for the next run.
+            phase = run % 3
+            count = 0 if phase == 1 else 3
+            seqs = [log.append({"type": "transcription", "text": f"run {run} final {i}", "is_final": True})
+                    for i in range(count)]
+            pending = [message["seq"] for message in log.entries_after(log.acked_seq)]
+            print(f"[ReplayLog] run {run}: loaded acked={log.acked_seq}, new seqs {seqs}, pending {pending}")
+            if log.session_id != session:
+                failures.append(f"run {run}: session changed to {log.session_id}")
+            if seqs and (seqs[0] <= last_acked or pending[-len(seqs):] != seqs):
+                failures.append(f"run {run}: new seqs {seqs} after acked {last_acked} are not replayed (pending {pending})")
+            if seqs:
+                last_acked = seqs[-1] if phase == 0 else seqs[-2]
+                log.ack(last_acked)
+            log.close()
+    if failures:
+        for failure in failures:
+            print(f"[ReplayLog] FAIL: {failure}")
+        sys.exit(1)
+    print("[ReplayLog] OK: sequence numbers keep increasing across restarts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json
+import struct
+import time
+
+MAGIC = b"SONIOXCAP1\n"
+
+KIND_CONFIG = 0
+KIND_AUDIO = 1
+KIND_RESPONSE = 2
+KIND_CONTROL = 3
+
+KIND_NAMES = {
+    KIND_CONFIG: "config",
+    KIND_AUDIO: "audio",
+    KIND_RESPONSE: "response",
+    KIND_CONTROL: "control",
+}
+
+# kind (uint8), seconds since capture start (float64), payload length (uint32)
+_RECORD = struct.Struct("<BdI")
+
+
+class SessionCaptureWriter:
+    """
+    Records everything a Soniox session exchanged into one compact binary file.
+
+    The file starts with MAGIC and a JSON header line, followed by records of
+    ``(kind, t, length, payload)``: the session config (without the API key),
+    every raw PCM chunk actually sent, keepalive/control messages and every
+    response text received. ``t`` is seconds since the capture started.
+    """
+
+    def __init__(self, path: str, metadata: dict = None):
+        self.path = path
+        self._file = open(path, "wb")
+        self._started = time.monotonic()
+        header = {"started_at": time.time()}
+        header.update(metadata or {})
+        self._file.write(MAGIC)
+        self._file.write(json.dumps(header).encode("utf-8") + b"\n")
+
+    def _write(self, kind: int, payload: bytes):
+        if self._file is None:
+            return
+        self._file.write(_RECORD.pack(kind, time.monotonic() - self._started, len(payload)))
+        self._file.write(payload)
+
+    def write_config(self, config: dict):
+        safe = {k: v for k, v in config.items() if k != "api_key"}
+        self._write(KIND_CONFIG, json.dumps(safe).encode("utf-8"))
+
+    def write_audio(self, chunk: bytes):
+        self._write(KIND_AUDIO, chunk)
+
+    def write_control(self, message: str):
+        self._write(KIND_CONTROL, message.encode("utf-8"))
+
+    def write_response(self, message: str):
+        self._write(KIND_RESPONSE, message.encode("utf-8") if isinstance(message, str) else message)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_session(path: str):
+    """
+    Read a capture file.
+
+    Returns:
+        (header dict, list of (kind, t, payload bytes) records)
+    """
+    records = []
+    with open(path, "rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a session capture file: {path}")
+        header = json.loads(fh.readline())
+        while True:
+            head = fh.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                break
+            kind, t, length = _RECORD.unpack(head)
+            payload = fh.read(length)
+            if len(payload) < length:
+                break
+            records.append((kind, t, payload))
+    return header, records
@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import sys
+import time
+from src.config import MAX_TRANSCRIPTION_LINES
+from src.session_capture import read_session, KIND_AUDIO, KIND_RESPONSE
+from src.text_formatter import append_timestamped_text, source_label, speaker_color
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+
+class SessionReplayer:
+    """
+    Pushes a captured session back through the post-network pipeline.
+
+    Every captured Soniox response goes through ``SonioxWorker._handle_response``
+    and from there, as in a live session, through TranscriptionController, the
+    sink pipeline (relay) and ``append_timestamped_text`` into a QTextEdit.
+    Nothing touches the network unless ``relay_url`` is given. All objects live
+    on the calling thread, so signal delivery is synchronous and the time spent
+    per response covers the whole chain.
+
+    Args:
+        path: Capture file written by SessionCaptureWriter
+        speed: 1.0 replays at the captured pace, 0 as fast as possible
+        relay_url: Optional relay to forward to; otherwise events go to an
+            NDJSON sink writing to os.devnull
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, relay_url: str = None):
+        from PySide6.QtWidgets import QApplication, QTextEdit
+        from src.controllers import TranscriptionController
+        from src.sinks import SinkPipeline, RelaySink, NdjsonFileSink
+        from src.websocket_client import WebSocketClient
+        from src.workers import SonioxWorker
+
+        self._app = QApplication.instance() or QApplication(sys.argv[:1])
+        self.header, self.records = read_session(path)
+        self.speed = speed
+
+        self.editor = QTextEdit()
+        self.pipeline = SinkPipeline()
+        if relay_url:
+            self.pipeline.add_sink(RelaySink(WebSocketClient(relay_url)))
+        else:
+            self.pipeline.add_sink(NdjsonFileSink(os.devnull))
+
+        self.controller = TranscriptionController()
+        self.controller.set_sink_pipeline(self.pipeline)
+        self.controller.transcription_update.connect(self._on_transcription_update)
+
+        self.worker = SonioxWorker(
+            None,
+            mode=self.header.get("mode", "transcription"),
+            target_lang=self.header.get("target_lang"),
+            input_source=self.header.get("input_source", "host"),
+        )
+        self.controller.connect_worker(self.worker)
+        self.updates = 0
+        self.finals = 0
+
+    def _on_transcription_update(self, text: str, is_final: bool, input_source: str, meta: dict):
+        self.updates += 1
+        if is_final:
+            self.finals += 1
+            append_timestamped_text(self.editor, f"[{source_label(input_source, meta).upper()}] {text}",
+                                    max_lines=MAX_TRANSCRIPTION_LINES, color=speaker_color(meta.get("speaker")))
+
+    def run(self) -> dict:
+        """Replay all responses and return throughput and latency statistics."""
+        processing = []
+        lag = []
+        responses = 0
+        tokens = 0
+        audio_bytes = sum(len(p) for kind, _, p in self.records if kind == KIND_AUDIO)
+
+        self.pipeline.start()
+        started = time.perf_counter()
+        for kind, t, payload in self.records:
+            if kind != KIND_RESPONSE:
+                continue
+            if self.speed > 0:
+                due = started + t / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                lag.append(max(0.0, time.perf_counter() - due))
+
+            data = json.loads(payload)
+            begin = time.perf_counter()
+            self.worker._handle_response(data)
+            self._app.processEvents()
+            processing.append(time.perf_counter() - begin)
+            responses += 1
+            tokens += len(data.get("tokens", []))
+        wall = time.perf_counter() - started
+        self.pipeline.stop()
+
+        stats = {
+            "responses": responses,
+            "tokens": tokens,
+            "updates": self.updates,
+            "finals": self.finals,
+            "audio_seconds": audio_bytes / 2 / 16000,
+            "wall_seconds": wall,
+            "responses_per_sec": responses / wall if wall else 0.0,
+            "tokens_per_sec": tokens / wall if wall else 0.0,
+            "processing_ms": {k: v * 1000 for k, v in _percentiles(processing).items()},
+            "sinks": self.pipeline.stats(),
+        }
+        if lag:
+            stats["lag_ms"] = {k: v * 1000 for k, v in _percentiles(lag).items()}
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured Soniox session without network access")
+    parser.add_argument("capture", help="Capture file from SESSION_CAPTURE_DIR")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, 0 = as fast as possible (default)")
+    parser.add_argument("--relay", default=None, help="Forward events to this relay URL")
+    parser.add_argument("--json", action="store_true", help="Print statistics as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    stats = SessionReplayer(args.capture, args.speed, args.relay).run()
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+
+    p = stats["processing_ms"]
+    print(f"[Replay] {stats['responses']} responses, {stats['tokens']} tokens, "
+          f"{stats['finals']} finals, {stats['audio_seconds']:.1f}s audio captured")
+    print(f"[Replay] {stats['wall_seconds']:.2f}s wall, {stats['responses_per_sec']:.0f} responses/s, "
+          f"{stats['tokens_per_sec']:.0f} tokens/s")
+    print(f"[Replay] processing per response: p50 {p['p50']:.2f} ms, p95 {p['p95']:.2f} ms, "
+          f"p99 {p['p99']:.2f} ms, max {p['max']:.2f} ms")
+    if "lag_ms" in stats:
+        lag = stats["lag_ms"]
+        print(f"[Replay] lag behind capture timeline: p95 {lag['p95']:.2f} ms, max {lag['max']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+from .base import Sink, DROP_OLDEST, DROP_NEWEST, DROP_PARTIALS
+from .pipeline import SinkPipeline
+from .relay_sink import RelaySink
+from .ndjson_sink import NdjsonFileSink
+from .udp_sink import UdpSink
+from .unix_socket_sink import UnixSocketSink
+
+__all__ = [
+    'Sink',
+    'SinkPipeline',
+    'RelaySink',
+    'NdjsonFileSink',
+    'UdpSink',
+    'UnixSocketSink',
+    'DROP_OLDEST',
+    'DROP_NEWEST',
+    'DROP_PARTIALS',
+]
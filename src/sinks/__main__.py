@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import websockets
+from src import relay_codec
+from src.websocket_client import WebSocketClient
+from src.sinks import SinkPipeline, RelaySink, NdjsonFileSink, UdpSink, UnixSocketSink
+
+
+class _Receivers:
+    """Local listeners for the UDP, Unix socket and relay sinks; count what actually arrives."""
+
+    def __init__(self, tmp: str):
+        self.udp_count = 0
+        self.unix_count = 0
+        self.relay_count = 0
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        self.udp.bind(("127.0.0.1", 0))
+        self.unix_path = os.path.join(tmp, "sink.sock")
+        self.unix = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.unix.bind(self.unix_path)
+        self.unix.listen(1)
+        with socket.socket() as probe:
+            probe.bind(("localhost", 0))
+            self.relay_port = probe.getsockname()[1]
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._read_udp, daemon=True).start()
+        threading.Thread(target=self._read_unix, daemon=True).start()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._serve_relay(), self._loop).result(5)
+
+    def _read_udp(self):
+        while True:
+            self.udp.recv(65536)
+            self.udp_count += 1
+
+    def _read_unix(self):
+        connection, _ = self.unix.accept()
+        with connection.makefile("rb") as reader:
+            for _ in reader:
+                self.unix_count += 1
+
+    async def _relay_handler(self, websocket):
+        async for raw in websocket:
+            message = relay_codec.decode(raw)
+            self.relay_count += len(message.get("messages", [message]))
+
+    async def _serve_relay(self):
+        self._server = await websockets.serve(self._relay_handler, "localhost", self.relay_port)
+
+
+def _publish(pipeline: SinkPipeline, events: int, rate: float, text: str) -> list:
+    """Publish a partial/final mix (four partials per final); returns the per-call cost in seconds."""
+    costs = []
+    started = time.perf_counter()
+    for index in range(events):
+        before = time.perf_counter()
+        pipeline.publish("transcription", text[:20 + index % 5 * 20], index % 5 == 4, "host", speaker="1")
+        costs.append(time.perf_counter() - before)
+        if rate:
+            time.sleep(max(0.0, started + (index + 1) / rate - time.perf_counter()))
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-sink throughput with the relay, NDJSON, UDP and Unix socket sinks active")
+    parser.add_argument("--bench", action="store_true", help="Run the benchmark")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=0.0, help="Events per second to publish (0 = as fast as possible)")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    text = "the quick brown fox jumps over the lazy dog " * 3
+    with tempfile.TemporaryDirectory() as tmp:
+        receivers = _Receivers(tmp)
+        client = WebSocketClient(f"ws://localhost:{receivers.relay_port}")
+        ndjson_path = os.path.join(tmp, "events.ndjson")
+        pipeline = SinkPipeline()
+        pipeline.add_sink(RelaySink(client))
+        pipeline.add_sink(NdjsonFileSink(ndjson_path))
+        pipeline.add_sink(UdpSink(*receivers.udp.getsockname()))
+        pipeline.add_sink(UnixSocketSink(receivers.unix_path))
+        pipeline.start()
+        deadline = time.monotonic() + 5
+        while not client.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        started = time.perf_counter()
+        costs = np.array(_publish(pipeline, args.events, args.rate, text)) * 1e6
+        published = time.perf_counter() - started
+        pipeline.stop()
+        time.sleep(0.5)  # let the listeners read what is in flight
+        stats = pipeline.stats()
+        with open(ndjson_path, encoding="utf-8") as f:
+            arrived = {"relay": receivers.relay_count, "ndjson": sum(1 for _ in f),
+                       "udp": receivers.udp_count, "unix": receivers.unix_count}
+
+        # A Unix socket sink with no listener must count its events as dropped, not written.
+        orphan = UnixSocketSink(os.path.join(tmp, "nobody.sock"))
+        orphan.start()
+        for index in range(100):
+            orphan.offer({"type": "transcription", "text": "x", "is_final": True, "index": index})
+        orphan.stop()
+
+    print(f"[Sinks] published {args.events} events in {published:.2f}s "
+          f"({args.events / published:.0f}/s); publish() p50 {np.percentile(costs, 50):.1f} us, "
+          f"p99 {np.percentile(costs, 99):.1f} us")
+    ok = True
+    for name, sink in stats.items():
+        capacity = sink["written"] / sink["write_seconds"] if sink["write_seconds"] else 0.0
+        print(f"[Sinks] {name:7s} written {sink['written']:6d}, dropped {sink['dropped']:6d}, "
+              f"queued {sink['queued']:4d}, errors {sink['errors']}, {capacity:9.0f} events/s while writing, "
+              f"arrived {arrived[name]}")
+        if sink["written"] + sink["dropped"] + sink["queued"] != sink["offered"] or sink["errors"]:
+            ok = False
+        # The relay client coalesces superseded partials, so fewer events arrive than were written.
+        if name in ("ndjson", "unix") and arrived[name] != sink["written"]:
+            ok = False
+    print(f"[Sinks] unix sink without a listener: written {orphan.written}, dropped {orphan.dropped} of 100")
+    if orphan.written or orphan.dropped != 100:
+        ok = False
+    if not ok:
+        print("[Sinks] FAIL: a sink's written/dropped counts do not add up to what was offered or delivered")
+        sys.exit(1)
+    print("[Sinks] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+DROP_PARTIALS = "drop_partials"
+
+
+class Sink:
+    """
+    Base class for transcription event outputs.
+
+    Each sink owns a bounded queue and a worker thread, so ``offer`` never
+    blocks the caller. When the queue is full the ``drop_policy`` decides what
+    is lost: ``drop_oldest`` discards the oldest event, ``drop_newest`` the
+    incoming one, and ``drop_partials`` the oldest partial (falling back to
+    the oldest event if only finals are queued). Subclasses implement
+    :meth:`_write_batch`, returning how many events were actually delivered
+    (anything skipped is counted in ``dropped`` instead), and optionally
+    :meth:`_open` / :meth:`_close`.
+    """
+
+    def __init__(self, name: str, max_queue: int = 1024, drop_policy: str = DROP_PARTIALS, max_batch: int = 64):
+        self.name = name
+        self._max_queue = max_queue
+        self._drop_policy = drop_policy
+        self._max_batch = max_batch
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop_flag = False
+
+        self.offered = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.write_seconds = 0.0
+        self._started_at = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_flag = False
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"Sink-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Drain what is queued (within timeout) and stop the worker thread."""
+        with self._cond:
+            self._stop_flag = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def offer(self, event: dict):
+        """Queue an event without blocking, applying the drop policy when full."""
+        with self._cond:
+            self.offered += 1
+            if len(self._queue) >= self._max_queue:
+                self.dropped += 1
+                if self._drop_policy == DROP_NEWEST:
+                    return
+                if self._drop_policy == DROP_PARTIALS:
+                    for index, queued in enumerate(self._queue):
+                        if not queued.get("is_final"):
+                            del self._queue[index]
+                            break
+                    else:
+                        self._queue.popleft()
+                else:
+                    self._queue.popleft()
+            self._queue.append(event)
+            self._cond.notify()
+
+    def _run(self):
+        try:
+            self._open()
+        except Exception as e:
+            print(f"[Sink {self.name}] Failed to open: {e}")
+            self.errors += 1
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._stop_flag:
+                        self._cond.wait()
+                    if not self._queue and self._stop_flag:
+                        return
+                    batch = [self._queue.popleft() for _ in range(min(self._max_batch, len(self._queue)))]
+                started = time.perf_counter()
+                try:
+                    self.written += self._write_batch(batch)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[Sink {self.name}] Write error: {e}")
+                self.write_seconds += time.perf_counter() - started
+        finally:
+            try:
+                self._close()
+            except Exception:
+                pass
+
+    def _open(self):
+        pass
+
+    def _close(self):
+        pass
+
+    def _write_batch(self, events: list) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._queue)
+        elapsed = max(time.monotonic() - self._started_at, 1e-9) if self._started_at else 0.0
+        return {
+            "offered": self.offered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queued": queued,
+            "events_per_sec": self.written / elapsed if elapsed else 0.0,
+            "write_seconds": self.write_seconds,
+        }
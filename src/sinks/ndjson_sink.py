@@ -0,0 +1,26 @@
+import json
+import os
+from src.sinks.base import Sink, DROP_OLDEST
+
+
+class NdjsonFileSink(Sink):
+    """Appends events to a newline-delimited JSON file."""
+
+    def __init__(self, path: str, max_queue: int = 4096, drop_policy: str = DROP_OLDEST):
+        super().__init__("ndjson", max_queue=max_queue, drop_policy=drop_policy, max_batch=256)
+        self.path = path
+        self._file = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, events: list) -> int:
+        self._file.write("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events))
+        self._file.flush()
+        return len(events)
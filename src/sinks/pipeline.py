@@ -0,0 +1,39 @@
+import time
+
+
+class SinkPipeline:
+    """Fans transcription events out to any number of independent sinks."""
+
+    def __init__(self):
+        self._sinks = []
+
+    def add_sink(self, sink):
+        self._sinks.append(sink)
+        return sink
+
+    def get_sinks(self):
+        return list(self._sinks)
+
+    def start(self):
+        for sink in self._sinks:
+            sink.start()
+
+    def stop(self):
+        for sink in self._sinks:
+            sink.stop()
+
+    def publish(self, message_type: str, text: str, is_final: bool, input_source: str, **extra):
+        """Build an event and offer it to every sink; never blocks."""
+        event = {
+            "type": message_type,
+            "text": text,
+            "is_final": is_final,
+            "input_source": input_source,
+            "timestamp": time.time(),
+        }
+        event.update(extra)
+        for sink in self._sinks:
+            sink.offer(event)
+
+    def stats(self) -> dict:
+        return {sink.name: sink.stats() for sink in self._sinks}
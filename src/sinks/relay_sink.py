@@ -0,0 +1,21 @@
+from src.sinks.base import Sink, DROP_PARTIALS
+
+
+class RelaySink(Sink):
+    """Forwards events to the WebSocket relay through a WebSocketClient."""
+
+    def __init__(self, client, max_queue: int = 1024, drop_policy: str = DROP_PARTIALS):
+        super().__init__("relay", max_queue=max_queue, drop_policy=drop_policy)
+        self.client = client
+
+    def _open(self):
+        self.client.start()
+
+    def _close(self):
+        self.client.stop()
+
+    def _write_batch(self, events: list) -> int:
+        for event in events:
+            extra = {k: v for k, v in event.items() if k not in ("type", "text", "is_final", "timestamp")}
+            self.client.send_transcription(event["text"], event["is_final"], additional_data=extra, message_type=event["type"])
+        return len(events)
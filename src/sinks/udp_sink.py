@@ -0,0 +1,33 @@
+import json
+import socket
+from src.sinks.base import Sink, DROP_PARTIALS
+
+MAX_DATAGRAM_BYTES = 65000
+
+
+class UdpSink(Sink):
+    """Sends each event as one JSON datagram; oversized events are skipped."""
+
+    def __init__(self, host: str, port: int, max_queue: int = 1024, drop_policy: str = DROP_PARTIALS):
+        super().__init__("udp", max_queue=max_queue, drop_policy=drop_policy)
+        self.address = (host, port)
+        self._sock = None
+
+    def _open(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _write_batch(self, events: list) -> int:
+        sent = 0
+        for event in events:
+            payload = json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            if len(payload) > MAX_DATAGRAM_BYTES:
+                self.dropped += 1
+                continue
+            self._sock.sendto(payload, self.address)
+            sent += 1
+        return sent
@@ -0,0 +1,50 @@
+import json
+import socket
+import time
+from src.sinks.base import Sink, DROP_PARTIALS
+
+
+class UnixSocketSink(Sink):
+    """
+    Streams newline-delimited JSON to a local Unix domain socket.
+
+    The sink connects lazily and reconnects at most every ``retry_interval``
+    seconds; events written while no listener is present are counted as dropped.
+    """
+
+    def __init__(self, path: str, max_queue: int = 1024, drop_policy: str = DROP_PARTIALS, retry_interval: float = 2.0):
+        super().__init__("unix", max_queue=max_queue, drop_policy=drop_policy)
+        self.path = path
+        self._retry_interval = retry_interval
+        self._sock = None
+        self._last_attempt = 0.0
+
+    def _connect(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_attempt < self._retry_interval:
+            return False
+        self._last_attempt = now
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            self._sock = sock
+            return True
+        except OSError:
+            return False
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _write_batch(self, events: list) -> int:
+        if self._sock is None and not self._connect():
+            self.dropped += len(events)
+            return 0
+        payload = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events).encode("utf-8")
+        try:
+            self._sock.sendall(payload)
+        except OSError:
+            self._close()
+            raise
+        return len(events)
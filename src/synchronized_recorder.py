@@ -0,0 +1,438 @@
+import argparse
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+from src.audio_ring_buffer import AudioRingBuffer
+from src.audio_writer import SegmentedAudioWriter, codec_samplerate
+from src.level_meter import LevelMeter
+from src.device_registry import open_input_stream, close_input_stream
+
+
+class DriftCompensator:
+    """
+    Maps one capture stream onto a shared timeline at the nominal sample rate.
+
+    The capture side reports ``(adc_time, frame_index)`` pairs from the audio
+    callback. A least-squares fit over the last ``window_seconds`` gives the
+    device's real sample rate on the shared clock and the frame index expected
+    at any instant. :meth:`pull` resamples buffered input with ``np.interp``
+    so that output sample ``k`` corresponds to ``start_time + k / nominal_rate``.
+    The read position advances continuously; deviations from the fit are
+    corrected gradually (``phase_gain``) to avoid audible jumps.
+
+    At most ``max_buffer_seconds`` of input are held. If output has not
+    started or another device stalls the shared output, the oldest input is
+    dropped (counted in ``dropped_frames``) and that stretch of the track is
+    written as silence, so the other tracks stay aligned.
+    """
+
+    def __init__(self, nominal_rate: float, channels: int, window_seconds: float = 30.0,
+                 point_interval: float = 0.1, phase_gain: float = 0.1, max_buffer_seconds: float = 10.0):
+        self.nominal_rate = float(nominal_rate)
+        self.channels = channels
+        self._window = window_seconds
+        self._point_interval = point_interval
+        self._phase_gain = phase_gain
+        self._points = deque()
+        self._buffer = np.zeros((0, channels), dtype=np.float32)
+        self._base = 0  # absolute frame index of _buffer[0]
+        self._pos = None  # absolute fractional frame index of the next output sample
+        self._max_buffer = max(1, int(self.nominal_rate * max_buffer_seconds))
+        self.dropped_frames = 0
+        self.first_time = None
+
+    def add_timestamp(self, adc_time: float, frame_index: int):
+        """Record that frame_index was captured at adc_time (shared clock)."""
+        if self.first_time is None:
+            self.first_time = adc_time - frame_index / self.nominal_rate
+        if self._points and adc_time - self._points[-1][0] < self._point_interval:
+            return
+        self._points.append((adc_time, frame_index))
+        while self._points and adc_time - self._points[0][0] > self._window:
+            self._points.popleft()
+
+    def push(self, samples: np.ndarray):
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+        excess = len(self._buffer) - self._max_buffer
+        if excess > 0:
+            self._buffer = self._buffer[excess:]
+            self._base += excess
+            self.dropped_frames += excess
+
+    def estimated_rate(self) -> float:
+        """Device sample rate measured against the shared clock."""
+        fit = self._fit()
+        return fit[0] if fit is not None else self.nominal_rate
+
+    def drift_ppm(self) -> float:
+        return (self.estimated_rate() / self.nominal_rate - 1.0) * 1e6
+
+    def _fit(self):
+        if len(self._points) < 2:
+            return None
+        t = np.array([p[0] for p in self._points])
+        idx = np.array([p[1] for p in self._points], dtype=np.float64)
+        t0 = t[0]
+        slope, intercept = np.polyfit(t - t0, idx, 1)
+        return slope, intercept, t0
+
+    def _index_at(self, when: float) -> float:
+        fit = self._fit()
+        if fit is None:
+            return (when - self.first_time) * self.nominal_rate
+        slope, intercept, t0 = fit
+        return intercept + (when - t0) * slope
+
+    def start_at(self, start_time: float):
+        """Begin output at start_time on the shared clock."""
+        self._pos = self._index_at(start_time)
+
+    def available_output(self) -> int:
+        """Output samples that can be produced from buffered input."""
+        if self._pos is None:
+            return 0
+        step = self.estimated_rate() / self.nominal_rate
+        # Keep a couple of frames in hand for the phase correction in pull().
+        last = self._base + len(self._buffer) - 3
+        return max(0, int((last - self._pos) / step))
+
+    def pull(self, frames: int, output_time: float) -> np.ndarray:
+        """
+        Produce frames resampled output samples.
+
+        Args:
+            frames: Number of output samples
+            output_time: Shared-clock time of the first output sample, used to
+                correct phase against the fit
+        """
+        step = self.estimated_rate() / self.nominal_rate
+        error = self._index_at(output_time) - self._pos
+        step += self._phase_gain * error / max(frames, 1)
+
+        positions = self._pos + step * np.arange(frames) - self._base
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        if len(self._buffer):
+            xp = np.arange(len(self._buffer))
+            for ch in range(self.channels):
+                out[:, ch] = np.interp(positions, xp, self._buffer[:, ch], left=0.0, right=0.0)
+        self._pos += step * frames
+
+        keep_from = max(0, int(self._pos) - self._base - 1)
+        if keep_from:
+            self._buffer = self._buffer[keep_from:]
+            self._base += keep_from
+        return out
+
+
+class SynchronizedRecorderWorker(QThread):
+    """
+    Records several input devices into one multichannel file on a shared timeline.
+
+    Every device gets its own InputStream, ring buffer and DriftCompensator.
+    Output starts when the last device has started, so all tracks begin at the
+    same instant, and each track is resampled to the nominal rate of the shared
+    clock (the callbacks' ADC timestamps), so they do not drift apart. Channels
+    are written in device order, e.g. host L/R then speaker L/R. A block the
+    ring buffer has to drop is recorded as silence, so the track stays on its
+    timeline.
+    """
+
+    error = Signal(str)
+    status = Signal(str)
+    saved = Signal(str)
+    segment_closed = Signal(str)
+    level = Signal(int, float, float)
+
+    def __init__(self, device_ids: list, samplerate: float, channels: int, filepath: str,
+                 codec: str = "wav", compression_level: float = None,
+                 segment_seconds: float = None, segment_bytes: int = None, header_flush_seconds: float = 5.0,
+                 block_seconds: float = 1.0, buffer_seconds: float = 5.0, parent=None):
+        super().__init__(parent)
+        self._device_ids = list(device_ids)
+        self._samplerate = codec_samplerate(codec, samplerate)
+        self._channels = channels
+        self._filepath = filepath
+        self._codec = codec
+        self._compression_level = compression_level
+        self._segment_seconds = segment_seconds
+        self._segment_bytes = segment_bytes
+        self._header_flush_seconds = header_flush_seconds
+        self._block_frames = max(1, int(self._samplerate * block_seconds))
+        self._stop_flag = False
+        self._rings = [AudioRingBuffer(int(self._samplerate * max(buffer_seconds, 2 * block_seconds)), channels)
+                       for _ in self._device_ids]
+        self._timestamps = [deque() for _ in self._device_ids]
+        # (ring stream position, frames) of blocks the ring dropped, and frames drained so far.
+        self._gaps = [deque() for _ in self._device_ids]
+        self._drained = [0 for _ in self._device_ids]
+        self._compensators = [DriftCompensator(self._samplerate, channels) for _ in self._device_ids]
+        self._streams = []
+
+    def stop(self):
+        self._stop_flag = True
+
+    def get_stats(self) -> dict:
+        """Return per-device measured drift, frames dropped by the ring buffer and by the compensator."""
+        return {
+            "drift_ppm": [c.drift_ppm() for c in self._compensators],
+            "dropped_frames": [r.dropped_frames for r in self._rings],
+            "overflow_frames": [c.dropped_frames for c in self._compensators],
+        }
+
+    def _make_callback(self, index: int):
+        ring = self._rings[index]
+        stamps = self._timestamps[index]
+        gaps = self._gaps[index]
+        meter = LevelMeter()
+        captured = [0]
+        accepted = [0]
+        clock = [None]
+
+        def callback(indata, frames, time_info, status):
+            if status:
+                self.status.emit(f"Audio status: {status}")
+            if clock[0] is None:
+                # Some host APIs report no ADC time. Pick one time base per device on the
+                # first callback and keep it; mixing clocks in one fit corrupts the drift.
+                if time_info.inputBufferAdcTime:
+                    clock[0] = "adc"
+                elif time_info.currentTime:
+                    clock[0] = "current"
+                else:
+                    clock[0] = "stream"
+            if clock[0] == "adc":
+                adc_time = time_info.inputBufferAdcTime
+            elif clock[0] == "current":
+                adc_time = time_info.currentTime
+            else:
+                adc_time = self._streams[index].time
+            # A callback without a time on the chosen clock contributes no fit point.
+            if adc_time:
+                stamps.append((adc_time, captured[0]))
+            if ring.write(indata):
+                accepted[0] += frames
+            else:
+                # The frames still happened on the device; _drain fills them with silence.
+                gaps.append((accepted[0], frames))
+            captured[0] += frames
+            levels = meter.update(indata)
+            if levels is not None:
+                self.level.emit(index, *levels)
+
+        return callback
+
+    def run(self):
+        try:
+            self.status.emit("Opening audio streams...")
+            staging = np.empty((self._block_frames, self._channels), dtype=np.int16)
+            poll_interval = self._block_frames / self._samplerate / 4
+            out_channels = self._channels * len(self._device_ids)
+
+            with SegmentedAudioWriter(
+                self._filepath,
+                self._samplerate,
+                out_channels,
+                codec=self._codec,
+                compression_level=self._compression_level,
+                segment_seconds=self._segment_seconds,
+                segment_bytes=self._segment_bytes,
+                header_flush_seconds=self._header_flush_seconds,
+                on_segment_closed=self.segment_closed.emit,
+            ) as out_file:
+                try:
+                    for index, device_id in enumerate(self._device_ids):
+                        self._streams.append(open_input_stream(
+                            samplerate=self._samplerate,
+                            channels=self._channels,
+                            device=device_id,
+                            dtype="int16",
+                            callback=self._make_callback(index),
+                        ))
+                    for stream in self._streams:
+                        stream.start()
+
+                    self.status.emit("Recording (synchronized)...")
+                    start_time = None
+                    written = 0
+                    while True:
+                        stopping = self._stop_flag
+                        self._drain(staging)
+                        if start_time is None and all(c.first_time is not None for c in self._compensators):
+                            start_time = max(c.first_time for c in self._compensators)
+                            for c in self._compensators:
+                                c.start_at(start_time)
+                        if start_time is not None:
+                            ready = min(c.available_output() for c in self._compensators)
+                            while ready >= self._block_frames or (stopping and ready > 0):
+                                frames = min(ready, self._block_frames)
+                                when = start_time + written / self._samplerate
+                                tracks = [c.pull(frames, when) for c in self._compensators]
+                                mixed = np.clip(np.rint(np.hstack(tracks)), -32768, 32767).astype(np.int16)
+                                out_file.write(mixed)
+                                written += frames
+                                ready -= frames
+                        if stopping:
+                            break
+                        time.sleep(poll_interval)
+                finally:
+                    for stream in self._streams:
+                        try:
+                            close_input_stream(stream)
+                        except:
+                            pass
+                    self._streams = []
+
+            stats = self.get_stats()
+            drift = ", ".join(f"{ppm:+.1f} ppm" for ppm in stats["drift_ppm"])
+            self.status.emit(f"Measured clock drift: {drift}")
+            if any(stats["overflow_frames"]):
+                self.status.emit("Input dropped while waiting for other devices: " + ", ".join(
+                    f"{frames / self._samplerate:.1f}s" for frames in stats["overflow_frames"]))
+            self.saved.emit(out_file.output_path)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def _drain(self, staging: np.ndarray):
+        for index, (ring, stamps, compensator) in enumerate(zip(self._rings, self._timestamps, self._compensators)):
+            while stamps:
+                adc_time, frame_index = stamps.popleft()
+                compensator.add_timestamp(adc_time, frame_index)
+            gaps = self._gaps[index]
+            while ring.available() or gaps:
+                if gaps and gaps[0][0] == self._drained[index]:
+                    _, frames = gaps.popleft()
+                    compensator.push(np.zeros((frames, self._channels), dtype=np.int16))
+                    continue
+                # Stop at the next gap so the silence lands where the block was dropped.
+                limit = gaps[0][0] - self._drained[index] if gaps else len(staging)
+                n = ring.read(staging[:min(limit, len(staging))])
+                if not n:
+                    break
+                compensator.push(staging[:n])
+                self._drained[index] += n
+
+
+def _simulate_device(ppm: float, start: float, seconds: float, nominal: int, tone: float, jitter: float, rng) -> list:
+    """Callbacks of a device whose clock runs ppm fast, capturing a tone defined on the shared clock."""
+    rate = nominal * (1 + ppm * 1e-6)
+    block = nominal // 100
+    callbacks = []
+    for i in range(int(seconds * rate / block)):
+        t = start + (i * block + np.arange(block)) / rate
+        samples = (np.sin(2 * np.pi * tone * t) * 10000)[:, None].astype(np.int16)
+        # Hosts report the ADC time with some scheduling jitter.
+        callbacks.append((start + i * block / rate + rng.normal(0, jitter), i * block, samples))
+    return callbacks
+
+
+def _tone_offset_ms(track: np.ndarray, first_time: float, nominal: int, tone: float) -> float:
+    """How far track lags an ideal tone that starts at first_time, from the phase of the tone."""
+    t = first_time + np.arange(len(track)) / nominal
+    # sin(w(t - lag)) correlated with exp(-iwt) has phase -pi/2 - w * lag.
+    phase = np.angle(np.sum(track * np.exp(-2j * np.pi * tone * t))) + np.pi / 2
+    phase = (phase + np.pi) % (2 * np.pi) - np.pi
+    return -phase / (2 * np.pi * tone) * 1000
+
+
+def _drift_check(drifts: list, seconds: float, nominal: int, tone: float, jitter: float) -> tuple:
+    """Run DriftCompensators over simulated devices; return measured ppm and per-track offsets in ms."""
+    rng = np.random.default_rng(0)
+    starts = [0.0, 0.123]
+    devices = [_simulate_device(ppm, start, seconds, nominal, tone, jitter, rng) for ppm, start in zip(drifts, starts)]
+    compensators = [DriftCompensator(nominal, 1) for _ in devices]
+    block = nominal // 10
+    tracks = [[] for _ in devices]
+    start_time = None
+    written = 0
+    for step in range(max(len(d) for d in devices)):
+        for device, compensator in zip(devices, compensators):
+            if step < len(device):
+                adc_time, frame_index, samples = device[step]
+                compensator.add_timestamp(adc_time, frame_index)
+                compensator.push(samples)
+        if start_time is None:
+            start_time = max(c.first_time for c in compensators)
+            for c in compensators:
+                c.start_at(start_time)
+        while min(c.available_output() for c in compensators) >= block:
+            when = start_time + written / nominal
+            for track, compensator in zip(tracks, compensators):
+                track.append(compensator.pull(block, when)[:, 0])
+            written += block
+    tail = nominal * 10
+    compensated = [_tone_offset_ms(np.concatenate(track)[-tail:], start_time + (written - tail) / nominal, nominal, tone)
+                   for track in tracks]
+    # Without compensation each device's samples are simply laid end to end at the nominal rate.
+    naive = []
+    for device, start in zip(devices, starts):
+        raw = np.concatenate([samples[:, 0] for _, _, samples in device]).astype(np.float32)
+        skip = int(round((start_time - start) * nominal))
+        length = min(written, len(raw) - skip)
+        naive.append(_tone_offset_ms(raw[skip + length - tail:skip + length], start_time + (length - tail) / nominal,
+                                     nominal, tone))
+    return [c.drift_ppm() for c in compensators], compensated, naive
+
+
+def _dropped_block_check() -> tuple:
+    """Overflow one device's ring; return (frames captured, frames the compensator received, gap contents)."""
+    worker = SynchronizedRecorderWorker([0], 16000, 1, "unused.wav", block_seconds=0.1, buffer_seconds=0.2)
+    callback = worker._make_callback(0)
+    ring = worker._rings[0]
+    block = 160
+    staging = np.empty((worker._block_frames, 1), dtype=np.int16)
+    ramp = np.arange(1, 10 * ring.capacity + 1, dtype=np.int16)[:, None]
+    time_info = SimpleNamespace(inputBufferAdcTime=0.0, currentTime=0.0)
+    captured = 0
+    for offset in range(0, len(ramp), block):
+        time_info.inputBufferAdcTime = 1.0 + offset / 16000
+        callback(ramp[offset:offset + block], block, time_info, None)
+        captured += block
+        # The drain thread stalls for a while in the middle of the recording.
+        if not 2 * ring.capacity <= offset < 4 * ring.capacity:
+            worker._drain(staging)
+    worker._drain(staging)
+    compensator = worker._compensators[0]
+    received = compensator._base + len(compensator._buffer)
+    # Frame i of the recording carries value i + 1, or 0 where it was dropped.
+    pushed = compensator._buffer[:, 0]
+    index = np.arange(compensator._base, received)
+    aligned = bool(np.all((pushed == 0) | (pushed == index + 1)))
+    return captured, received, ring.dropped_frames, aligned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check drift compensation with synthetic drifting devices")
+    parser.add_argument("--selftest", action="store_true", help="Run the drift and dropped-block checks")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the simulated recording")
+    parser.add_argument("--drift", type=float, nargs=2, default=[80.0, -37.0], help="Clock error of the two devices, ppm")
+    parser.add_argument("--jitter-ms", type=float, default=0.1, help="Standard deviation of the reported ADC times")
+    args = parser.parse_args()
+    if not args.selftest:
+        parser.print_help()
+        return
+
+    failed = False
+    nominal, tone = 48000, 50.0
+    measured, compensated, naive = _drift_check(args.drift, args.seconds, nominal, tone, args.jitter_ms / 1000)
+    for ppm, fit, aligned, raw in zip(args.drift, measured, compensated, naive):
+        print(f"[SyncRecorder] device at {ppm:+.1f} ppm: fit {fit:+.1f} ppm; offset over the last 10 s "
+              f"{aligned:+.3f} ms compensated, {raw:+.3f} ms uncompensated")
+        failed |= abs(fit - ppm) > 2.0 or abs(aligned) > 0.1
+    print(f"[SyncRecorder] tracks {abs(compensated[0] - compensated[1]):.3f} ms apart after {args.seconds:.0f} s "
+          f"(uncompensated {abs(naive[0] - naive[1]):.3f} ms)")
+
+    captured, received, dropped, aligned = _dropped_block_check()
+    print(f"[SyncRecorder] stalled drain: {captured} frames captured, {dropped} dropped by the ring, "
+          f"{received} on the compensator's timeline, later audio {'in place' if aligned else 'shifted'}")
+    failed |= received != captured or not dropped or not aligned
+    if failed:
+        print("[SyncRecorder] FAIL: drift fit off, tracks not aligned, or a dropped block shifted the timeline")
+        sys.exit(1)
+    print("[SyncRecorder] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,33 @@
 from datetime import datetime
 from PySide6.QtWidgets import QTextEdit
-from PySide6.QtGui import QTextCursor
+from PySide6.QtGui import QTextCursor, QTextCharFormat, QColor
 
+SPEAKER_COLORS = ("#1e40af", "#9f1239", "#047857", "#b45309", "#6d28d9", "#0e7490", "#be185d", "#4d7c0f")
 
-def append_timestamped_text(text_edit: QTextEdit, text: str, max_lines: int = None):
+
+def speaker_color(speaker: str):
+    """Stable colour for a diarized speaker label, or None without a speaker."""
+    if speaker is None:
+        return None
+    try:
+        index = int(speaker) - 1
+    except ValueError:
+        index = sum(map(ord, speaker))
+    return SPEAKER_COLORS[index % len(SPEAKER_COLORS)]
+
+
+def source_label(input_source: str, meta: dict = None) -> str:
+    """Label for an update, e.g. "host", or "host S2 es" with speaker/language tags."""
+    parts = [input_source]
+    if meta:
+        if meta.get("speaker"):
+            parts.append(f"S{meta['speaker']}")
+        if meta.get("language"):
+            parts.append(meta["language"])
+    return " ".join(parts)
+
+
+def append_timestamped_text(text_edit: QTextEdit, text: str, max_lines: int = None, color: str = None):
     """
     Append text to a QTextEdit component with a timestamp prefix.
     
@@ -11,6 +35,7 @@ def append_timestamped_text(text_edit: QTextEdit, text: str, max_lines: int = No
         text_edit: The QTextEdit component to append text to
         text: The text content to append
         max_lines: Maximum number of lines to keep (None = unlimited)
+        color: Optional text colour (e.g. from speaker_color)
     
     Format: [HH:MM] text
     Example: [07:15] Hello world
@@ -26,7 +51,11 @@ def append_timestamped_text(text_edit: QTextEdit, text: str, max_lines: int = No
     
     cursor = text_edit.textCursor()
     cursor.movePosition(cursor.MoveOperation.End)
-    cursor.insertText(formatted_text)
+    # Always pass a format, otherwise the text inherits the colour of the previous line.
+    char_format = QTextCharFormat()
+    if color:
+        char_format.setForeground(QColor(color))
+    cursor.insertText(formatted_text, char_format)
     text_edit.setTextCursor(cursor)
     text_edit.ensureCursorVisible()
     
@@ -0,0 +1,289 @@
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, Optional
+from google import genai
+from src.config import GEMINI_API_KEY, GEMINI_MODEL
+from src.gemini_scheduler import get_scheduler, GeminiScheduler, PRIORITY_BACKGROUND
+
+BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            "translation": {"type": "STRING"},
+        },
+        "required": ["id", "translation"],
+    },
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class GeminiBatchBackend:
+    """Translates a list of texts with one structured (JSON schema) Gemini request."""
+
+    def __init__(self, client=None, model: str = GEMINI_MODEL, scheduler=None):
+        self._client = client
+        self._model = model
+        self._scheduler = scheduler
+
+    def __call__(self, texts: list, target_language: str) -> list:
+        if self._client is None:
+            if not GEMINI_API_KEY:
+                raise RuntimeError("GEMINI_API_KEY not found in .env file")
+            self._client = genai.Client(api_key=GEMINI_API_KEY)
+
+        items = "\n".join(json.dumps({"id": i, "text": text}, ensure_ascii=False) for i, text in enumerate(texts))
+        prompt = f"""Translate each of the following items to {target_language}. Use natural {target_language} script.
+Return one object per item with the same id and the translation only.
+
+Items:
+{items}"""
+
+        response = (self._scheduler or get_scheduler()).run(
+            lambda: self._client.models.generate_content(
+                model=self._model,
+                contents=prompt,
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": BATCH_RESPONSE_SCHEMA,
+                },
+            ),
+            PRIORITY_BACKGROUND,
+            model=self._model,
+        )
+        if not response.text:
+            raise RuntimeError("Empty response received from Gemini")
+
+        by_id = {}
+        for item in json.loads(response.text):
+            by_id[int(item["id"])] = item["translation"]
+        return [by_id.get(i) for i in range(len(texts))]
+
+
+class _Job:
+    __slots__ = ("text", "target_language", "callback", "tokens")
+
+    def __init__(self, text: str, target_language: str, callback: Callable):
+        self.text = text
+        self.target_language = target_language
+        self.callback = callback
+        self.tokens = estimate_tokens(text)
+
+
+class TranslationBatcher:
+    """
+    Coalesces translation jobs into batched backend calls.
+
+    Jobs for the same target language are collected for up to
+    ``window_seconds`` after the first one arrives, or until the batch reaches
+    ``max_batch_tokens``/``max_batch_items``, then sent as one request. Each
+    job's callback receives ``(translation, error)`` on the flusher thread.
+    """
+
+    def __init__(self, backend: Optional[Callable] = None, window_seconds: float = 0.05,
+                 max_batch_tokens: int = 2000, max_batch_items: int = 50):
+        self._backend = backend or GeminiBatchBackend()
+        self._window_seconds = window_seconds
+        self._max_batch_tokens = max_batch_tokens
+        self._max_batch_items = max_batch_items
+        self._pending = {}
+        self._first_pending_at = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.jobs_submitted = 0
+        self.batches_sent = 0
+        self.jobs_failed = 0
+
+        self._thread = threading.Thread(target=self._flush_loop, name="TranslationBatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, target_language: str, callback: Callable):
+        """Queue one text for translation; callback(translation, error) is called when done."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TranslationBatcher is closed")
+            jobs = self._pending.setdefault(target_language, [])
+            if not jobs:
+                self._first_pending_at[target_language] = time.monotonic()
+            jobs.append(_Job(text, target_language, callback))
+            self.jobs_submitted += 1
+            self._cond.notify()
+
+    def translate_many(self, texts: list, target_language: str, timeout: Optional[float] = None) -> list:
+        """Blocking helper: translate texts and return results in order (None on failure)."""
+        results = [None] * len(texts)
+        remaining = [len(texts)]
+        done = threading.Event()
+        if not texts:
+            return results
+
+        def make_callback(index):
+            def callback(translation, error):
+                results[index] = translation
+                with self._cond:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        done.set()
+            return callback
+
+        for index, text in enumerate(texts):
+            self.submit(text, target_language, make_callback(index))
+        done.wait(timeout)
+        return results
+
+    def stats(self) -> dict:
+        """Return job/batch counters."""
+        with self._cond:
+            return {
+                "jobs_submitted": self.jobs_submitted,
+                "batches_sent": self.batches_sent,
+                "jobs_failed": self.jobs_failed,
+                "jobs_per_batch": self.jobs_submitted / self.batches_sent if self.batches_sent else 0.0,
+                "pending": sum(len(jobs) for jobs in self._pending.values()),
+            }
+
+    def close(self, timeout: float = 2.0):
+        """Flush whatever is pending and stop the flusher thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _take_ready_batch(self):
+        """Return (target_language, jobs) for the next batch that should go out, or None."""
+        now = time.monotonic()
+        for target_language, jobs in self._pending.items():
+            if not jobs:
+                continue
+            tokens = 0
+            count = 0
+            for job in jobs:
+                if count and (tokens + job.tokens > self._max_batch_tokens or count >= self._max_batch_items):
+                    break
+                tokens += job.tokens
+                count += 1
+            full = count < len(jobs) or tokens >= self._max_batch_tokens or count >= self._max_batch_items
+            expired = now - self._first_pending_at[target_language] >= self._window_seconds
+            if full or expired or self._closed:
+                batch = jobs[:count]
+                del jobs[:count]
+                if jobs:
+                    self._first_pending_at[target_language] = now
+                return target_language, batch
+        return None
+
+    def _next_deadline(self):
+        deadlines = [
+            self._first_pending_at[lang] + self._window_seconds
+            for lang, jobs in self._pending.items() if jobs
+        ]
+        return min(deadlines) if deadlines else None
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                ready = self._take_ready_batch()
+                while ready is None:
+                    if self._closed:
+                        return
+                    deadline = self._next_deadline()
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    self._cond.wait(timeout)
+                    ready = self._take_ready_batch()
+                self.batches_sent += 1
+            self._run_batch(*ready)
+
+    def _run_batch(self, target_language: str, jobs: list):
+        try:
+            translations = self._backend([job.text for job in jobs], target_language)
+            error = None
+        except Exception as e:
+            translations = []
+            error = f"Gemini batch error: {e}"
+        translations = list(translations) + [None] * (len(jobs) - len(translations))
+
+        for job, translation in zip(jobs, translations):
+            job_error = error
+            if translation is None and job_error is None:
+                job_error = "Missing item in batched Gemini response"
+            if job_error is not None:
+                with self._cond:
+                    self.jobs_failed += 1
+            try:
+                job.callback(translation, job_error)
+            except Exception as e:
+                print(f"[TranslationBatcher] Callback error: {e}")
+
+
+class _StubBatchModels:
+    """Stands in for ``client.models``: answers a batch prompt after a fixed latency plus a per-item cost."""
+
+    def __init__(self, latency: float, per_item: float):
+        self._latency = latency
+        self._per_item = per_item
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, model: str, contents: str, config=None):
+        items = [json.loads(line) for line in contents.splitlines() if line.startswith('{"id"')]
+        language = re.match(r"Translate each of the following items to (.+?)\.", contents).group(1)
+        with self._lock:
+            self.calls += 1
+        time.sleep(self._latency + self._per_item * len(items))
+        # Out of order on purpose: results must be matched back by id.
+        answer = [{"id": item["id"], "translation": f"{language}:{item['text']}"} for item in reversed(items)]
+        return SimpleNamespace(text=json.dumps(answer, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of batched vs one-per-text translation against a stub backend")
+    parser.add_argument("--bench", action="store_true", help="Run the benchmark")
+    parser.add_argument("--texts", type=int, default=100, help="Texts translated per run")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub round-trip time per request in seconds")
+    parser.add_argument("--per-item", type=float, default=0.005, help="Extra stub time per item in a request")
+    parser.add_argument("--concurrency", type=int, default=2, help="Scheduler concurrency cap, as GEMINI_MAX_CONCURRENCY")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    texts = [f"final number {i}: the quick brown fox jumps over the lazy dog" for i in range(args.texts)]
+    expected = [f"Japanese:{text}" for text in texts]
+    results = {}
+    for name in ("one per text", "batched"):
+        models = _StubBatchModels(args.latency, args.per_item)
+        # Rate limits off: this measures round trips, not the configured quota.
+        backend = GeminiBatchBackend(SimpleNamespace(models=models), scheduler=GeminiScheduler(max_concurrency=args.concurrency))
+        started = time.perf_counter()
+        if name == "batched":
+            batcher = TranslationBatcher(backend=backend)
+            translations = batcher.translate_many(texts, "Japanese", timeout=600)
+            batcher.close()
+        else:
+            with ThreadPoolExecutor(args.concurrency) as pool:
+                translations = [batch[0] for batch in pool.map(lambda text: backend([text], "Japanese"), texts)]
+        elapsed = time.perf_counter() - started
+        results[name] = elapsed
+        ok = translations == expected
+        print(f"[TranslationBatcher] {name}: {args.texts} texts in {elapsed:.2f}s with {models.calls} requests, "
+              f"{args.texts / elapsed:.1f} texts/s, results {'match' if ok else 'MISMATCH'}")
+        if not ok:
+            print("[TranslationBatcher] FAIL: batched results were not split back to their callers")
+            sys.exit(1)
+    print(f"[TranslationBatcher] OK: batching is {results['one per text'] / results['batched']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
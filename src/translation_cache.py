@@ -0,0 +1,191 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so repeated phrases map to the same key."""
+    return " ".join(text.split()).casefold()
+
+
+class TranslationCache:
+    """
+    Two-level cache for Gemini responses.
+
+    Lookups hit an in-memory LRU first and fall back to an SQLite store that
+    survives restarts. Entries expire after ``ttl_seconds`` and both levels are
+    trimmed to their configured size.
+    """
+
+    _EVICT_EVERY = 100
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 512,
+                 max_disk_entries: int = 10000, ttl_seconds: float = 7 * 24 * 3600):
+        self._path = path
+        self._max_memory_entries = max_memory_entries
+        self._max_disk_entries = max_disk_entries
+        self._ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._puts_since_evict = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            self._open_disk_store(path)
+
+    def _open_disk_store(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON entries(accessed)")
+            self._conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"[TranslationCache] Disk store unavailable, using memory only: {e}")
+            self._conn = None
+
+    @staticmethod
+    def make_key(text: str, target_language: str, model: str, prompt_version, context: str = "") -> str:
+        """
+        Build a cache key for a Gemini request.
+
+        Args:
+            text: Source text (normalized before hashing)
+            target_language: Target language name
+            model: Gemini model name
+            prompt_version: Version tag of the prompt template
+            context: Extra prompt input that changes the answer (e.g. auto-reply context)
+        """
+        parts = [
+            normalize_text(text),
+            target_language.casefold(),
+            model,
+            str(prompt_version),
+            normalize_text(context),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self._ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT value, created FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        value, created = row
+                        if now - created <= self._ttl_seconds:
+                            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+                            self._conn.commit()
+                            self._remember(key, value, created)
+                            self.disk_hits += 1
+                            return value
+                        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"[TranslationCache] Disk read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        """Store value under key in both cache levels."""
+        if not value:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= self._EVICT_EVERY:
+                    self._evict_disk(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[TranslationCache] Disk write failed: {e}")
+
+    def _remember(self, key: str, value: str, created: float):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        self._puts_since_evict = 0
+        self._conn.execute("DELETE FROM entries WHERE created < ?", (now - self._ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self._max_disk_entries,)
+        )
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current sizes."""
+        with self._lock:
+            disk_entries = 0
+            if self._conn is not None:
+                try:
+                    disk_entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM entries")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"[TranslationCache] Clear failed: {e}")
+
+    def close(self):
+        """Flush pending evictions and close the disk store."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._evict_disk(time.time())
+                    self._conn.commit()
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
@@ -1,17 +1,44 @@
 import sys
 import os
+from collections import deque
+try:
+    import psutil
+except ImportError:
+    psutil = None
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
                              QMessageBox, QFileDialog)
 from PySide6.QtCore import Qt, QEvent, QTimer
-from src.config import MAX_TRANSCRIPTION_LINES, MAX_GEMINI_LINES
-from src.text_formatter import append_timestamped_text
+from src.config import (
+    MAX_TRANSCRIPTION_LINES,
+    MAX_GEMINI_LINES,
+    RELAY_URL,
+    RELAY_REPLAY_PATH,
+    RELAY_DELTA_PARTIALS,
+    SINK_NDJSON_PATH,
+    SINK_UDP_ADDRESS,
+    SINK_UNIX_SOCKET_PATH,
+    AUDIO_ENGINE_PROCESS,
+    EXTRA_INPUT_SOURCES,
+    BATCH_TRANSLATION_RECENT_FINALS,
+    MEMORY_PROFILE,
+    MEMORY_PROFILE_INTERVAL_SECONDS,
+    MEMORY_PROFILE_TOP_N,
+    MEMORY_PROFILE_PATH,
+)
+from src.text_formatter import append_timestamped_text, source_label, speaker_color
+from src.audio_writer import codec_is_compressed
+from src.level_meter import connect_level_producers
 from src.controllers import (
     DeviceController,
     RecordingController,
     TranscriptionController,
     TranslationController
 )
+from src.audio_engine import AudioEngineClient
+from src.audio_sources import AudioSource, SourceRegistry
+from src.memory_profiler import MemoryProfiler, MemorySampler
 from src.websocket_client import WebSocketClient
+from src.sinks import SinkPipeline, RelaySink, NdjsonFileSink, UdpSink, UnixSocketSink
 from src.ui_components import (
     DeviceSettingsWidget,
     ModeSelectionWidget,
@@ -30,22 +57,60 @@ class MainWindow(QMainWindow):
         
         base_dir = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "recordings")
         
+        self.audio_engine = None
+        if AUDIO_ENGINE_PROCESS:
+            self.audio_engine = AudioEngineClient(base_dir)
+            self.audio_engine.start()
+        
         self.device_controller = DeviceController()
-        self.recording_controller = RecordingController(base_dir)
-        self.transcription_controller = TranscriptionController()
+        self.recording_controller = RecordingController(base_dir, engine=self.audio_engine)
+        self.transcription_controller = TranscriptionController(engine=self.audio_engine)
         self.translation_controller = TranslationController()
+        self._gemini_streaming = False
+        self._recent_finals = deque(maxlen=BATCH_TRANSLATION_RECENT_FINALS)
+        self._batch_labels = None
+        
+        self.websocket_client = WebSocketClient(
+            RELAY_URL,
+            replay_path=RELAY_REPLAY_PATH,
+            delta_partials=RELAY_DELTA_PARTIALS
+        )
+        self.sink_pipeline = self._build_sink_pipeline()
+        self.transcription_controller.set_sink_pipeline(self.sink_pipeline)
+        self.sink_pipeline.start()
         
-        self.websocket_client = WebSocketClient("ws://localhost:8765")
-        self.websocket_client.start()
-        
+        self._process = psutil.Process(os.getpid()) if psutil is not None else None
         self._memory_monitor_timer = QTimer()
         self._memory_monitor_timer.timeout.connect(self._update_memory_usage)
         self._memory_monitor_timer.start(5000)
         
+        self._memory_profiler = None
+        if MEMORY_PROFILE:
+            self._memory_profiler = MemoryProfiler(MEMORY_PROFILE_PATH, top_n=MEMORY_PROFILE_TOP_N)
+            self._memory_profiler.start()
+            self._memory_sampler = MemorySampler(self._memory_profiler)
+            self._memory_sampler.sampled.connect(self._on_memory_profile_sampled)
+            self._memory_profile_timer = QTimer()
+            self._memory_profile_timer.timeout.connect(self._memory_sampler.request_sample)
+            self._memory_profile_timer.start(int(MEMORY_PROFILE_INTERVAL_SECONDS * 1000))
+        
         self._init_ui()
         self._setup_controller_connections()
         self.device_controller.populate_devices()
 
+    def _build_sink_pipeline(self):
+        """Create the output pipeline: the relay always, other sinks when configured."""
+        pipeline = SinkPipeline()
+        pipeline.add_sink(RelaySink(self.websocket_client))
+        if SINK_NDJSON_PATH:
+            pipeline.add_sink(NdjsonFileSink(SINK_NDJSON_PATH))
+        if SINK_UDP_ADDRESS:
+            host, _, port = SINK_UDP_ADDRESS.rpartition(":")
+            pipeline.add_sink(UdpSink(host or "127.0.0.1", int(port)))
+        if SINK_UNIX_SOCKET_PATH:
+            pipeline.add_sink(UnixSocketSink(SINK_UNIX_SOCKET_PATH))
+        return pipeline
+
     def _init_ui(self):
         central = QWidget()
         self.setCentralWidget(central)
@@ -54,6 +119,9 @@ class MainWindow(QMainWindow):
         layout.setContentsMargins(16, 16, 16, 16)
 
         self.device_settings = DeviceSettingsWidget(self.recording_controller)
+        for entry in EXTRA_INPUT_SOURCES:
+            if entry.get("label"):
+                self.device_settings.add_source_meter(entry["label"])
         layout.addWidget(self.device_settings)
         
         self.mode_selection = ModeSelectionWidget()
@@ -80,6 +148,8 @@ class MainWindow(QMainWindow):
         self.speaker_combo = self.device_settings.get_speaker_combo()
         self.dest_edit = self.device_settings.get_dest_edit()
         self.auto_record_checkbox = self.device_settings.get_auto_record_checkbox()
+        self.codec_combo = self.device_settings.get_codec_combo()
+        self.compression_spin = self.device_settings.get_compression_spin()
         
         self.mode_group = self.mode_selection.get_mode_group()
         self.rb_transcribe = self.mode_selection.get_transcribe_radio()
@@ -93,6 +163,7 @@ class MainWindow(QMainWindow):
         
         self.gemini_lang_combo = self.translation_section.get_gemini_lang_combo()
         self.translation_input = self.translation_section.get_translation_input()
+        self.translate_recent_btn = self.translation_section.get_translate_recent_button()
         
         self.btn_start = self.control_buttons.get_start_button()
         self.record_btn = self.control_buttons.get_record_button()
@@ -102,8 +173,11 @@ class MainWindow(QMainWindow):
     
     def _setup_widget_connections(self):
         self.device_settings.get_browse_button().clicked.connect(self._choose_destination)
+        self.codec_combo.currentIndexChanged.connect(self._on_codec_changed)
+        self.compression_spin.valueChanged.connect(self._on_codec_changed)
         self.mode_group.buttonToggled.connect(self._on_mode_changed)
         self.translation_input.installEventFilter(self)
+        self.translate_recent_btn.clicked.connect(self._translate_recent_finals)
         self.btn_start.clicked.connect(self._toggle_start)
         self.record_btn.clicked.connect(self._toggle_recording)
     
@@ -122,6 +196,8 @@ class MainWindow(QMainWindow):
         """Connect controller signals to UI handlers."""
         self.device_controller.devices_populated.connect(self._on_devices_populated)
         self.device_controller.device_error.connect(self._on_device_error)
+        self.device_controller.devices_added.connect(self._on_devices_added)
+        self.device_controller.devices_removed.connect(self._on_devices_removed)
         
         self.recording_controller.status_changed.connect(self._update_status)
         self.recording_controller.error_occurred.connect(self._on_recording_error)
@@ -132,13 +208,20 @@ class MainWindow(QMainWindow):
         self.transcription_controller.error_occurred.connect(self._on_transcription_error)
         self.transcription_controller.transcription_update.connect(self._on_update_transcription)
         self.transcription_controller.translation_update.connect(self._on_translation_update)
+        self.transcription_controller.utterance_completed.connect(self._on_utterance_completed)
+        connect_level_producers(self.transcription_controller, self.recording_controller, self.device_settings.set_level)
         self.transcription_controller.session_started.connect(self._on_transcription_started)
         self.transcription_controller.session_stopped.connect(self._on_transcription_stopped)
         
+        if self.audio_engine is not None:
+            self.audio_engine.engine_crashed.connect(self._update_status)
+        
         self.translation_controller.status_changed.connect(self._update_status)
         self.translation_controller.error_occurred.connect(self._on_translation_error)
         self.translation_controller.translation_result.connect(self._on_translation_result)
-        self.translation_controller.translation_started.connect(lambda: self.gemini_text.setText("Translating..."))
+        self.translation_controller.translation_started.connect(self._on_translation_started)
+        self.translation_controller.translation_chunk.connect(self._on_translation_chunk)
+        self.translation_controller.batch_translation_result.connect(self._on_batch_translation_result)
         self.translation_controller.auto_reply_result.connect(self._on_auto_reply_result)
         
         self.gemini_lang_combo.currentTextChanged.connect(self._on_auto_reply_language_changed)
@@ -149,6 +232,11 @@ class MainWindow(QMainWindow):
             self.recording_controller.set_base_dir(folder)
             self.dest_edit.setText(folder)
 
+    def _on_codec_changed(self, *_):
+        codec = self.codec_combo.currentData()
+        self.compression_spin.setEnabled(codec_is_compressed(codec))
+        self.recording_controller.set_codec(codec, self.compression_spin.value())
+
     def _on_mode_changed(self, btn, checked):
         if checked:
             is_translation = (btn == self.rb_translate)
@@ -164,43 +252,71 @@ class MainWindow(QMainWindow):
         else:
             self._stop_session()
 
+    def _selected_speaker_device_id(self, host_device_id: int):
+        """Current PortAudio index of the speaker device, or None if unset or same as host."""
+        speaker_key = self.speaker_combo.currentData()
+        if speaker_key is None:
+            return None
+        speaker_device_id = self.device_controller.get_device_id(speaker_key)
+        # Only use speaker device if it's different from host
+        if speaker_device_id == host_device_id:
+            return None
+        return speaker_device_id
+
+    def _build_sources(self, host_key: str, mode: str = "transcription", target_lang: str = None):
+        """Host, optional speaker and the EXTRA_INPUT_SOURCES that are currently plugged in."""
+        host_device_id = self.device_controller.get_device_id(host_key)
+        registry = SourceRegistry.from_host_speaker(
+            host_device_id, self._selected_speaker_device_id(host_device_id), mode, target_lang
+        )
+        # Keys let the audio engine resolve the devices against its own PortAudio instance.
+        device_keys = {"host": host_key, "speaker": self.speaker_combo.currentData()}
+        for source in registry:
+            source.device_key = device_keys.get(source.label)
+        for entry in EXTRA_INPUT_SOURCES:
+            device = entry.get("device")
+            device_id = device if isinstance(device, int) else self.device_controller.get_device_id(device)
+            if device_id is None:
+                self._update_status(f"Input source {entry.get('label')} skipped: device {device!r} not available")
+                continue
+            try:
+                registry.add(AudioSource(
+                    entry["label"], device_id,
+                    mode=entry.get("mode", mode),
+                    target_lang=entry.get("target_lang", target_lang),
+                    device_key=None if isinstance(device, int) else device,
+                ))
+            except (KeyError, ValueError) as e:
+                self._update_status(f"Invalid input source {entry}: {e}")
+        return list(registry)
+
     def _start_session(self):
-        host_idx = self.device_combo.currentIndex()
-        if host_idx < 0:
+        host_key = self.device_combo.currentData()
+        if host_key is None:
             QMessageBox.warning(self, "No Device", "Please select a host input device.")
             self.btn_start.setChecked(False)
             return
 
-        device_ids = self.device_controller.get_device_ids()
-        if host_idx >= len(device_ids):
+        host_device_id = self.device_controller.get_device_id(host_key)
+        if host_device_id is None:
             QMessageBox.warning(self, "Invalid Device", "Selected host device is not available.")
             self.btn_start.setChecked(False)
             return
         
-        host_device_id = device_ids[host_idx]
-        
-        # Get speaker device ID (optional)
-        speaker_idx = self.speaker_combo.currentIndex()
-        speaker_device_id = None
-        if speaker_idx >= 0 and speaker_idx < len(device_ids):
-            speaker_device_id = device_ids[speaker_idx]
-            # Only use speaker device if it's different from host
-            if speaker_device_id == host_device_id:
-                speaker_device_id = None
-        
         mode = "translation" if self.rb_translate.isChecked() else "transcription"
         target_lang = self.lang_combo.currentData()
+        sources = self._build_sources(host_key, mode, target_lang)
 
         self.transcription_editor.clear()
-        self.transcription_controller.start_session(host_device_id, speaker_device_id, mode=mode, target_lang=target_lang)
+        self.transcription_controller.start_sources(sources)
         
         if self.auto_record_checkbox.isChecked():
-            dev_info = self.device_controller.get_device_info(host_device_id)
+            dev_info = self.device_controller.get_device_info(host_key)
             if dev_info:
                 samplerate = dev_info.get("default_samplerate") or 44100
                 channels = min(dev_info.get("max_input_channels", 1), 2)
                 channels = max(1, channels)
-                self.recording_controller.start_recording(host_device_id, samplerate, channels, speaker_device_id)
+                self.recording_controller.start_sources(sources, samplerate, channels)
                 self.record_btn.setText("Recording (auto)")
                 self.record_btn.setEnabled(False)
 
@@ -212,17 +328,16 @@ class MainWindow(QMainWindow):
         if self.auto_record_checkbox.isChecked() and self.recording_controller.is_recording():
             self.recording_controller.stop_recording()
 
-    def _on_update_transcription(self, text, is_final, input_source):
+    def _on_update_transcription(self, text, is_final, input_source, meta=None):
         print(f"[DEBUG] [{input_source}] _on_update_transcription called: is_final={is_final}, text='{text[:50] if text else ''}...', checkbox_checked={self.auto_reply_checkbox.isChecked()}")
         
-        # Always send as "transcription" type (original English text)
-        # Translation results are sent separately via _on_translation_update
-        self.websocket_client.send_transcription(text, is_final, additional_data={"input_source": input_source}, message_type="transcription")
-        
         if is_final:
-            # Prefix text with input source label
-            labeled_text = f"[{input_source.upper()}] {text}"
-            append_timestamped_text(self.transcription_editor, labeled_text, max_lines=MAX_TRANSCRIPTION_LINES)
+            # Prefix text with input source label (and speaker/language when diarized)
+            labeled_text = f"[{source_label(input_source, meta).upper()}] {text}"
+            append_timestamped_text(self.transcription_editor, labeled_text, max_lines=MAX_TRANSCRIPTION_LINES,
+                                    color=speaker_color((meta or {}).get("speaker")))
+            if text.strip():
+                self._recent_finals.append((source_label(input_source, meta).upper(), text))
             
             if self.auto_reply_checkbox.isChecked() and text.strip():
                 print(f"[DEBUG] [{input_source}] Scheduling auto-reply for: '{text}'")
@@ -233,7 +348,7 @@ class MainWindow(QMainWindow):
             else:
                 print(f"[DEBUG] [{input_source}] NOT scheduling auto-reply. Checkbox: {self.auto_reply_checkbox.isChecked()}, Text empty: {not text.strip()}")
         else:
-            self.status_label.setText(f"Live [{input_source}]: {text}" if text.strip() else "Listening...")
+            self.status_label.setText(f"Live [{source_label(input_source, meta)}]: {text}" if text.strip() else "Listening...")
             
             if self.auto_reply_checkbox.isChecked() and text.strip():
                 print(f"[DEBUG] [{input_source}] Canceling auto-reply (non-final text with content received)")
@@ -241,12 +356,16 @@ class MainWindow(QMainWindow):
             elif self.auto_reply_checkbox.isChecked() and not text.strip():
                 print(f"[DEBUG] [{input_source}] Ignoring empty non-final text, keeping auto-reply timer active")
     
+    def _on_utterance_completed(self, utterance):
+        """Reply as soon as an endpoint closes an utterance, without waiting for the fallback timer."""
+        if not self.auto_reply_checkbox.isChecked():
+            return
+        additional_context = self.translation_input.toPlainText().strip()
+        self.translation_controller.reply_to_utterance(utterance, additional_context)
+    
     def _on_translation_update(self, text: str, is_final: bool, input_source: str):
         """Handle translation updates from transcription controller (Indonesian translations)."""
         print(f"[DEBUG] [{input_source}] _on_translation_update called: is_final={is_final}, text='{text[:50] if text else ''}...'")
-        
-        # Send translation via WebSocket with input_source
-        self.websocket_client.send_transcription(text, is_final, additional_data={"input_source": input_source}, message_type="translation")
 
     def _on_transcription_started(self):
         """Handle transcription session started."""
@@ -258,6 +377,8 @@ class MainWindow(QMainWindow):
         self.btn_start.setChecked(False)
         self.btn_start.setText("Start Transcription" if self.rb_transcribe.isChecked() else "Start Translation")
         self.record_btn.setEnabled(True)
+        self.device_settings.reset_levels()
+        self.device_controller.request_rescan()
     
     def _on_transcription_error(self, msg: str):
         """Handle transcription errors."""
@@ -286,8 +407,46 @@ class MainWindow(QMainWindow):
         target_language = self.gemini_lang_combo.currentText()
         self.translation_controller.translate_text(text, target_language)
     
+    def _translate_recent_finals(self):
+        """Retranslate the latest finals with as few Gemini calls as possible."""
+        if not self._recent_finals:
+            QMessageBox.warning(self, "No Text", "There are no transcribed finals to translate yet.")
+            return
+        
+        finals = list(self._recent_finals)
+        self._batch_labels = [label for label, _ in finals]
+        self.translate_recent_btn.setEnabled(False)
+        self.gemini_text.setText(f"Translating {len(finals)} finals...")
+        self.translation_controller.translate_batch([text for _, text in finals], self.gemini_lang_combo.currentText())
+    
+    def _on_batch_translation_result(self, results: list):
+        """Show batched translations, one line per final."""
+        labels = self._batch_labels or [""] * len(results)
+        self._batch_labels = None
+        self.translate_recent_btn.setEnabled(True)
+        lines = [f"[{label}] {translation if translation is not None else '(translation failed)'}"
+                 for label, translation in zip(labels, results)]
+        self.gemini_text.setText("\n".join(lines))
+    
+    def _on_translation_started(self):
+        """Show a placeholder until the first streamed chunk arrives."""
+        self._gemini_streaming = False
+        self.gemini_text.setText("Translating...")
+    
+    def _on_translation_chunk(self, chunk: str):
+        """Append a streamed translation chunk to the suggestion panel."""
+        if not self._gemini_streaming:
+            self._gemini_streaming = True
+            self.gemini_text.clear()
+        cursor = self.gemini_text.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.insertText(chunk)
+        self.gemini_text.setTextCursor(cursor)
+        self.gemini_text.ensureCursorVisible()
+    
     def _on_translation_result(self, result: str):
         """Handle translation result."""
+        self._gemini_streaming = False
         self.gemini_text.setText(result)
     
     def _on_translation_error(self, msg: str):
@@ -308,19 +467,34 @@ class MainWindow(QMainWindow):
         """Update auto-reply target language when combo box changes."""
         self.translation_controller.set_auto_reply_language(language)
 
-    def _on_devices_populated(self, device_list: list, device_ids: list):
-        """Handle devices populated from controller."""
+    def _on_devices_populated(self, device_list: list, device_keys: list):
+        """Handle devices populated from controller, keeping the selection by device name."""
+        first_scan = self.device_combo.count() == 0
+        host_key = self.device_combo.currentData()
+        speaker_key = self.speaker_combo.currentData()
+        
         self.device_combo.clear()
         self.speaker_combo.clear()
-        for label in device_list:
-            self.device_combo.addItem(label)
-            self.speaker_combo.addItem(label)
-        
-        # Auto-select BlackHole for speaker device if available
-        for idx, label in enumerate(device_list):
-            if "blackhole" in label.lower():
-                self.speaker_combo.setCurrentIndex(idx)
-                break
+        for label, key in zip(device_list, device_keys):
+            self.device_combo.addItem(label, key)
+            self.speaker_combo.addItem(label, key)
+        
+        if host_key is not None and self.device_combo.findData(host_key) >= 0:
+            self.device_combo.setCurrentIndex(self.device_combo.findData(host_key))
+        if speaker_key is not None and self.speaker_combo.findData(speaker_key) >= 0:
+            self.speaker_combo.setCurrentIndex(self.speaker_combo.findData(speaker_key))
+        elif first_scan:
+            # Auto-select BlackHole for speaker device if available
+            for idx, label in enumerate(device_list):
+                if "blackhole" in label.lower():
+                    self.speaker_combo.setCurrentIndex(idx)
+                    break
+    
+    def _on_devices_added(self, device_keys: list):
+        self.status_label.setText(f"Audio device connected: {', '.join(device_keys)}")
+    
+    def _on_devices_removed(self, device_keys: list):
+        self.status_label.setText(f"Audio device disconnected: {', '.join(device_keys)}")
     
     def _on_device_error(self, msg: str):
         """Handle device errors."""
@@ -338,35 +512,25 @@ class MainWindow(QMainWindow):
             self.record_btn.setChecked(False)
             return
 
-        host_idx = self.device_combo.currentIndex()
-        device_ids = self.device_controller.get_device_ids()
+        host_key = self.device_combo.currentData()
         
-        if host_idx < 0 or host_idx >= len(device_ids):
+        if host_key is None:
             QMessageBox.warning(self, "No Device Selected", "Please select a host input device.")
             self.record_btn.setChecked(False)
             return
 
-        host_device_id = device_ids[host_idx]
-        dev_info = self.device_controller.get_device_info(host_device_id)
+        dev_info = self.device_controller.get_device_info(host_key)
         
         if not dev_info:
             self.record_btn.setChecked(False)
             return
-        
-        # Get speaker device ID (optional)
-        speaker_idx = self.speaker_combo.currentIndex()
-        speaker_device_id = None
-        if speaker_idx >= 0 and speaker_idx < len(device_ids):
-            speaker_device_id = device_ids[speaker_idx]
-            # Only use speaker device if it's different from host
-            if speaker_device_id == host_device_id:
-                speaker_device_id = None
+        sources = self._build_sources(host_key)
         
         samplerate = dev_info.get("default_samplerate") or 44100
         channels = min(dev_info.get("max_input_channels", 1), 2)
         channels = max(1, channels)
 
-        success = self.recording_controller.start_recording(host_device_id, samplerate, channels, speaker_device_id)
+        success = self.recording_controller.start_sources(sources, samplerate, channels)
         if not success:
             self.record_btn.setChecked(False)
 
@@ -386,6 +550,9 @@ class MainWindow(QMainWindow):
         if not self.auto_record_checkbox.isChecked():
             self.btn_start.setEnabled(True)
         self.record_btn.setEnabled(True)
+        if not self.transcription_controller.is_transcribing():
+            self.device_settings.reset_levels()
+        self.device_controller.request_rescan()
     
     def _on_recording_error(self, msg: str):
         """Handle recording errors."""
@@ -394,29 +561,34 @@ class MainWindow(QMainWindow):
     def _update_memory_usage(self):
         """Update memory usage indicator."""
         try:
-            import psutil
-            process = psutil.Process(os.getpid())
-            mem_info = process.memory_info()
-            mem_mb = mem_info.rss / 1024 / 1024
-            
             trans_lines = self.transcription_editor.document().blockCount()
-            gemini_lines = self.gemini_text.document().blockCount()
-            
+            if self._process is None:
+                self.memory_label.setText(f"Lines: {trans_lines}/{MAX_TRANSCRIPTION_LINES}")
+                return
+            mem_mb = self._process.memory_info().rss / 1024 / 1024
             self.memory_label.setText(f"Memory: {mem_mb:.1f} MB | Lines: {trans_lines}/{MAX_TRANSCRIPTION_LINES}")
-        except ImportError:
-            trans_lines = self.transcription_editor.document().blockCount()
-            self.memory_label.setText(f"Lines: {trans_lines}/{MAX_TRANSCRIPTION_LINES}")
         except Exception:
             pass
     
+    def _on_memory_profile_sampled(self, report):
+        """Log growth per subsystem from a tracemalloc sample taken on the sampler thread."""
+        print(f"[MemoryProfiler] {self._memory_profiler.summary(report)}")
+    
     def closeEvent(self, event):
         """Clean up resources on window close."""
         try:
             self._memory_monitor_timer.stop()
+            if self._memory_profiler is not None:
+                self._memory_profile_timer.stop()
+                self._memory_sampler.wait()
+                self._memory_profiler.stop()
+            self.device_controller.cleanup()
             self.recording_controller.cleanup()
             self.transcription_controller.cleanup()
             self.translation_controller.cleanup()
-            self.websocket_client.stop()
+            self.sink_pipeline.stop()
+            if self.audio_engine is not None:
+                self.audio_engine.shutdown()
         except Exception:
             pass
         return super().closeEvent(event)
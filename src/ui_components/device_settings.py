@@ -1,5 +1,9 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QComboBox, QPushButton, QLineEdit, QCheckBox)
+                             QLabel, QComboBox, QPushButton, QLineEdit, QCheckBox,
+                             QDoubleSpinBox, QProgressBar)
+from src.audio_writer import RECORDING_CODECS, codec_is_compressed
+
+METER_FLOOR_DB = -60
 
 
 class DeviceSettingsWidget(QWidget):
@@ -20,6 +24,8 @@ class DeviceSettingsWidget(QWidget):
         self.device_combo = QComboBox()
         self.device_combo.setMinimumWidth(180)
         user_layout.addWidget(self.device_combo)
+        self.host_meter = self._create_meter()
+        user_layout.addWidget(self.host_meter)
         dev_layout.addLayout(user_layout, 1)
         
         speaker_layout = QVBoxLayout()
@@ -27,10 +33,17 @@ class DeviceSettingsWidget(QWidget):
         self.speaker_combo = QComboBox()
         self.speaker_combo.setMinimumWidth(180)
         speaker_layout.addWidget(self.speaker_combo)
+        self.speaker_meter = self._create_meter()
+        speaker_layout.addWidget(self.speaker_meter)
         dev_layout.addLayout(speaker_layout, 1)
         
         layout.addLayout(dev_layout)
         
+        self._meters = {"host": self.host_meter, "speaker": self.speaker_meter}
+        self.extra_meters_layout = QVBoxLayout()
+        self.extra_meters_layout.setSpacing(4)
+        layout.addLayout(self.extra_meters_layout)
+        
         dest_row = QHBoxLayout()
         dest_label = QLabel("Destination Folder:")
         self.dest_edit = QLineEdit(self.recording_controller.get_base_dir())
@@ -41,10 +54,62 @@ class DeviceSettingsWidget(QWidget):
         dest_row.addWidget(self.browse_btn)
         layout.addLayout(dest_row)
         
-        self.auto_record_checkbox = QCheckBox("Auto-record to WAV when transcribing/translating")
+        codec, compression_level = self.recording_controller.get_codec()
+        format_row = QHBoxLayout()
+        format_row.addWidget(QLabel("Recording Format:"))
+        self.codec_combo = QComboBox()
+        for key, spec in RECORDING_CODECS.items():
+            self.codec_combo.addItem(spec["label"], key)
+        self.codec_combo.setCurrentIndex(self.codec_combo.findData(codec))
+        format_row.addWidget(self.codec_combo, 1)
+        format_row.addWidget(QLabel("Compression:"))
+        self.compression_spin = QDoubleSpinBox()
+        self.compression_spin.setRange(0.0, 1.0)
+        self.compression_spin.setSingleStep(0.1)
+        self.compression_spin.setValue(compression_level)
+        self.compression_spin.setEnabled(codec_is_compressed(codec))
+        format_row.addWidget(self.compression_spin)
+        layout.addLayout(format_row)
+        
+        self.auto_record_checkbox = QCheckBox("Auto-record when transcribing/translating")
         self.auto_record_checkbox.setChecked(False)
         layout.addWidget(self.auto_record_checkbox)
     
+    def _create_meter(self):
+        meter = QProgressBar()
+        meter.setRange(METER_FLOOR_DB, 0)
+        meter.setValue(METER_FLOOR_DB)
+        meter.setTextVisible(False)
+        meter.setFixedHeight(6)
+        meter.setToolTip("No signal")
+        return meter
+    
+    def add_source_meter(self, label: str):
+        """Add a labelled meter row for an extra input source."""
+        if label in self._meters:
+            return
+        row = QHBoxLayout()
+        name = QLabel(f"{label}:")
+        name.setMinimumWidth(80)
+        row.addWidget(name)
+        meter = self._create_meter()
+        row.addWidget(meter, 1)
+        self.extra_meters_layout.addLayout(row)
+        self._meters[label] = meter
+    
+    def set_level(self, input_source: str, rms_db: float, peak_db: float):
+        """Show the RMS level of a source; the peak goes into the tooltip."""
+        meter = self._meters.get(input_source)
+        if meter is None:
+            return
+        meter.setValue(int(max(METER_FLOOR_DB, min(0, rms_db))))
+        meter.setToolTip(f"RMS {rms_db:.1f} dBFS, peak {peak_db:.1f} dBFS")
+    
+    def reset_levels(self):
+        for meter in self._meters.values():
+            meter.setValue(METER_FLOOR_DB)
+            meter.setToolTip("No signal")
+    
     def get_device_combo(self):
         return self.device_combo
     
@@ -59,3 +124,9 @@ class DeviceSettingsWidget(QWidget):
     
     def get_auto_record_checkbox(self):
         return self.auto_record_checkbox
+    
+    def get_codec_combo(self):
+        return self.codec_combo
+    
+    def get_compression_spin(self):
+        return self.compression_spin
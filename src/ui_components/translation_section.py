@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QComboBox, QTextEdit)
+                             QLabel, QComboBox, QTextEdit, QPushButton)
 
 
 class TranslationSectionWidget(QWidget):
@@ -24,6 +24,9 @@ class TranslationSectionWidget(QWidget):
         gemini_lang_row.addWidget(gemini_lang_label)
         gemini_lang_row.addWidget(self.gemini_lang_combo)
         gemini_lang_row.addStretch()
+        self.translate_recent_btn = QPushButton("Translate recent finals")
+        self.translate_recent_btn.setToolTip("Translate the latest transcript finals in batched Gemini requests")
+        gemini_lang_row.addWidget(self.translate_recent_btn)
         layout.addLayout(gemini_lang_row)
         
         input_label = QLabel("Text to Translate (Press Ctrl+Enter to submit):")
@@ -39,3 +42,6 @@ class TranslationSectionWidget(QWidget):
     
     def get_translation_input(self):
         return self.translation_input
+    
+    def get_translate_recent_button(self):
+        return self.translate_recent_btn
@@ -0,0 +1,132 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+END_TOKEN = "<end>"
+
+
+@dataclass
+class Utterance:
+    """A complete utterance closed by a Soniox endpoint token."""
+    text: str
+    input_source: str
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+    closed_at: float = field(default_factory=time.time)
+    speaker: Optional[str] = None
+    language: Optional[str] = None
+
+
+def token_meta(token: dict) -> dict:
+    """Speaker/language of a token (present with diarization / language identification)."""
+    meta = {}
+    if token.get("speaker") is not None:
+        meta["speaker"] = str(token["speaker"])
+    if token.get("language"):
+        meta["language"] = token["language"]
+    return meta
+
+
+def speaker_runs(tokens: list) -> list:
+    """
+    Join tokens into (text, meta) runs, starting a new run whenever the speaker changes.
+
+    Tokens without a speaker (e.g. ``<end>``, rendered as a newline) stay with
+    the current run; a run's speaker and language are those of its first
+    token that has them. Without diarization this yields a single run.
+    """
+    runs = []
+    for token in tokens:
+        text = token.get("text", "")
+        if text == END_TOKEN:
+            text = "\n"
+        meta = token_meta(token)
+        current = runs[-1][1] if runs else None
+        if current is not None and meta.get("speaker") in (None, current.get("speaker", meta.get("speaker"))):
+            runs[-1][0].append(text)
+            for key, value in meta.items():
+                current.setdefault(key, value)
+        else:
+            runs.append(([text], meta))
+    return [("".join(parts), meta) for parts, meta in runs]
+
+
+class UtteranceSegmenter:
+    """
+    Builds utterances from final transcription tokens.
+
+    Final tokens are buffered per input source until an ``<end>`` endpoint
+    token arrives, at which point the buffered text is returned as one
+    :class:`Utterance`. With speaker diarization a change of speaker also
+    closes the utterance, so each one has a single speaker; its language is
+    the one covering most of its text. Translation tokens are ignored.
+    """
+
+    def __init__(self):
+        self._parts = {}
+        self._start_ms = {}
+        self._end_ms = {}
+        self._speaker = {}
+        self._languages = {}
+
+    def add_tokens(self, tokens: list, input_source: str) -> list:
+        """
+        Feed final tokens from one response and return the utterances they close.
+
+        Args:
+            tokens: Soniox token dicts, in arrival order
+            input_source: Source label the tokens belong to (e.g. "host")
+        """
+        closed = []
+        parts = self._parts.setdefault(input_source, [])
+        for token in tokens:
+            if not token.get("is_final") or token.get("translation_status") == "translation":
+                continue
+
+            text = token.get("text", "")
+            if text == END_TOKEN:
+                utterance = self._close(input_source)
+                if utterance is not None:
+                    closed.append(utterance)
+                parts = self._parts.setdefault(input_source, [])
+                continue
+
+            speaker = token.get("speaker")
+            if speaker is not None:
+                speaker = str(speaker)
+                if parts and self._speaker.get(input_source) not in (None, speaker):
+                    utterance = self._close(input_source)
+                    if utterance is not None:
+                        closed.append(utterance)
+                    parts = self._parts.setdefault(input_source, [])
+
+            if not parts and not text.strip():
+                continue
+            parts.append(text)
+            if speaker is not None:
+                self._speaker[input_source] = speaker
+            if token.get("language"):
+                languages = self._languages.setdefault(input_source, {})
+                languages[token["language"]] = languages.get(token["language"], 0) + len(text)
+            if token.get("start_ms") is not None and input_source not in self._start_ms:
+                self._start_ms[input_source] = token["start_ms"]
+            if token.get("end_ms") is not None:
+                self._end_ms[input_source] = token["end_ms"]
+        return closed
+
+    def flush(self, input_source: str) -> Optional[Utterance]:
+        """Close and return whatever is buffered for a source (e.g. on session stop)."""
+        return self._close(input_source)
+
+    def _close(self, input_source: str) -> Optional[Utterance]:
+        parts = self._parts.pop(input_source, [])
+        start_ms = self._start_ms.pop(input_source, None)
+        end_ms = self._end_ms.pop(input_source, None)
+        speaker = self._speaker.pop(input_source, None)
+        languages = self._languages.pop(input_source, None)
+        text = "".join(parts).strip()
+        if not text:
+            return None
+        language = max(languages, key=languages.get) if languages else None
+        return Utterance(text=text, input_source=input_source, start_ms=start_ms, end_ms=end_ms,
+                         speaker=speaker, language=language)
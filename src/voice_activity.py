@@ -0,0 +1,200 @@
+import argparse
+import sys
+import time
+from collections import deque
+import numpy as np
+from src.config import SONIOX_KEEPALIVE_SECONDS, VAD_HANGOVER_MS, VAD_PREROLL_MS
+
+
+class VoiceActivityDetector:
+    """
+    Energy + zero-crossing voice activity gate for 16-bit mono PCM blocks.
+
+    Each block is split into ``frame_ms`` frames and scored in one vectorized
+    pass. A frame counts as speech when its energy is ``snr_db`` above the
+    tracked noise floor (and above ``min_energy_db``), or, for unvoiced sounds
+    such as fricatives, when it is somewhat quieter but has a high zero-crossing
+    rate. After speech the gate stays open for ``hangover_ms`` so the server
+    still sees the silence it needs for endpoint detection. While closed, the
+    last ``preroll_ms`` of audio is kept and sent ahead of the block that
+    reopens the gate, so word onsets are not clipped.
+
+    Note that gated audio never reaches the server, so server-side token
+    timestamps count only the audio that was sent.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, snr_db: float = 10.0,
+                 min_energy_db: float = -55.0, unvoiced_margin_db: float = 6.0, unvoiced_zcr: float = 0.25,
+                 hangover_ms: int = 1000, preroll_ms: int = 300):
+        self._frame = max(1, sample_rate * frame_ms // 1000)
+        self._sample_rate = sample_rate
+        self._snr_db = snr_db
+        self._min_energy_db = min_energy_db
+        self._unvoiced_margin_db = unvoiced_margin_db
+        self._unvoiced_zcr = unvoiced_zcr
+        self._hangover_samples = sample_rate * hangover_ms // 1000
+        self._preroll_samples = sample_rate * preroll_ms // 1000
+        self._noise_floor_db = None
+        self._since_speech = self._hangover_samples
+        self._preroll = deque()
+        self._preroll_len = 0
+
+        self.samples_total = 0
+        self.samples_sent = 0
+        self.blocks = 0
+        self.cpu_seconds = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._since_speech < self._hangover_samples
+
+    def _speech_frames(self, samples: np.ndarray) -> np.ndarray:
+        usable = len(samples) - len(samples) % self._frame
+        if usable == 0:
+            return np.zeros(0, dtype=bool)
+        frames = samples[:usable].reshape(-1, self._frame).astype(np.float32) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self._frame
+
+        if self._noise_floor_db is None:
+            self._noise_floor_db = float(np.min(energy_db))
+        threshold = max(self._noise_floor_db + self._snr_db, self._min_energy_db)
+        speech = (energy_db > threshold) | (
+            (energy_db > threshold - self._unvoiced_margin_db) & (zcr > self._unvoiced_zcr)
+        )
+
+        # Track the noise floor: follow quiet frames quickly, creep up slowly otherwise.
+        quiet = energy_db[~speech]
+        if quiet.size:
+            self._noise_floor_db += 0.2 * (float(np.mean(quiet)) - self._noise_floor_db)
+        else:
+            self._noise_floor_db += 0.005 * len(speech)
+        return speech
+
+    def process(self, chunk: bytes):
+        """
+        Feed one block of PCM; return the bytes to send, or None to suppress it.
+
+        The returned bytes include any buffered pre-roll when speech resumes.
+        """
+        started = time.perf_counter()
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        speech = self._speech_frames(samples)
+        self.blocks += 1
+        self.samples_total += len(samples)
+
+        was_active = self.active
+        if speech.any():
+            last = len(speech) - 1 - int(np.argmax(speech[::-1]))
+            self._since_speech = len(samples) - (last + 1) * self._frame
+        else:
+            self._since_speech += len(samples)
+
+        if self.active or was_active:
+            out = chunk
+            if not was_active and self._preroll:
+                out = b"".join(self._preroll) + chunk
+                self._preroll.clear()
+                self._preroll_len = 0
+            self.samples_sent += len(out) // 2
+        else:
+            self._preroll.append(chunk)
+            self._preroll_len += len(samples)
+            while self._preroll and self._preroll_len - len(self._preroll[0]) // 2 >= self._preroll_samples:
+                self._preroll_len -= len(self._preroll.popleft()) // 2
+            out = None
+        self.cpu_seconds += time.perf_counter() - started
+        return out
+
+    def stats(self) -> dict:
+        """Return the fraction of audio suppressed and the average CPU time per block."""
+        sent = min(self.samples_sent, self.samples_total)
+        return {
+            "suppressed_fraction": 1 - sent / self.samples_total if self.samples_total else 0.0,
+            "seconds_total": self.samples_total / self._sample_rate,
+            "seconds_sent": sent / self._sample_rate,
+            "blocks": self.blocks,
+            "cpu_us_per_block": self.cpu_seconds / self.blocks * 1e6 if self.blocks else 0.0,
+        }
+
+
+def _synthetic_meeting(minutes: float, sample_rate: int, rng) -> tuple:
+    """
+    Alternating talk spurts and pauses over room noise; returns (int16 samples, speech mask).
+
+    Talk spurts are voiced syllables with fricative bursts; the room noise
+    floor rises by 10 dB halfway through, as when a fan switches on.
+    """
+    total = int(minutes * 60 * sample_rate)
+    noise_db = np.where(np.arange(total) < total // 2, -60.0, -50.0)
+    audio = rng.standard_normal(total) * 10 ** (noise_db / 20)
+    speech = np.zeros(total, dtype=bool)
+    position = int(rng.uniform(1, 3) * sample_rate)
+    while position < total:
+        length = min(int(rng.uniform(1, 8) * sample_rate), total - position)
+        t = np.arange(length) / sample_rate
+        pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * 0.5 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 10))
+        syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t), 0.05, None)
+        level = 10 ** (rng.uniform(-30, -18) / 20)
+        spurt = level * voiced * syllables
+        # A few fricatives: short high-frequency noise bursts in between syllables.
+        for _ in range(int(length / sample_rate)):
+            start = int(rng.uniform(0, max(1, length - sample_rate // 10)))
+            burst = min(sample_rate // 10, length - start)
+            spurt[start:start + burst] += np.diff(rng.standard_normal(burst + 1)) * level * 0.3
+        audio[position:position + length] += spurt
+        speech[position:position + length] = True
+        position += length + int(rng.uniform(0.5, 20) * sample_rate)
+    return np.clip(audio * 32767, -32768, 32767).astype(np.int16), speech
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how much audio the VAD suppresses and what it costs per block")
+    parser.add_argument("--bench", action="store_true", help="Run the VAD over a synthetic meeting")
+    parser.add_argument("--minutes", type=float, default=10.0, help="Length of the synthetic meeting")
+    parser.add_argument("--block", type=int, default=1024, help="Samples per block (SonioxWorker uses 1024)")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    sample_rate = 16000
+    audio, speech = _synthetic_meeting(args.minutes, sample_rate, np.random.default_rng(0))
+    vad = VoiceActivityDetector(sample_rate, hangover_ms=VAD_HANGOVER_MS, preroll_ms=VAD_PREROLL_MS)
+    sent = np.zeros(len(audio), dtype=bool)
+    keepalives = 0
+    last_sent = 0
+    for end in range(args.block, len(audio) + 1, args.block):
+        out = vad.process(audio[end - args.block:end].tobytes())
+        if out is not None:
+            # Pre-roll goes out ahead of the block, so the bytes cover the samples just before it.
+            sent[end - len(out) // 2:end] = True
+            last_sent = end
+        elif (end - last_sent) / sample_rate >= SONIOX_KEEPALIVE_SECONDS:
+            keepalives += 1
+            last_sent = end
+
+    stats = vad.stats()
+    checked = slice(0, len(sent) // args.block * args.block)
+    speech, sent = speech[checked], sent[checked]
+    speech_kept = np.count_nonzero(sent & speech) / np.count_nonzero(speech)
+    silence_suppressed = np.count_nonzero(~sent & ~speech) / np.count_nonzero(~speech)
+    period_us = args.block / sample_rate * 1e6
+    print(f"[VAD] {stats['seconds_total']:.0f}s meeting, {np.mean(speech):.0%} speech, "
+          f"blocks of {args.block} samples ({period_us / 1000:.0f} ms)")
+    print(f"[VAD] suppressed {stats['suppressed_fraction']:.1%} of the audio "
+          f"({silence_suppressed:.1%} of the silence); speech sent {speech_kept:.2%}; "
+          f"{keepalives} keepalives ({keepalives / (stats['seconds_total'] / 60):.1f}/min)")
+    print(f"[VAD] CPU {stats['cpu_us_per_block']:.1f} us per block = "
+          f"{stats['cpu_us_per_block'] / period_us:.3%} of the block period")
+    if speech_kept < 0.99 or silence_suppressed < 0.5:
+        print("[VAD] FAIL: speech was clipped or too little silence was suppressed")
+        sys.exit(1)
+    print("[VAD] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,216 @@
+import argparse
 import asyncio
 import json
+import os
+import random
+import socket
+import sys
+import tempfile
 import threading
+import time
 from typing import Optional
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
+from src import relay_codec
+from src.replay_log import ReplayLog
+
+
+def _utf16_length(text: str) -> int:
+    """Length in UTF-16 code units, i.e. what JavaScript's String.length reports."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+class PartialDeltaEncoder:
+    """
+    Encodes partial updates as a delta against the previous partial of the same stream.
+
+    A delta message replaces ``text`` with ``prefix`` (number of UTF-16 code
+    units kept from the previous partial) and ``suffix`` (text appended after
+    them). Every partial carries a per-stream ``pseq``; a viewer that misses
+    one ignores deltas until the next ``keyframe``, which carries the full
+    text. Keyframes go out every ``keyframe_interval`` partials or
+    ``keyframe_seconds``, after each final and after :meth:`reset`.
+    """
+
+    def __init__(self, keyframe_interval: int = 20, keyframe_seconds: float = 2.0):
+        self._keyframe_interval = keyframe_interval
+        self._keyframe_seconds = keyframe_seconds
+        self._streams = {}
+        self.text_bytes_full = 0
+        self.text_bytes_sent = 0
+
+    def reset(self):
+        """Force keyframes on every stream, e.g. after a reconnect."""
+        for state in self._streams.values():
+            state["keyframe_due"] = True
+
+    def encode(self, message: dict) -> dict:
+        key = (message.get("input_source"), message.get("type"))
+        state = self._streams.get(key)
+
+        if message.get("is_final"):
+            if state is not None:
+                state["keyframe_due"] = True
+            return message
+
+        text = message.get("text", "")
+        now = time.monotonic()
+        if state is None:
+            state = {"pseq": 0, "text": "", "since_keyframe": 0, "keyframe_at": now, "keyframe_due": True}
+            self._streams[key] = state
+
+        state["pseq"] += 1
+        state["since_keyframe"] += 1
+        keyframe = (
+            state["keyframe_due"]
+            or state["since_keyframe"] >= self._keyframe_interval
+            or now - state["keyframe_at"] >= self._keyframe_seconds
+        )
+
+        full_bytes = len(text.encode("utf-8"))
+        self.text_bytes_full += full_bytes
+        if keyframe:
+            encoded = dict(message, pseq=state["pseq"], keyframe=True)
+            self.text_bytes_sent += full_bytes
+            state["since_keyframe"] = 0
+            state["keyframe_at"] = now
+            state["keyframe_due"] = False
+        else:
+            common = os.path.commonprefix([state["text"], text])
+            suffix = text[len(common):]
+            encoded = {k: v for k, v in message.items() if k not in ("text", "timestamp")}
+            encoded.update(pseq=state["pseq"], prefix=_utf16_length(common), suffix=suffix)
+            self.text_bytes_sent += len(suffix.encode("utf-8"))
+        state["text"] = text
+        return encoded
 
 
 class WebSocketClient:
-    def __init__(self, uri: str = "ws://localhost:8765"):
+    """
+    Relay client that forwards transcription updates to the broadcast server.
+
+    Updates are not sent one by one. ``send_transcription`` only queues them:
+    partials are coalesced so that only the latest one per
+    (input_source, message_type) survives, finals are always kept (up to
+    ``max_pending_finals``), and a flush task on the client loop sends what is
+    pending every ``flush_interval`` seconds, as a single ``batch`` frame when
+    there is more than one message.
+
+    Finals carry a ``session``/``seq`` pair and are kept in a :class:`ReplayLog`
+    until they have been written to the relay, including while disconnected.
+    After a reconnect everything not yet delivered goes out in one burst;
+    viewers drop sequence numbers they have already seen. Reconnects back off
+    exponentially with full jitter.
+
+    With ``delta_partials`` enabled, partials are sent through a
+    :class:`PartialDeltaEncoder` instead of carrying the full text.
+
+    On every connect the client announces the encodings it supports with a
+    ``hello`` message. Frames are JSON until the server answers with a
+    ``hello_ack`` selecting ``msgpack``; servers that ignore the hello keep
+    receiving JSON.
+    """
+
+    def __init__(self, uri: str = "ws://localhost:8765", flush_interval: float = 0.05, max_pending_finals: int = 1000,
+                 replay_path: Optional[str] = None, reconnect_delay_min: float = 0.5, reconnect_delay_max: float = 30.0,
+                 delta_partials: bool = False, prefer_msgpack: bool = True):
         self.uri = uri
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
         self.loop: Optional[asyncio.AbstractEventLoop] = None
         self.thread: Optional[threading.Thread] = None
         self.connected = False
-        self.reconnect_delay = 5
-        
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.reconnect_delay_min = reconnect_delay_min
+        self.reconnect_delay_max = reconnect_delay_max
+        self._reconnect_attempts = 0
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending_partials = {}
+        self._replay = ReplayLog(max_pending_finals, replay_path)
+        self._sent_seq = self._replay.acked_seq
+        self._delta = PartialDeltaEncoder() if delta_partials else None
+        self.prefer_msgpack = prefer_msgpack and relay_codec.MSGPACK_AVAILABLE
+        self.encoding = "json"
+
+        self._started_at = time.monotonic()
+        self._stats = {
+            "messages_queued": 0,
+            "partials_coalesced": 0,
+            "partials_dropped_offline": 0,
+            "finals_replayed": 0,
+            "reconnects": 0,
+            "messages_sent": 0,
+            "frames_sent": 0,
+            "bytes_sent": 0,
+            "send_seconds": 0.0,
+        }
+
     def start(self):
         if self.thread and self.thread.is_alive():
             print("[WebSocket] Client already running")
             return
-            
+
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
         self.thread.start()
         print(f"[WebSocket] Client started, connecting to {self.uri}")
-    
+
     def _run_loop(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        self._flush_lock = asyncio.Lock()
+        self.loop.create_task(self._flush_loop())
         self.loop.run_until_complete(self._connect_loop())
-    
+
     async def _connect_loop(self):
         while True:
             try:
                 await self._connect()
             except Exception as e:
                 print(f"[WebSocket] Connection error: {e}")
-            
+
             if not self.connected:
-                print(f"[WebSocket] Reconnecting in {self.reconnect_delay} seconds...")
-                await asyncio.sleep(self.reconnect_delay)
-    
+                delay = self._next_reconnect_delay()
+                print(f"[WebSocket] Reconnecting in {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
+
+    def _next_reconnect_delay(self) -> float:
+        """Exponential backoff with full jitter, reset after a successful connect."""
+        ceiling = min(self.reconnect_delay_max, self.reconnect_delay_min * 2 ** self._reconnect_attempts)
+        self._reconnect_attempts += 1
+        return random.uniform(self.reconnect_delay_min, max(self.reconnect_delay_min, ceiling))
+
     async def _connect(self):
         try:
             async with websockets.connect(self.uri) as websocket:
                 self.websocket = websocket
                 self.connected = True
+                if self._reconnect_attempts:
+                    with self._lock:
+                        self._stats["reconnects"] += 1
+                self._reconnect_attempts = 0
+                self.encoding = "json"
                 print(f"[WebSocket] Connected to {self.uri}")
-                
-                await websocket.wait_closed()
+
+                if self.prefer_msgpack:
+                    await websocket.send(json.dumps({
+                        "type": "hello",
+                        "encodings": relay_codec.supported_encodings()
+                    }))
+
+                # Catch the server up on finals produced while offline, in one burst.
+                self._sent_seq = self._replay.acked_seq
+                if self._delta is not None:
+                    self._delta.reset()
+                backlog = self._replay.pending_count()
+                if backlog:
+                    print(f"[WebSocket] Replaying {backlog} final(s) sent while offline")
+                    with self._lock:
+                        self._stats["finals_replayed"] += backlog
+                    await self._flush()
+
+                async for raw in websocket:
+                    self._handle_incoming(raw)
         except ConnectionClosed:
             print("[WebSocket] Connection closed")
         except Exception as e:
@@ -55,42 +218,265 @@ class WebSocketClient:
         finally:
             self.connected = False
             self.websocket = None
-    
+
+    def _handle_incoming(self, raw):
+        """Handle server-to-client frames; only the encoding handshake matters here."""
+        try:
+            message = relay_codec.decode(raw)
+        except Exception:
+            return
+        if message.get("type") == "hello_ack":
+            encoding = message.get("encoding", "json")
+            if encoding in relay_codec.supported_encodings():
+                self.encoding = encoding
+                print(f"[WebSocket] Server accepted {encoding} encoding")
+
     def send_transcription(self, text: str, is_final: bool, additional_data: dict = None, message_type: str = "transcription"):
-        if not self.connected or not self.loop:
-            print("[WebSocket] Not connected, skipping send")
+        """Queue a transcription/translation update for the next flush."""
+        if not is_final and not self.connected:
+            # Partials are obsolete by the time we reconnect.
+            with self._lock:
+                self._stats["partials_dropped_offline"] += 1
             return
-        
+
         message = {
             "type": message_type,
             "text": text,
             "is_final": is_final,
             "timestamp": None
         }
-        
+
         if additional_data:
             message.update(additional_data)
-        
-        asyncio.run_coroutine_threadsafe(
-            self._send_message(message),
-            self.loop
-        )
-    
-    async def _send_message(self, message: dict):
+
+        key = (message.get("input_source"), message_type)
+        with self._lock:
+            self._stats["messages_queued"] += 1
+            if is_final:
+                # The final supersedes any partial still waiting for the same stream.
+                if self._pending_partials.pop(key, None) is not None:
+                    self._stats["partials_coalesced"] += 1
+            else:
+                if key in self._pending_partials:
+                    self._stats["partials_coalesced"] += 1
+                self._pending_partials[key] = message
+        if is_final:
+            self._replay.append(message)
+
+    def _take_pending(self) -> list:
+        messages = self._replay.entries_after(self._sent_seq)
+        with self._lock:
+            messages.extend(self._pending_partials.values())
+            self._pending_partials.clear()
+        return messages
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.websocket and self.connected:
+                await self._flush()
+
+    async def _flush(self):
+        # _sent_seq only advances once the send completes, so a reconnect's catch-up
+        # burst and the flush loop must not take the same backlog concurrently.
+        async with self._flush_lock:
+            messages = self._take_pending()
+            if not messages:
+                return
+
+            last_seq = max((m["seq"] for m in messages if "seq" in m), default=None)
+            if self._delta is not None:
+                messages = [self._delta.encode(m) for m in messages]
+
+            if len(messages) == 1:
+                frame = messages[0]
+            else:
+                frame = {"type": "batch", "messages": messages}
+            if await self._send_message(frame, len(messages)) and last_seq is not None:
+                self._sent_seq = max(self._sent_seq, last_seq)
+                self._replay.ack(last_seq)
+
+    async def _send_message(self, message: dict, count: int = 1) -> bool:
         if self.websocket and self.connected:
             try:
-                await self.websocket.send(json.dumps(message))
-                print(f"[WebSocket] Sent: {message['type']} - is_final={message.get('is_final')}")
+                started = time.perf_counter()
+                payload = relay_codec.encode(message, self.encoding)
+                await self.websocket.send(payload)
+                if isinstance(payload, str):
+                    payload = payload.encode("utf-8")
+                with self._lock:
+                    self._stats["send_seconds"] += time.perf_counter() - started
+                    self._stats["frames_sent"] += 1
+                    self._stats["messages_sent"] += count
+                    self._stats["bytes_sent"] += len(payload)
+                return True
             except Exception as e:
                 print(f"[WebSocket] Send error: {e}")
                 self.connected = False
-    
+        return False
+
+    def get_stats(self) -> dict:
+        """Return queue/send counters and per-second rates since start."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._replay.pending_count() + len(self._pending_partials)
+        stats["finals_dropped"] = self._replay.dropped
+        stats["last_seq"] = self._replay.last_seq
+        stats["acked_seq"] = self._replay.acked_seq
+        if self._delta is not None:
+            full = self._delta.text_bytes_full
+            stats["partial_text_bytes_full"] = full
+            stats["partial_text_bytes_sent"] = self._delta.text_bytes_sent
+            stats["partial_text_savings"] = 1 - self._delta.text_bytes_sent / full if full else 0.0
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        stats["messages_per_sec"] = stats["messages_sent"] / elapsed
+        stats["frames_per_sec"] = stats["frames_sent"] / elapsed
+        stats["bytes_per_sec"] = stats["bytes_sent"] / elapsed
+        return stats
+
     def stop(self):
+        if self.loop and self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._flush(), self.loop).result(timeout=1)
+            except Exception:
+                pass
         if self.loop:
             self.loop.call_soon_threadsafe(self.loop.stop)
         if self.thread:
             self.thread.join(timeout=2)
+        self._replay.close()
         print("[WebSocket] Client stopped")
-    
+
     def is_connected(self) -> bool:
         return self.connected
+
+
+class _RestartingRelay:
+    """Local relay stand-in that can be stopped and restarted; records every final it receives."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.received = []
+        self._server = None
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+    async def _handle(self, websocket):
+        async for raw in websocket:
+            message = relay_codec.decode(raw)
+            for item in message.get("messages", [message]):
+                if item.get("is_final") and "seq" in item:
+                    self.received.append((item["session"], item["seq"]))
+
+    async def _start(self):
+        self._server = await websockets.serve(self._handle, "localhost", self.port)
+
+    async def _stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def start(self):
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(5)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(5)
+
+
+class _SlowSocket:
+    """Fake connection whose sends yield to the event loop, as a send to a busy relay does."""
+
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, payload):
+        await asyncio.sleep(0.05)
+        self.frames.append(relay_codec.decode(payload))
+
+
+async def _concurrent_flushes(client: "WebSocketClient", connection: _SlowSocket):
+    """A reconnect's catch-up flush racing the flush loop."""
+    client._flush_lock = asyncio.Lock()
+    client.websocket = connection
+    client.connected = True
+    await asyncio.gather(client._flush(), client._flush())
+
+
+def _wait_for(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check relay reconnect and replay against a local server that restarts")
+    parser.add_argument("--selftest", action="store_true", help="Run the restart check")
+    parser.add_argument("--finals", type=int, default=200, help="Finals produced while the relay is down, per outage")
+    parser.add_argument("--outages", type=int, default=3)
+    args = parser.parse_args()
+    if not args.selftest:
+        parser.print_help()
+        return
+
+    # 1. Two flushes at once must not both send the backlog.
+    client = WebSocketClient("ws://localhost:1")
+    for index in range(50):
+        client.send_transcription(f"offline final {index}", True, {"input_source": "host"})
+    slow = _SlowSocket()
+    asyncio.run(_concurrent_flushes(client, slow))
+    sent = [item["seq"] for frame in slow.frames for item in frame.get("messages", [frame])]
+    print(f"[WebSocket] concurrent flushes: {len(slow.frames)} frame(s), {len(sent)} finals for 50 queued")
+    if sorted(sent) != list(range(1, 51)):
+        print("[WebSocket] FAIL: concurrent flushes sent the backlog twice")
+        sys.exit(1)
+
+    # 2. A relay that restarts mid-session: every final arrives exactly once.
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    relay = _RestartingRelay(port)
+    relay.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        client = WebSocketClient(f"ws://localhost:{port}", replay_path=os.path.join(tmp, "replay.jsonl"),
+                                 reconnect_delay_min=0.1, reconnect_delay_max=0.5)
+        client.start()
+        _wait_for(client.is_connected, 5)
+        produced = 0
+
+        def produce(count: int):
+            nonlocal produced
+            for _ in range(count):
+                produced += 1
+                client.send_transcription(f"final {produced}", True, {"input_source": "host"})
+
+        produce(20)
+        for outage in range(args.outages):
+            relay.stop()
+            _wait_for(lambda: not client.is_connected(), 5)
+            produce(args.finals)
+            started = time.monotonic()
+            relay.start()
+            caught_up = _wait_for(lambda: len({seq for _, seq in relay.received}) >= produced, 10)
+            print(f"[WebSocket] outage {outage + 1}: {args.finals} offline finals delivered "
+                  f"{time.monotonic() - started:.2f}s after the relay came back" if caught_up
+                  else f"[WebSocket] outage {outage + 1}: backlog not delivered")
+            produce(20)
+        _wait_for(lambda: len({seq for _, seq in relay.received}) >= produced, 5)
+        stats = client.get_stats()
+        client.stop()
+
+    seqs = [seq for _, seq in relay.received]
+    duplicates = len(seqs) - len(set(seqs))
+    missing = sorted(set(range(1, produced + 1)) - set(seqs))
+    print(f"[WebSocket] {produced} finals, {len(seqs)} received, {duplicates} duplicate(s), {len(missing)} missing, "
+          f"{stats['reconnects']} reconnects, {stats['finals_replayed']} replayed")
+    if duplicates or missing or len({session for session, _ in relay.received}) != 1:
+        print("[WebSocket] FAIL: finals were lost or sent twice")
+        sys.exit(1)
+    print("[WebSocket] OK")
+
+
+if __name__ == "__main__":
+    main()
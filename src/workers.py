@@ -1,21 +1,46 @@
+import argparse
 import asyncio
 import json
 import queue
 import os
+import resource
+import socket
+import sys
+import threading
+import time
 from datetime import datetime
 import numpy as np
-import sounddevice as sd
-import soundfile as sf
 import websockets
 from PySide6.QtCore import QThread, Signal
-from src.config import SONIOX_API_KEY, WS_URL
+from src.config import (
+    SONIOX_API_KEY,
+    WS_URL,
+    VAD_ENABLED,
+    VAD_HANGOVER_MS,
+    VAD_PREROLL_MS,
+    SONIOX_KEEPALIVE_SECONDS,
+    SESSION_CAPTURE_DIR,
+    SONIOX_SPEAKER_DIARIZATION,
+    SONIOX_LANGUAGE_IDENTIFICATION,
+    SONIOX_LANGUAGE_HINTS,
+)
+from src.utterance_segmenter import UtteranceSegmenter, speaker_runs, token_meta
+from src.audio_writer import SegmentedAudioWriter, codec_samplerate
+from src.audio_ring_buffer import AudioRingBuffer
+from src.voice_activity import VoiceActivityDetector
+from src.level_meter import LevelMeter
+from src.device_registry import open_input_stream, close_input_stream
+from src.session_capture import SessionCaptureWriter
 
 
 class SonioxWorker(QThread):
     error = Signal(str, str)
     status = Signal(str, str)
-    transcription_update = Signal(str, bool, str)
-    translation_update = Signal(str, bool, str)
+    # text, is_final, input_source, meta ({"speaker", "language"} when known)
+    transcription_update = Signal(str, bool, str, object)
+    translation_update = Signal(str, bool, str, object)
+    utterance_completed = Signal(object)
+    level = Signal(float, float, str)
 
     def __init__(self, device_id: int, mode: str = "transcription", target_lang: str = "en", input_source: str = "host", parent=None):
         super().__init__(parent)
@@ -29,23 +54,55 @@ class SonioxWorker(QThread):
         self._audio_queue = queue.Queue(maxsize=32)
         self._queue_overflow_count = 0
         self._stream = None
+        self._segmenter = UtteranceSegmenter()
+        self._meter = LevelMeter()
+        self._vad = VoiceActivityDetector(
+            self._sample_rate, hangover_ms=VAD_HANGOVER_MS, preroll_ms=VAD_PREROLL_MS
+        ) if VAD_ENABLED else None
+        self.keepalives_sent = 0
+        self._capture = None
 
     def stop(self):
         self._stop_flag = True
 
+    def get_vad_stats(self) -> dict:
+        """Return VAD suppression/CPU statistics, or an empty dict when VAD is off."""
+        if self._vad is None:
+            return {}
+        stats = self._vad.stats()
+        stats["keepalives_sent"] = self.keepalives_sent
+        return stats
+
     def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.run_session())
+        finally:
+            loop.close()
+
+    async def run_session(self):
+        """Stream this source to Soniox on the running event loop until stopped."""
         if not SONIOX_API_KEY:
             self.error.emit("SONIOX_API_KEY missing", self._input_source)
             return
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        if SESSION_CAPTURE_DIR:
+            os.makedirs(SESSION_CAPTURE_DIR, exist_ok=True)
+            filename = f"session_{self._input_source}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.soniox"
+            self._capture = SessionCaptureWriter(
+                os.path.join(SESSION_CAPTURE_DIR, filename),
+                {"input_source": self._input_source, "mode": self._mode, "target_lang": self._target_lang}
+            )
+
         try:
-            loop.run_until_complete(self._stream_audio())
+            await self._stream_audio()
         except Exception as e:
             self.error.emit(f"Worker error: {e}", self._input_source)
         finally:
-            loop.close()
+            if self._capture is not None:
+                self._capture.close()
+                self._capture = None
 
     async def _stream_audio(self):
         async with websockets.connect(WS_URL) as ws:
@@ -59,6 +116,12 @@ class SonioxWorker(QThread):
                 "num_channels": self._channels,
                 "enable_endpoint_detection": True,
             }
+            if SONIOX_SPEAKER_DIARIZATION:
+                config["enable_speaker_diarization"] = True
+            if SONIOX_LANGUAGE_IDENTIFICATION:
+                config["enable_language_identification"] = True
+            if SONIOX_LANGUAGE_HINTS:
+                config["language_hints"] = SONIOX_LANGUAGE_HINTS
 
             if self._mode == "translation":
                 config["translation"] = {
@@ -67,11 +130,16 @@ class SonioxWorker(QThread):
                 }
 
             await ws.send(json.dumps(config))
+            if self._capture is not None:
+                self._capture.write_config(config)
             print(f"[DEBUG] Config sent: {json.dumps(config, indent=2)}")
 
             async def sender():
                 def audio_callback(indata, frames, time_info, status):
                     if not self._stop_flag:
+                        levels = self._meter.update(indata)
+                        if levels is not None:
+                            self.level.emit(levels[0], levels[1], self._input_source)
                         pcm16 = np.clip(indata[:, 0] * 32767, -32768, 32767).astype(np.int16).tobytes()
                         try:
                             self._audio_queue.put_nowait(pcm16)
@@ -86,7 +154,7 @@ class SonioxWorker(QThread):
                                         break
                                 self._queue_overflow_count = 0
 
-                self._stream = sd.InputStream(
+                self._stream = open_input_stream(
                     samplerate=self._sample_rate,
                     channels=self._channels,
                     dtype="float32",
@@ -95,19 +163,40 @@ class SonioxWorker(QThread):
                     device=self._device_id,
                 )
                 self._stream.start()
+                last_sent = time.monotonic()
                 try:
                     while not self._stop_flag:
                         try:
                             chunk = self._audio_queue.get_nowait()
-                            await ws.send(chunk)
                         except queue.Empty:
                             await asyncio.sleep(0.01)
+                            continue
+                        if self._vad is not None:
+                            chunk = self._vad.process(chunk)
+                        if chunk is not None:
+                            await ws.send(chunk)
+                            if self._capture is not None:
+                                self._capture.write_audio(chunk)
+                            last_sent = time.monotonic()
+                        elif time.monotonic() - last_sent >= SONIOX_KEEPALIVE_SECONDS:
+                            keepalive = json.dumps({"type": "keepalive"})
+                            await ws.send(keepalive)
+                            if self._capture is not None:
+                                self._capture.write_control(keepalive)
+                            self.keepalives_sent += 1
+                            last_sent = time.monotonic()
                     await ws.send("")
+                    if self._vad is not None:
+                        stats = self._vad.stats()
+                        print(
+                            f"[VAD] [{self._input_source}] Suppressed {stats['suppressed_fraction']:.0%} of "
+                            f"{stats['seconds_total']:.0f}s audio, {stats['cpu_us_per_block']:.0f} us/block, "
+                            f"{self.keepalives_sent} keepalives"
+                        )
                 finally:
                     if self._stream is not None:
                         try:
-                            self._stream.stop()
-                            self._stream.close()
+                            close_input_stream(self._stream)
                         except:
                             pass
                         self._stream = None
@@ -117,147 +206,200 @@ class SonioxWorker(QThread):
                     if self._stop_flag:
                         break
                     
+                    if self._capture is not None:
+                        self._capture.write_response(msg)
                     data = json.loads(msg)
-                    
-                    if data.get("error_code"):
-                        self.error.emit(f"{data['error_code']}: {data.get('error_message', '')}", self._input_source)
+                    if not self._handle_response(data):
                         break
 
-                    tokens = data.get("tokens", [])
-                    if not tokens:
-                        continue
-                    
-                    if self._mode == "translation":
-                        # In translation mode, emit both transcription and translation
-                        
-                        # Final transcription (English - original)
-                        final_transcription_tokens = [
-                            t for t in tokens 
-                            if t.get("is_final") and t.get("translation_status") != "translation"
-                        ]
-                        
-                        # Final translation (Indonesian - translated)
-                        final_translation_tokens = [
-                            t for t in tokens 
-                            if t.get("is_final") and t.get("translation_status") == "translation"
-                        ]
-                        
-                        # Partial tokens (English - for live display)
-                        partial_tokens = [
-                            t for t in tokens 
-                            if not t.get("is_final")
-                        ]
-                        
-                        # Emit final transcription (English)
-                        if final_transcription_tokens:
-                            text_parts = []
-                            for t in final_transcription_tokens:
-                                token_text = t.get("text", "")
-                                if token_text == "<end>":
-                                    text_parts.append("\n")
-                                else:
-                                    text_parts.append(token_text)
-                            final_transcription = "".join(text_parts)
-                            print(f"[DEBUG] [{self._input_source}] Final Transcription (English): {repr(final_transcription)}")
-                            self.transcription_update.emit(final_transcription, True, self._input_source)
-                        
-                        # Emit final translation (Indonesian)
-                        if final_translation_tokens:
-                            text_parts = []
-                            for t in final_translation_tokens:
-                                token_text = t.get("text", "")
-                                if token_text == "<end>":
-                                    text_parts.append("\n")
-                                else:
-                                    text_parts.append(token_text)
-                            final_translation = "".join(text_parts)
-                            print(f"[DEBUG] [{self._input_source}] Final Translation (Indonesian): {repr(final_translation)}")
-                            self.translation_update.emit(final_translation, True, self._input_source)
-                        
-                        # Emit partial text (English - for live display)
-                        part_text = "".join(t.get("text", "") for t in partial_tokens)
-                        if part_text.strip():
-                            self.transcription_update.emit(part_text, False, self._input_source)
-                        elif final_transcription_tokens or final_translation_tokens:
-                            self.transcription_update.emit("", False, self._input_source)
-                    
-                    else:
-                        # Transcription mode - original behavior
-                        final_tokens = [
-                            t for t in tokens 
-                            if t.get("is_final")
-                        ]
-
-                        partial_tokens = [
-                            t for t in tokens 
-                            if not t.get("is_final")
-                        ]
-
-                        if final_tokens:
-                            text_parts = []
-                            for t in final_tokens:
-                                token_text = t.get("text", "")
-                                if token_text == "<end>":
-                                    text_parts.append("\n")
-                                else:
-                                    text_parts.append(token_text)
-                            final_text = "".join(text_parts)
-                        else:
-                            final_text = ""
-                        
-                        part_text = "".join(t.get("text", "") for t in partial_tokens)
-
-                        if final_text:
-                            self.transcription_update.emit(final_text, True, self._input_source)
-                        
-                        if part_text.strip():
-                            self.transcription_update.emit(part_text, False, self._input_source)
-                        elif final_text:
-                            self.transcription_update.emit("", False, self._input_source)
-
             await asyncio.gather(sender(), receiver())
 
+    def _handle_response(self, data: dict) -> bool:
+        """
+        Turn one Soniox response into transcription/translation signals.
+
+        Returns False when the response is an error and the session should end.
+        """
+        if data.get("error_code"):
+            self.error.emit(f"{data['error_code']}: {data.get('error_message', '')}", self._input_source)
+            return False
+
+        tokens = data.get("tokens", [])
+        if not tokens:
+            return True
+        
+        if self._mode == "translation":
+            # In translation mode, emit both transcription and translation
+            
+            # Final transcription (English - original)
+            final_transcription_tokens = [
+                t for t in tokens 
+                if t.get("is_final") and t.get("translation_status") != "translation"
+            ]
+            
+            # Final translation (Indonesian - translated)
+            final_translation_tokens = [
+                t for t in tokens 
+                if t.get("is_final") and t.get("translation_status") == "translation"
+            ]
+            
+            # Partial tokens (English - for live display)
+            partial_tokens = [
+                t for t in tokens 
+                if not t.get("is_final")
+            ]
+            
+            # Emit final transcription (English), one update per speaker turn
+            for final_transcription, meta in speaker_runs(final_transcription_tokens):
+                print(f"[DEBUG] [{self._input_source}] Final Transcription (English): {repr(final_transcription)} {meta or ''}")
+                self.transcription_update.emit(final_transcription, True, self._input_source, meta)
+            
+            # Emit final translation (Indonesian)
+            for final_translation, meta in speaker_runs(final_translation_tokens):
+                print(f"[DEBUG] [{self._input_source}] Final Translation (Indonesian): {repr(final_translation)} {meta or ''}")
+                self.translation_update.emit(final_translation, True, self._input_source, meta)
+            
+            # Emit partial text (English - for live display)
+            part_text = "".join(t.get("text", "") for t in partial_tokens)
+            if part_text.strip():
+                self.transcription_update.emit(part_text, False, self._input_source, token_meta(partial_tokens[-1]))
+            elif final_transcription_tokens or final_translation_tokens:
+                self.transcription_update.emit("", False, self._input_source, {})
+        
+        else:
+            # Transcription mode - original behavior
+            final_tokens = [
+                t for t in tokens 
+                if t.get("is_final")
+            ]
+
+            partial_tokens = [
+                t for t in tokens 
+                if not t.get("is_final")
+            ]
+
+            final_runs = [(text, meta) for text, meta in speaker_runs(final_tokens) if text]
+            part_text = "".join(t.get("text", "") for t in partial_tokens)
+
+            for final_text, meta in final_runs:
+                self.transcription_update.emit(final_text, True, self._input_source, meta)
+            
+            if part_text.strip():
+                self.transcription_update.emit(part_text, False, self._input_source, token_meta(partial_tokens[-1]))
+            elif final_runs:
+                self.transcription_update.emit("", False, self._input_source, {})
+
+        for utterance in self._segmenter.add_tokens(tokens, self._input_source):
+            self.utterance_completed.emit(utterance)
+        return True
+
+
+class SonioxSessionPool(QThread):
+    """
+    Runs the Soniox sessions of several SonioxWorkers on one thread and event loop.
+
+    The workers are used as session objects and never started themselves;
+    their signals still reach the GUI through queued connections. With N
+    sources this costs one thread instead of N, plus the PortAudio callback
+    thread each InputStream brings.
+    """
+
+    def __init__(self, workers: list, parent=None):
+        super().__init__(parent)
+        self.workers = list(workers)
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        async def run_all():
+            await asyncio.gather(*(worker.run_session() for worker in self.workers), return_exceptions=True)
+
+        try:
+            loop.run_until_complete(run_all())
+        finally:
+            loop.close()
+
 
 class RecorderWorker(QThread):
     error = Signal(str)
     status = Signal(str)
     saved = Signal(str)
+    segment_closed = Signal(str)
+    level = Signal(float, float)
 
-    def __init__(self, device_id: int, samplerate: float, channels: int, filepath: str, parent=None):
+    def __init__(self, device_id: int, samplerate: float, channels: int, filepath: str,
+                 codec: str = "wav", compression_level: float = None,
+                 segment_seconds: float = None, segment_bytes: int = None, header_flush_seconds: float = 5.0,
+                 block_seconds: float = 1.0, buffer_seconds: float = 5.0, parent=None):
         super().__init__(parent)
         self._device_id = device_id
-        self._samplerate = int(samplerate)
+        self._samplerate = codec_samplerate(codec, samplerate)
         self._channels = channels
         self._filepath = filepath
+        self._codec = codec
+        self._compression_level = compression_level
+        self._segment_seconds = segment_seconds
+        self._segment_bytes = segment_bytes
+        self._header_flush_seconds = header_flush_seconds
         self._stop_flag = False
-        self._q: "queue.Queue[np.ndarray]" = queue.Queue(maxsize=64)
+        self._block_frames = max(1, int(self._samplerate * block_seconds))
+        self._ring = AudioRingBuffer(int(self._samplerate * max(buffer_seconds, 2 * block_seconds)), channels)
         self._stream = None
+        self._meter = LevelMeter()
+        self.blocks_written = 0
 
     def stop(self):
         self._stop_flag = True
 
+    def get_stats(self) -> dict:
+        """Return ring fill, dropped frames/blocks and the number of file writes."""
+        return {
+            "buffered_frames": self._ring.available(),
+            "dropped_frames": self._ring.dropped_frames,
+            "dropped_blocks": self._ring.dropped_blocks,
+            "blocks_written": self.blocks_written,
+        }
+
     def run(self):
         try:
             self.status.emit("Opening audio stream...")
 
-            with sf.SoundFile(
+            # Encoding (FLAC/Opus) happens in this thread; the audio callback
+            # only copies into the preallocated ring.
+            staging = np.empty((self._block_frames, self._channels), dtype=np.int16)
+            poll_interval = self._block_frames / self._samplerate / 4
+            with SegmentedAudioWriter(
                 self._filepath,
-                mode="w",
-                samplerate=self._samplerate,
-                channels=self._channels,
-                subtype="PCM_16",
-                format="WAV",
+                self._samplerate,
+                self._channels,
+                codec=self._codec,
+                compression_level=self._compression_level,
+                segment_seconds=self._segment_seconds,
+                segment_bytes=self._segment_bytes,
+                header_flush_seconds=self._header_flush_seconds,
+                on_segment_closed=self.segment_closed.emit,
             ) as wav_file:
 
                 def callback(indata, frames, time_info, status):
                     if status:
                         self.status.emit(f"Audio status: {status}")
-                    try:
-                        self._q.put_nowait(indata.copy())
-                    except queue.Full:
-                        pass
+                    self._ring.write(indata)
+                    levels = self._meter.update(indata)
+                    if levels is not None:
+                        self.level.emit(*levels)
 
-                self._stream = sd.InputStream(
+                def flush(minimum: int):
+                    while self._ring.available() >= minimum:
+                        n = self._ring.read(staging)
+                        wav_file.write(staging[:n])
+                        self.blocks_written += 1
+
+                self._stream = open_input_stream(
                     samplerate=self._samplerate,
                     channels=self._channels,
                     device=self._device_id,
@@ -267,25 +409,189 @@ class RecorderWorker(QThread):
                 self._stream.start()
                 try:
                     self.status.emit("Recording...")
-                    while not self._stop_flag or not self._q.empty():
-                        try:
-                            data = self._q.get(timeout=0.2)
-                            wav_file.write(data)
-                        except queue.Empty:
-                            if self._stop_flag:
-                                break
-                            continue
+                    while not self._stop_flag:
+                        flush(self._block_frames)
+                        time.sleep(poll_interval)
                 finally:
                     if self._stream is not None:
                         try:
-                            self._stream.stop()
-                            self._stream.close()
+                            close_input_stream(self._stream)
                         except:
                             pass
                         self._stream = None
+                flush(1)
+
+            if self._ring.dropped_frames:
+                self.status.emit(
+                    f"Dropped {self._ring.dropped_frames} frames "
+                    f"({self._ring.dropped_frames / self._samplerate:.2f}s) in {self._ring.dropped_blocks} blocks"
+                )
 
-            self.saved.emit(self._filepath)
+            self.saved.emit(wav_file.output_path)
         except Exception as e:
             self.error.emit(str(e))
 
 
+class _SyntheticStream:
+    """Stand-in for sd.InputStream: a thread delivering real-time blocks, as PortAudio's callback thread does."""
+
+    def __init__(self, samplerate, channels, dtype, callback, blocksize, device=None):
+        self._samplerate = samplerate
+        self._blocksize = blocksize
+        self._callback = callback
+        self._stop_event = threading.Event()
+        # Two seconds of a tone, one second of room noise: the VAD passes the tone only.
+        t = np.arange(3 * samplerate) / samplerate
+        signal = np.where(t < 2, 0.1 * np.sin(2 * np.pi * 220 * t), 0.0)
+        signal += np.random.default_rng(device).standard_normal(len(t)) * 0.001
+        self._signal = signal.astype(np.float32)[:, None].repeat(channels, axis=1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        position = 0
+        deadline = time.perf_counter()
+        while not self._stop_event.is_set():
+            start = position % (len(self._signal) - self._blocksize)
+            self._callback(self._signal[start:start + self._blocksize], self._blocksize, None, None)
+            position += self._blocksize
+            deadline += self._blocksize / self._samplerate
+            self._stop_event.wait(max(0.0, deadline - time.perf_counter()))
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(1)
+
+    def close(self):
+        pass
+
+
+class _MockSoniox:
+    """Local Soniox stand-in: counts audio per session and answers with a partial every block, a final every 8th."""
+
+    def __init__(self):
+        self.audio_bytes = []
+        with socket.socket() as probe:
+            probe.bind(("localhost", 0))
+            self.url = f"ws://localhost:{probe.getsockname()[1]}"
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result(5)
+
+    async def _serve(self):
+        await websockets.serve(self._handle, "localhost", int(self.url.rsplit(":", 1)[1]))
+
+    async def _handle(self, ws):
+        session = len(self.audio_bytes)
+        self.audio_bytes.append(0)
+        await ws.recv()  # config
+        blocks = 0
+        async for frame in ws:
+            if frame == "":
+                await ws.send(json.dumps({"tokens": [], "finished": True}))
+                return
+            if isinstance(frame, str):
+                continue  # keepalive
+            self.audio_bytes[session] += len(frame)
+            blocks += 1
+            token = {"text": f" word{blocks}", "is_final": blocks % 8 == 0, "start_ms": blocks * 64,
+                     "end_ms": blocks * 64 + 60}
+            await ws.send(json.dumps({"tokens": [token]}))
+
+
+def _process_usage() -> tuple:
+    """(resident MB, OS threads) of this process; falls back to peak RSS and Python threads off Linux."""
+    try:
+        with open("/proc/self/status") as fh:
+            fields = dict(line.split(":", 1) for line in fh)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["Threads"])
+    except (OSError, KeyError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, threading.active_count()
+
+
+def _run_sources(count: int, pooled: bool, seconds: float, server: _MockSoniox) -> dict:
+    from PySide6.QtCore import QCoreApplication
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    first_session = len(server.audio_bytes)
+    updates = [0]
+    workers = []
+    for index in range(count):
+        worker = SonioxWorker(index, input_source=f"mic{index + 1}")
+        worker.transcription_update.connect(lambda *args: updates.__setitem__(0, updates[0] + 1))
+        workers.append(worker)
+    rss_before, threads_before = _process_usage()
+    runners = [SonioxSessionPool(workers)] if pooled else workers
+    for runner in runners:
+        runner.start()
+
+    def wait(duration: float):
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    wait(2.0)  # connect and settle before measuring
+    cpu_before, wall_before, updates_before = time.process_time(), time.perf_counter(), updates[0]
+    wait(seconds)
+    cpu = (time.process_time() - cpu_before) / (time.perf_counter() - wall_before)
+    rss, threads = _process_usage()
+    received = updates[0] - updates_before
+    for worker in workers:
+        worker.stop()
+    for runner in runners:
+        runner.wait(5000)
+    audio = server.audio_bytes[first_session:]
+    return {
+        "cpu_pct": cpu * 100,
+        "rss_mb": rss - rss_before,
+        "threads": threads - threads_before,
+        "updates_per_sec": received / seconds,
+        "sessions": len(audio),
+        "min_audio_sec": min(audio, default=0) / 2 / 16000,
+    }
+
+
+def main():
+    global WS_URL, SONIOX_API_KEY, open_input_stream, close_input_stream
+
+    parser = argparse.ArgumentParser(description="CPU, memory and threads vs number of sources against a local mock Soniox server")
+    parser.add_argument("--bench", action="store_true", help="Run the scaling benchmark")
+    parser.add_argument("--sources", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10.0, help="Measured time per configuration")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    server = _MockSoniox()
+    # Point the sessions at the mock server and the synthetic capture streams.
+    WS_URL, SONIOX_API_KEY = server.url, "bench"
+    open_input_stream = _SyntheticStream
+    close_input_stream = _SyntheticStream.stop
+    _run_sources(1, True, 1.0, server)  # warm-up: imports and one-time allocations
+    # Host name lookups run on the event loop's default executor, which grows up to this many threads.
+    executor_threads = min(32, (os.cpu_count() or 1) + 4)
+    failed = False
+    for pooled in (True, False):
+        for count in args.sources:
+            result = _run_sources(count, pooled, args.seconds, server)
+            print(f"[Bench] {'pool   ' if pooled else 'threads'} {count} source(s): CPU {result['cpu_pct']:5.1f}%, "
+                  f"RSS {result['rss_mb']:+6.1f} MB, threads {result['threads']:+3d}, "
+                  f"{result['updates_per_sec']:6.1f} updates/s, "
+                  f"{result['sessions']} sessions, least audio per session {result['min_audio_sec']:.1f}s")
+            # Every session must keep streaming; the pool adds one thread (and its executor)
+            # plus one capture thread per source.
+            failed |= result["sessions"] != count or result["min_audio_sec"] < args.seconds * 0.5
+            if pooled:
+                failed |= result["threads"] > count + 1 + executor_threads
+    if failed:
+        print("[Bench] FAIL: a session stopped streaming or the pool used more threads than expected")
+        sys.exit(1)
+    print("[Bench] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import { h } from 'https://esm.sh/preact@10.19.3';
 import { useEffect, useRef } from 'https://esm.sh/preact@10.19.3/hooks';
 import htm from 'https://esm.sh/htm@3.1.1';
+import { speakerColor } from '../utils.js';
 
 const html = htm.bind(h);
 
@@ -14,11 +15,15 @@ export const LiveTextDisplayer = ({ finalizedSentences, liveTextHost, liveTextSp
         }
     }, [finalizedSentences, liveTextHost, liveTextSpeaker]);
     
-    const getSourceBadge = (source) => {
+    const getSourceBadge = (source, speaker) => {
         if (!source) return null;
         const isHost = source.toLowerCase() === 'host';
         const badgeClass = isHost ? 'source-badge-host' : 'source-badge-speakers';
         const emoji = isHost ? '🎤' : '🔊';
+        const color = speakerColor(speaker);
+        if (color) {
+            return html`<span class="${badgeClass}" style=${{ color, borderColor: color }}>${emoji} ${source} · S${speaker}</span>`;
+        }
         return html`<span class="${badgeClass}">${emoji} ${source}</span>`;
     };
     
@@ -43,7 +48,7 @@ export const LiveTextDisplayer = ({ finalizedSentences, liveTextHost, liveTextSp
                 
                 return html`
                     <div class="live-text-line" style=${style} key=${sentenceObj.id}>
-                        ${getSourceBadge(sentenceObj.source)}
+                        ${getSourceBadge(sentenceObj.source, sentenceObj.speaker)}
                         ${correctionEnabled && correction ? html`
                             ${correction.status === 'good' ? html`
                                 <span class="correction-badge good">✓</span>
@@ -1,6 +1,7 @@
 import { h } from 'https://esm.sh/preact@10.19.3';
 import { useEffect, useRef } from 'https://esm.sh/preact@10.19.3/hooks';
 import htm from 'https://esm.sh/htm@3.1.1';
+import { speakerColor } from '../utils.js';
 
 const html = htm.bind(h);
 
@@ -25,11 +26,15 @@ export const LiveTranslationDisplayer = ({ finalizedTranslations, liveTranslatio
         }
     }, [finalizedTranslations, liveTranslationHost, liveTranslationSpeaker]);
     
-    const getSourceBadge = (source) => {
+    const getSourceBadge = (source, speaker) => {
         if (!source) return null;
         const isHost = source.toLowerCase() === 'host';
         const badgeClass = isHost ? 'source-badge-host' : 'source-badge-speakers';
         const emoji = isHost ? '🎤' : '🔊';
+        const color = speakerColor(speaker);
+        if (color) {
+            return html`<span class="${badgeClass}" style=${{ color, borderColor: color }}>${emoji} ${source} · S${speaker}</span>`;
+        }
         return html`<span class="${badgeClass}">${emoji} ${source}</span>`;
     };
     
@@ -65,7 +70,7 @@ export const LiveTranslationDisplayer = ({ finalizedTranslations, liveTranslatio
                 
                 return html`
                     <div class="live-text-line" style=${style} key=${translationObj.id}>
-                        ${getSourceBadge(translationObj.source)}
+                        ${getSourceBadge(translationObj.source, translationObj.speaker)}
                         <span class="finalized-text">${translationObj.text}</span>
                     </div>
                 `;
@@ -40,7 +40,7 @@ export const useTranscriptionHandlers = ({
     }, [wsManager]);
 
     /** Final transcription is handled by utilizing is_final: true */
-    const handleFinalTranscription = useCallback((text, timestamp, source) => {
+    const handleFinalTranscription = useCallback((text, timestamp, source, speaker) => {
         if (!text || text.trim().length === 0) return;
         
         const trimmedText = text.trim();
@@ -54,6 +54,7 @@ export const useTranscriptionHandlers = ({
                 const newSentence = {
                     text: trimmedText,
                     source: source,
+                    speaker: speaker,
                     timestamp: timestamp || new Date().toISOString(),
                     id: Date.now() + Math.random()
                 };
@@ -68,7 +69,8 @@ export const useTranscriptionHandlers = ({
                     const lastSentence = updatedPrev[updatedPrev.length - 1];
                     const lastChar = lastSentence.text.trim().slice(-1);
                     
-                    if (lastChar !== '.' && lastChar !== '?' && lastChar !== '!') {
+                    // Never merge across a speaker change (diarized sessions).
+                    if (lastSentence.speaker === speaker && lastChar !== '.' && lastChar !== '?' && lastChar !== '!') {
                         const mergedText = lastSentence.text + ' ' + sentencesToProcess[0];
                         updatedPrev[updatedPrev.length - 1] = {
                             ...lastSentence,
@@ -88,6 +90,7 @@ export const useTranscriptionHandlers = ({
                 const newSentences = sentencesToProcess.map((sentence, index) => ({
                     text: sentence,
                     source: source,
+                    speaker: speaker,
                     timestamp: timestamp || new Date().toISOString(),
                     id: Date.now() + Math.random() + index
                 }));
@@ -133,7 +136,7 @@ export const useTranscriptionHandlers = ({
         console.log('[DEBUG] Live text updated:', trimmedText, 'from', source);
     }, [setLiveTextHost, setLiveTextSpeaker]);
     
-    const handleFinalTranslation = useCallback((text, timestamp, source) => {
+    const handleFinalTranslation = useCallback((text, timestamp, source, speaker) => {
         if (!text || text.trim().length === 0) return;
         
         const trimmedText = text.trim();
@@ -144,6 +147,7 @@ export const useTranscriptionHandlers = ({
                 const newTranslation = {
                     text: trimmedText,
                     source: source,
+                    speaker: speaker,
                     timestamp: timestamp || new Date().toISOString(),
                     id: Date.now() + Math.random()
                 };
@@ -158,7 +162,7 @@ export const useTranscriptionHandlers = ({
                     const lastTranslation = updatedPrev[updatedPrev.length - 1];
                     const lastChar = lastTranslation.text.trim().slice(-1);
                     
-                    if (lastChar !== '.' && lastChar !== '?' && lastChar !== '!') {
+                    if (lastTranslation.speaker === speaker && lastChar !== '.' && lastChar !== '?' && lastChar !== '!') {
                         const mergedText = lastTranslation.text + ' ' + sentencesToProcess[0];
                         updatedPrev[updatedPrev.length - 1] = {
                             ...lastTranslation,
@@ -173,6 +177,7 @@ export const useTranscriptionHandlers = ({
                 const newTranslations = sentencesToProcess.map((sentence, index) => ({
                     text: sentence,
                     source: source,
+                    speaker: speaker,
                     timestamp: timestamp || new Date().toISOString(),
                     id: Date.now() + Math.random() + index
                 }));
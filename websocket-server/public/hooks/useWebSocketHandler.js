@@ -1,4 +1,4 @@
-import { useCallback } from 'https://esm.sh/preact@10.19.3/hooks';
+import { useCallback, useRef } from 'https://esm.sh/preact@10.19.3/hooks';
 
 export const useWebSocketHandler = ({
     handleFinalTranscription,
@@ -7,30 +7,84 @@ export const useWebSocketHandler = ({
     handleLiveTranslation,
     handleCorrectionResponse
 }) => {
+    /** Highest final seq seen per client session, so replayed finals are not shown twice */
+    const lastSeqBySession = useRef({});
+
+    const isDuplicateFinal = useCallback((data) => {
+        if (!data.is_final || data.seq === undefined || !data.session) return false;
+        const lastSeq = lastSeqBySession.current[data.session] || 0;
+        if (data.seq <= lastSeq) {
+            console.log(`[DEBUG] Skipping replayed final seq=${data.seq} from session ${data.session}`);
+            return true;
+        }
+        lastSeqBySession.current[data.session] = data.seq;
+        return false;
+    }, []);
+
+    /** Last reconstructed partial per stream (type + source), for delta-encoded partials */
+    const partialStreams = useRef({});
+
+    /** Returns the message with full text, or null while waiting for a keyframe */
+    const decodePartial = useCallback((data) => {
+        if (data.is_final || data.pseq === undefined) return data;
+
+        const key = `${data.type}:${data.input_source}`;
+        if (data.keyframe) {
+            partialStreams.current[key] = { pseq: data.pseq, text: data.text };
+            return data;
+        }
+
+        const state = partialStreams.current[key];
+        if (!state || state.pseq !== data.pseq - 1) {
+            console.log(`[DEBUG] Waiting for keyframe on ${key} (got pseq=${data.pseq})`);
+            delete partialStreams.current[key];
+            return null;
+        }
+
+        const text = state.text.slice(0, data.prefix) + data.suffix;
+        partialStreams.current[key] = { pseq: data.pseq, text };
+        return { ...data, text };
+    }, []);
+
     const processMessage = useCallback((data, type, finalHandler, liveHandler) => {
         console.log('[WebSocket]', data);
         const source = data.input_source || 'Unknown';
         const handler = data.is_final ? finalHandler : liveHandler;
         console.log(`[DEBUG] ${data.is_final ? 'Final' : 'Non-final'} ${type}:`, data.text, 'from', source);
         console.log(`[DEBUG] text:`, data.text);
-        handler(data.text, data.is_final ? data.timestamp : undefined, source);
+        handler(data.text, data.is_final ? data.timestamp : undefined, source, data.speaker);
     }, []);
 
     const handleMessage = useCallback((data) => {
+        if (data.type === 'batch') {
+            data.messages.forEach(handleMessage);
+            return;
+        }
+
         if (data.type === 'connection') {
             console.log('[WebSocket]', data.message);
             return;
         }
 
-        if (data.type === 'transcription') {
-            processMessage(data, data.type, handleFinalTranscription, handleLiveTranscription);
-        } else if (data.type === 'translation') {
-            processMessage(data, data.type, handleFinalTranslation, handleLiveTranslation);
+        if (isDuplicateFinal(data)) {
+            return;
+        }
+
+        if (data.type === 'transcription' || data.type === 'translation') {
+            const decoded = decodePartial(data);
+            if (!decoded) return;
+            if (decoded.type === 'transcription') {
+                processMessage(decoded, decoded.type, handleFinalTranscription, handleLiveTranscription);
+            } else {
+                processMessage(decoded, decoded.type, handleFinalTranslation, handleLiveTranslation);
+            }
         } else if (data.type === 'correction_response') {
             console.log('[WebSocket] Correction response:', data);
             handleCorrectionResponse(data);
         }
     }, [
+        isDuplicateFinal,
+        decodePartial,
         processMessage,
         handleFinalTranscription,
         handleLiveTranscription,
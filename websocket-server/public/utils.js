@@ -20,4 +20,16 @@ export function splitIntoSentences(text) {
         }
         return acc;
     }, []);
-}
\ No newline at end of file
+}
+
+const SPEAKER_COLORS = ['#1e40af', '#9f1239', '#047857', '#b45309', '#6d28d9', '#0e7490', '#be185d', '#4d7c0f'];
+
+/** Stable colour for a diarized speaker label; keep in sync with SPEAKER_COLORS in src/text_formatter.py */
+export function speakerColor(speaker) {
+    if (speaker === undefined || speaker === null) return null;
+    const number = parseInt(speaker, 10);
+    const index = Number.isNaN(number)
+        ? [...String(speaker)].reduce((sum, ch) => sum + ch.charCodeAt(0), 0)
+        : number - 1;
+    return SPEAKER_COLORS[((index % SPEAKER_COLORS.length) + SPEAKER_COLORS.length) % SPEAKER_COLORS.length];
+}
@@ -7,7 +7,9 @@ export class WebSocketManager {
     }
 
     connect() {
-        const wsUrl = `ws://${window.location.hostname}:${window.location.port || 8765}`;
+        // ?relay=ws://host:port points the viewer at a relay other than the page's own server
+        const relayOverride = new URLSearchParams(window.location.search).get('relay');
+        const wsUrl = relayOverride || `ws://${window.location.hostname}:${window.location.port || 8765}`;
         this.ws = new WebSocket(wsUrl);
 
         this.ws.onopen = () => {
@@ -4,6 +4,62 @@ const express = require('express');
 const path = require('path');
 const { correctSentence } = require('./gemini-correction');
 
+let msgpack = null;
+try {
+  msgpack = require('@msgpack/msgpack');
+} catch (error) {
+  console.log('[Server] @msgpack/msgpack not installed, relay clients will use JSON');
+}
+
+/** Integer keys of the binary relay schema; keep in sync with src/relay_codec.py */
+const RELAY_FIELDS = {
+  0: 'type',
+  1: 'text',
+  2: 'is_final',
+  3: 'input_source',
+  4: 'timestamp',
+  5: 'seq',
+  6: 'session',
+  7: 'pseq',
+  8: 'keyframe',
+  9: 'prefix',
+  10: 'suffix',
+  11: 'messages',
+  12: 'speaker',
+  13: 'language'
+};
+const RELAY_EXTRA_KEY = 15;
+const RELAY_TYPES = { 0: 'transcription', 1: 'translation', 2: 'batch' };
+
+const unpackRelayFields = (packed) => {
+  const message = {};
+  Object.entries(packed).forEach(([key, value]) => {
+    if (Number(key) === RELAY_EXTRA_KEY) {
+      Object.assign(message, value);
+      return;
+    }
+    const name = RELAY_FIELDS[key] || key;
+    if (name === 'type') {
+      message.type = RELAY_TYPES[value] !== undefined ? RELAY_TYPES[value] : value;
+    } else if (name === 'messages') {
+      message.messages = value.map(unpackRelayFields);
+    } else {
+      message[name] = value;
+    }
+  });
+  return message;
+};
+
+const decodeFrame = (data, isBinary) => {
+  if (isBinary) {
+    if (!msgpack) {
+      throw new Error('Binary frame received but msgpack is not available');
+    }
+    return unpackRelayFields(msgpack.decode(data));
+  }
+  return JSON.parse(data.toString());
+};
+
 const app = express();
 const server = http.createServer(app);
 const wss = new WebSocket.Server({ server });
@@ -13,6 +69,35 @@ const WEB_PORT = process.env.WEB_PORT || 3000;
 
 const clients = new Set();
 
+const relayStats = {
+  messagesIn: 0,
+  framesIn: 0,
+  framesOut: 0,
+  lastReportAt: Date.now(),
+  lastCpu: process.cpuUsage()
+};
+
+const STATS_INTERVAL_MS = 10000;
+
+setInterval(() => {
+  const now = Date.now();
+  const seconds = (now - relayStats.lastReportAt) / 1000;
+  const cpu = process.cpuUsage(relayStats.lastCpu);
+  const cpuPercent = ((cpu.user + cpu.system) / 1000 / (now - relayStats.lastReportAt)) * 100;
+  if (relayStats.framesIn > 0) {
+    console.log(
+      `[Stats] ${(relayStats.messagesIn / seconds).toFixed(1)} msg/s in ` +
+      `(${(relayStats.framesIn / seconds).toFixed(1)} frames/s), ` +
+      `${(relayStats.framesOut / seconds).toFixed(1)} frames/s out, CPU ${cpuPercent.toFixed(1)}%`
+    );
+  }
+  relayStats.messagesIn = 0;
+  relayStats.framesIn = 0;
+  relayStats.framesOut = 0;
+  relayStats.lastReportAt = now;
+  relayStats.lastCpu = process.cpuUsage();
+}, STATS_INTERVAL_MS);
+
 app.use(express.static(path.join(__dirname, 'public')));
 
 app.get('/', (req, res) => {
@@ -32,10 +117,22 @@ wss.on('connection', (ws, req) => {
     timestamp: new Date().toISOString()
   }));
   
-  ws.on('message', async (data) => {
+  ws.on('message', async (data, isBinary) => {
     try {
-      const message = JSON.parse(data.toString());
-      console.log(`[WebSocket] Received: ${message.type} - is_final=${message.is_final} {${message.text}}`);
+      const message = decodeFrame(data, isBinary);
+      relayStats.framesIn++;
+      
+      if (message.type === 'hello') {
+        const encodings = message.encodings || [];
+        const encoding = msgpack && encodings.includes('msgpack') ? 'msgpack' : 'json';
+        ws.send(JSON.stringify({ type: 'hello_ack', encoding }));
+        console.log(`[WebSocket] Relay client negotiated ${encoding} encoding`);
+        return;
+      }
+      
+      if (message.type !== 'batch') {
+        console.log(`[WebSocket] Received: ${message.type} - is_final=${message.is_final} {${message.text}}`);
+      }
       
       if (message.type === 'correction_request') {
         console.log(`[WebSocket] Processing correction request for: "${message.sentence}"`);
@@ -55,7 +152,16 @@ wss.on('connection', (ws, req) => {
         return;
       }
       
-      message.timestamp = new Date().toISOString();
+      const timestamp = new Date().toISOString();
+      if (message.type === 'batch') {
+        message.messages.forEach((inner) => {
+          inner.timestamp = timestamp;
+        });
+        relayStats.messagesIn += message.messages.length;
+      } else {
+        message.timestamp = timestamp;
+        relayStats.messagesIn++;
+      }
       
       const broadcastData = JSON.stringify(message);
       let broadcastCount = 0;
@@ -67,7 +173,7 @@ wss.on('connection', (ws, req) => {
         }
       });
       
-      console.log(`[WebSocket] Broadcasted to ${broadcastCount} clients`);
+      relayStats.framesOut += broadcastCount;
       
     } catch (error) {
       console.error('[WebSocket] Error processing message:', error);